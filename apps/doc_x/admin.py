@@ -1,13 +1,82 @@
 # apps/doc_x/admin.py
+from django.conf import settings
 from django.contrib import admin
-from .models import Document, Conversation, DocumentInteraction, UserQuestionLimit
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Substr
+from django.utils.functional import cached_property
+from .models import Document, Conversation, DocumentInteraction, UserQuestionLimit, DocumentCacheEntry, ProcessingJob, DocumentIndex, ConversationSummary
+
+PREVIEW_CHARS = 100
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    On PostgreSQL, unfiltered changelists of large tables use the planner's
+    row estimate (pg_class.reltuples) instead of a full COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= settings.DOC_X_ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Base admin for tables that grow without bound.
+
+    Skips the second full COUNT(*), estimates the paginator count, and
+    replaces icontains search (a sequential scan) with index-backed
+    lookups: exact match on `id_search_fields` (numeric terms) and
+    `exact_search_fields`, case-sensitive prefix on `prefix_search_fields`.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    id_search_fields = ()
+    exact_search_fields = ()
+    prefix_search_fields = ()
+
+    @staticmethod
+    def is_changelist(request):
+        match = request.resolver_match
+        return bool(match and match.url_name and match.url_name.endswith("_changelist"))
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        query = Q()
+        if term.isdigit():
+            for field in self.id_search_fields:
+                query |= Q(**{field: int(term)})
+        for field in self.exact_search_fields:
+            query |= Q(**{field: term})
+        for field in self.prefix_search_fields:
+            query |= Q(**{f"{field}__startswith": term})
+        if not query:
+            return queryset.none(), False
+        return queryset.filter(query), False
 
 
 @admin.register(Document)
-class DocumentAdmin(admin.ModelAdmin):
+class DocumentAdmin(LargeTableAdmin):
     list_display = ('id', 's3_key_short', 'has_summary', 'conversation_count', 'created_at')
     list_filter = ('created_at',)
-    search_fields = ('s3_key', 'content', 'summary')
+    search_fields = ('id', 's3_key')
+    search_help_text = 'Document ID or S3 key prefix'
+    id_search_fields = ('id',)
+    prefix_search_fields = ('s3_key',)
     readonly_fields = ('id', 'created_at', 'content_preview', 'summary_preview')
 
     fieldsets = (
@@ -32,8 +101,27 @@ class DocumentAdmin(admin.ModelAdmin):
 
     s3_key_short.short_description = 'S3 Key'
 
+    def get_queryset(self, request):
+        """Changelist rows skip the large text columns; counts come from one subquery per row."""
+        queryset = super().get_queryset(request)
+        if self.is_changelist(request):
+            conversations = (
+                Conversation.objects.filter(document=OuterRef('pk'))
+                .order_by()
+                .values('document')
+                .annotate(total=Count('id'))
+                .values('total')
+            )
+            queryset = queryset.defer('content', 'summary').annotate(
+                conversation_total=Subquery(conversations),
+                summary_head=Substr('summary', 1, 1),
+            )
+        return queryset
+
     def has_summary(self, obj):
         """Show if document has a summary"""
+        if hasattr(obj, 'summary_head'):
+            return bool(obj.summary_head)
         return bool(obj.summary)
 
     has_summary.short_description = 'Summary'
@@ -41,6 +129,8 @@ class DocumentAdmin(admin.ModelAdmin):
 
     def conversation_count(self, obj):
         """Count of conversations for this document"""
+        if hasattr(obj, 'conversation_total'):
+            return obj.conversation_total or 0
         return obj.conversations.count()
 
     conversation_count.short_description = 'Conversations'
@@ -69,42 +159,57 @@ class DocumentAdmin(admin.ModelAdmin):
 
 
 @admin.register(Conversation)
-class ConversationAdmin(admin.ModelAdmin):
-    list_display = ('id', 'document_id', 'role', 'message_preview', 'created_at')
+class ConversationAdmin(LargeTableAdmin):
+    list_display = ('id', 'document_id', 'role', 'message_preview', 'prompt_tokens', 'created_at')
     list_filter = ('role', 'created_at')
-    search_fields = ('message', 'document__s3_key')
+    search_fields = ('document',)
+    search_help_text = 'Document ID'
+    id_search_fields = ('document_id',)
     readonly_fields = ('id', 'created_at')
     raw_id_fields = ('document',)
 
     fieldsets = (
         ('Conversation Info', {
-            'fields': ('id', 'document', 'role', 'created_at')
+            'fields': ('id', 'document', 'role', 'prompt_tokens', 'created_at')
         }),
         ('Message', {
             'fields': ('message',)
         }),
     )
 
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.is_changelist(request):
+            queryset = queryset.defer('message').annotate(message_head=Substr('message', 1, PREVIEW_CHARS + 1))
+        return queryset
+
     def document_id(self, obj):
         """Display document ID"""
-        return obj.document.id if obj.document else '-'
+        return obj.document_id or '-'
 
     document_id.short_description = 'Document ID'
 
     def message_preview(self, obj):
         """Show preview of message"""
-        if len(obj.message) > 100:
-            return f"{obj.message[:97]}..."
-        return obj.message
+        message = getattr(obj, 'message_head', None)
+        if message is None:
+            message = obj.message
+        if len(message) > PREVIEW_CHARS:
+            return f"{message[:PREVIEW_CHARS - 3]}..."
+        return message
 
     message_preview.short_description = 'Message'
 
 
 @admin.register(DocumentInteraction)
-class DocumentInteractionAdmin(admin.ModelAdmin):
+class DocumentInteractionAdmin(LargeTableAdmin):
     list_display = ('id', 'user_display', 'session_key', 'document_id', 'questions_asked', 'last_question_at')
     list_filter = ('last_question_at', 'questions_asked')
-    search_fields = ('user__username', 'session_key', 'document__s3_key')
+    search_fields = ('user__username', 'session_key', 'document')
+    search_help_text = 'Exact username, session key or document ID'
+    id_search_fields = ('document_id',)
+    exact_search_fields = ('user__username', 'session_key')
+    list_select_related = ('user',)
     readonly_fields = ('last_question_at',)
     raw_id_fields = ('user', 'document')
 
@@ -125,16 +230,20 @@ class DocumentInteractionAdmin(admin.ModelAdmin):
 
     def document_id(self, obj):
         """Display document ID"""
-        return obj.document.id if obj.document else '-'
+        return obj.document_id or '-'
 
     document_id.short_description = 'Document ID'
 
 
 @admin.register(UserQuestionLimit)
-class UserQuestionLimitAdmin(admin.ModelAdmin):
+class UserQuestionLimitAdmin(LargeTableAdmin):
     list_display = ('id', 'user_display', 'session_key', 'document_id', 'count', 'last_asked')
     list_filter = ('last_asked', 'count')
-    search_fields = ('user__username', 'session_key', 'document__s3_key')
+    search_fields = ('user__username', 'session_key', 'document')
+    search_help_text = 'Exact username, session key or document ID'
+    id_search_fields = ('document_id',)
+    exact_search_fields = ('user__username', 'session_key')
+    list_select_related = ('user',)
     readonly_fields = ('last_asked',)
     raw_id_fields = ('user', 'document')
 
@@ -155,6 +264,58 @@ class UserQuestionLimitAdmin(admin.ModelAdmin):
 
     def document_id(self, obj):
         """Display document ID"""
-        return obj.document.id if obj.document else '-'
+        return obj.document_id or '-'
+
+    document_id.short_description = 'Document ID'
+
+
+@admin.register(DocumentCacheEntry)
+class DocumentCacheEntryAdmin(LargeTableAdmin):
+    list_display = ('id', 'cache_key_short', 'etag', 'hits', 'created_at', 'last_used_at')
+    list_filter = ('created_at',)
+    search_fields = ('cache_key',)
+    search_help_text = 'Cache key prefix'
+    prefix_search_fields = ('cache_key',)
+    readonly_fields = ('cache_key', 'etag', 'hits', 'created_at', 'last_used_at')
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.is_changelist(request):
+            queryset = queryset.defer('content', 'summary')
+        return queryset
+
+    def cache_key_short(self, obj):
+        """Display shortened cache key"""
+        return f"{obj.cache_key[:12]}..."
+
+    cache_key_short.short_description = 'Cache Key'
+
+
+@admin.register(ProcessingJob)
+class ProcessingJobAdmin(LargeTableAdmin):
+    list_display = ('id', 's3_key', 'status', 'stage', 'progress', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('id', 'document')
+    search_help_text = 'Job ID or document ID'
+    id_search_fields = ('id', 'document_id')
+    readonly_fields = ('created_at', 'updated_at', 'started_at', 'finished_at')
+    raw_id_fields = ('user', 'document')
+
+
+@admin.register(DocumentIndex)
+class DocumentIndexAdmin(LargeTableAdmin):
+    list_display = ('id', 'document_id', 'version', 'chunk_count', 'created_at')
+    list_filter = ('version', 'created_at')
+    readonly_fields = ('version', 'chunk_count', 'created_at')
+    raw_id_fields = ('document',)
+    exclude = ('data',)
 
-    document_id.short_description = 'Document ID'
\ No newline at end of file
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('data')
+
+
+@admin.register(ConversationSummary)
+class ConversationSummaryAdmin(LargeTableAdmin):
+    list_display = ('id', 'document_id', 'covered_until', 'updated_at')
+    readonly_fields = ('covered_until', 'updated_at')
+    raw_id_fields = ('document',)
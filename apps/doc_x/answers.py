@@ -0,0 +1,35 @@
+# apps/doc_x/answers.py
+"""Follow-up questions: shared by the sync (views) and async (async_views) ask endpoints."""
+from .models import Conversation
+from .indexing import grounded_question
+from .history import conversation_history
+
+
+def build_prompt(llm, document, question):
+    """
+    Grounded question and compacted history. The prompt size is reported
+    by the router (`usage`) for the provider that answered, since each
+    provider's payload is framed differently.
+    """
+    return grounded_question(document, question), conversation_history(document, llm)
+
+
+def answer_cache_key(document):
+    """
+    Answers are scoped to the document, so another user's upload of the
+    same letter never shares them. A repeat of a question is a hit at any
+    point in the conversation; follow-ups that name different things miss
+    on the content-word check (services.semantic_cache.question_signature).
+    """
+    return f"document:{document.id}"
+
+
+def save_answer(document, quota, question, answer, prompt_tokens=None):
+    """Persist a question/answer pair and return the questions remaining."""
+    Conversation.objects.bulk_create(
+        [
+            Conversation(document=document, role="user", message=question, prompt_tokens=prompt_tokens),
+            Conversation(document=document, role="assistant", message=answer),
+        ]
+    )
+    return quota.remaining
@@ -0,0 +1,144 @@
+# apps/doc_x/async_views.py
+"""
+Async versions of ask, process_text and process_document for the ASGI
+deployment (guidewisey/asgi.py, SERVER_MODE=asgi in entrypoint.sh).
+
+LLM calls await the clients' async methods, so a single worker keeps many
+requests in flight instead of blocking on each one. DRF views are sync
+only, so these are plain Django views: `api_endpoint` handles the
+authentication, method check and JSON parsing that @api_view does for
+the sync views. ORM work goes through the async ORM or sync_to_async.
+"""
+import json
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+
+from guidewisey.decorators import question_limit
+from services.registry import get_llm_client
+from services.semantic_cache import answer_cache
+from services.singleflight import inflight
+from services.summarize import MapReduceSummarizer
+from .jobs import enqueue_document_job, job_payload, wants_async
+from .processing import (
+    aprocess_s3_document,
+    file_extension,
+    ProcessingError,
+    save_text_document,
+    text_flight_key,
+    text_system_prompt,
+)
+from .answers import answer_cache_key, build_prompt, save_answer
+from .extract import EXTRACTORS
+from .serializers import DocumentSerializer
+
+
+def api_endpoint(view_func):
+    """
+    POST-only, session-authenticated JSON endpoint; sets `request.data`.
+    Errors mirror DRF's so clients can use either variant.
+    """
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        if request.method != "POST":
+            return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=403)
+        try:
+            request.data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"detail": "JSON parse error"}, status=400)
+        if not isinstance(request.data, dict):
+            return JsonResponse({"detail": "Expected a JSON object"}, status=400)
+        return await view_func(request, *args, **kwargs)
+
+    return _wrapped_view
+
+
+# -------------------------------
+# Ask follow-up question
+# -------------------------------
+@api_endpoint
+@question_limit()
+async def ask(request, document, quota):
+    llm = get_llm_client()
+    question = request.data.get("question")
+    if not question:
+        return JsonResponse({"error": "Question is required"}, status=400)
+
+    cache_key = answer_cache_key(document)
+
+    answer = answer_cache.lookup(cache_key, question)
+    usage = {}
+    if answer is None:
+        started = time.perf_counter()
+        try:
+            prompt, conversation = await sync_to_async(build_prompt)(llm, document, question)
+            answer = await llm.aexplain_text(prompt, conversation, usage=usage)
+        except Exception as e:
+            return JsonResponse({"error": f"AI explanation failed: {str(e)}"}, status=500)
+        answer_cache.store(cache_key, question, answer, latency=time.perf_counter() - started)
+
+    remaining = await sync_to_async(save_answer)(document, quota, question, answer, usage.get("prompt_tokens"))
+    return JsonResponse({"answer": answer, "remaining": remaining})
+
+
+# -------------------------------
+# Process raw text input
+# -------------------------------
+@api_endpoint
+@question_limit(use_session=True)
+async def process_text(request, document=None, quota=None):
+    llm = get_llm_client()
+    text = request.data.get("text")
+    preferred_language = request.data.get("preferred_language", "English")
+
+    if not text or len(text.strip()) < 10:
+        return JsonResponse({"error": "Text is required and must be meaningful"}, status=400)
+
+    summarizer = MapReduceSummarizer(llm.explain_text, model=llm.DEFAULT_MODEL, aexplain=llm.aexplain_text)
+    system_prompt = text_system_prompt(preferred_language)
+    try:
+        explanation = await inflight.ado(
+            text_flight_key(text, llm, summarizer, system_prompt, preferred_language),
+            lambda: summarizer.asummarize(text, system_prompt=system_prompt, preferred_language=preferred_language),
+        )
+    except Exception as e:
+        return JsonResponse({"error": f"Failed to process text: {str(e)}"}, status=500)
+
+    doc = await sync_to_async(save_text_document)(text, explanation)
+    return JsonResponse({"document_id": doc.id, "summary": explanation})
+
+
+# -------------------------------
+# Process uploaded document
+# -------------------------------
+@api_endpoint
+@question_limit(use_session=True)
+async def process_document(request, document=None, quota=None):
+    """See views.process_document; `?fields=` is honoured the same way."""
+    s3_key = request.data.get("s3_key")
+    if not s3_key:
+        return JsonResponse({"error": "s3_key is required"}, status=400)
+
+    if wants_async(request):
+        if file_extension(s3_key) not in EXTRACTORS:
+            return JsonResponse({"error": "Unsupported file type"}, status=400)
+        user = await request.auser()
+        job = await sync_to_async(enqueue_document_job)(
+            s3_key,
+            user=user if user.is_authenticated else None,
+            session_key=request.session.session_key,
+        )
+        return JsonResponse(job_payload(job), status=202)
+
+    try:
+        doc = await aprocess_s3_document(s3_key)
+    except ProcessingError as e:
+        return JsonResponse({"error": e.message}, status=e.status)
+
+    data = await sync_to_async(lambda: DocumentSerializer(doc, fields=request.GET.get("fields")).data)()
+    return JsonResponse(data)
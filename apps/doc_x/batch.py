@@ -0,0 +1,231 @@
+# apps/doc_x/batch.py
+"""
+Batch ingestion: many uploads and/or texts in one request.
+
+Each stage is bounded and runs across the whole batch:
+
+1. HEAD every upload (DOC_X_BATCH_IO_CONCURRENCY threads)
+2. look all of them up in the document cache with one query
+3. download and extract the misses (DOC_X_BATCH_IO_CONCURRENCY threads)
+4. summarize (DOC_X_BATCH_LLM_CONCURRENCY threads), coalescing identical
+   inputs through single-flight
+5. store new cache entries, Document, Conversation and DocumentIndex
+   rows with one bulk insert each
+
+Worker threads only talk to S3 and the LLM; all database work stays on
+the request thread. A failing item is reported in its result and does
+not stop the others.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+
+from services.registry import get_s3_client, get_llm_client
+from services.singleflight import inflight, make_key
+from services.summarize import MapReduceSummarizer
+from .models import Document, Conversation
+from .extract import EXTRACTORS
+from .cache import document_cache
+from .indexing import index_documents
+from .processing import (
+    ProcessingError,
+    file_extension,
+    document_cache_key,
+    document_flight_key,
+    extract_and_normalize,
+    text_flight_key,
+    text_system_prompt,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BatchItem:
+    """One entry of a batch request and, after processing, its outcome."""
+
+    def __init__(self, index, s3_key=None, text=None, preferred_language="English"):
+        self.index = index
+        self.s3_key = s3_key
+        self.text = text
+        self.preferred_language = preferred_language
+        self.ext = file_extension(s3_key) if s3_key else None
+        self.head = None
+        self.cache_key = None
+        self.summary = None
+        self.cached = False
+        self.duplicate_of = None
+        self.document = None
+        self.error = None
+        self.status = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def fail(self, message, status=500):
+        self.error, self.status = message, status
+
+    def result(self) -> dict:
+        if not self.ok:
+            return {"index": self.index, "error": self.error, "status": self.status}
+        return {"index": self.index, "document_id": self.document.id, "summary": self.summary, "cached": self.cached}
+
+
+def parse_batch(raw_items):
+    """
+    Build BatchItems from the request's `items` list. Invalid entries get
+    a 400 error of their own rather than failing the whole batch.
+
+    Raises:
+        ProcessingError: `items` is not a non-empty list within DOC_X_BATCH_MAX_ITEMS
+    """
+    if not isinstance(raw_items, list) or not raw_items:
+        raise ProcessingError("items must be a non-empty list", status=400)
+    if len(raw_items) > settings.DOC_X_BATCH_MAX_ITEMS:
+        raise ProcessingError(f"At most {settings.DOC_X_BATCH_MAX_ITEMS} items per batch", status=400)
+
+    items = []
+    for index, raw in enumerate(raw_items):
+        raw = raw if isinstance(raw, dict) else {}
+        s3_key, text = raw.get("s3_key"), raw.get("text")
+        item = BatchItem(index, s3_key=s3_key, text=text, preferred_language=raw.get("preferred_language", "English"))
+        if bool(s3_key) == bool(text):
+            item.fail("Each item needs either s3_key or text", status=400)
+        elif s3_key and item.ext not in EXTRACTORS:
+            item.fail("Unsupported file type", status=400)
+        elif text and (not isinstance(text, str) or len(text.strip()) < 10):
+            item.fail("Text is required and must be meaningful", status=400)
+        items.append(item)
+    return items
+
+
+def process_batch(items):
+    """Run every valid item through the pipeline; returns the same items with their outcome."""
+    s3_client = get_s3_client()
+    llm = get_llm_client()
+    summarizer = MapReduceSummarizer(llm.explain_text, model=llm.DEFAULT_MODEL)
+    uploads = [item for item in items if item.ok and item.s3_key]
+
+    with ThreadPoolExecutor(max_workers=settings.DOC_X_BATCH_IO_CONCURRENCY) as pool:
+        _fan_out(pool, uploads, lambda item: _head(s3_client, item, llm, summarizer))
+
+        uploads = [item for item in uploads if item.ok]
+        hits = document_cache.get_many(item.cache_key for item in uploads)
+        for item in uploads:
+            if item.cache_key in hits:
+                entry = hits[item.cache_key]
+                item.text, item.summary, item.cached = entry.content, entry.summary, True
+
+        # The same upload or text listed twice is processed once
+        pending = _unique([item for item in items if item.ok and not item.cached], llm, summarizer)
+        _fan_out(pool, [item for item in pending if item.s3_key], lambda item: _download(s3_client, item))
+
+    with ThreadPoolExecutor(max_workers=settings.DOC_X_BATCH_LLM_CONCURRENCY) as pool:
+        _fan_out(pool, [item for item in pending if item.ok], lambda item: _summarize(item, llm, summarizer))
+
+    for item in items:
+        if item.ok and item.duplicate_of is not None:
+            source = item.duplicate_of
+            item.text, item.summary, item.error, item.status = source.text, source.summary, source.error, source.status
+
+    document_cache.set_many(
+        [
+            (item.cache_key, item.head["etag"], item.text, item.summary)
+            for item in items
+            if item.ok and item.s3_key and not item.cached and item.duplicate_of is None
+        ]
+    )
+    _save_documents([item for item in items if item.ok])
+    return items
+
+
+def _work_key(item, llm, summarizer):
+    if item.s3_key:
+        return document_flight_key(item.cache_key)
+    system_prompt = text_system_prompt(item.preferred_language)
+    return text_flight_key(item.text, llm, summarizer, system_prompt, item.preferred_language)
+
+
+def _unique(items, llm, summarizer):
+    """The first item for each distinct input; later ones point at it via `duplicate_of`."""
+    first = {}
+    for item in items:
+        key = _work_key(item, llm, summarizer)
+        if key in first:
+            item.duplicate_of = first[key]
+        else:
+            first[key] = item
+    return list(first.values())
+
+
+def _fan_out(pool, items, work):
+    def run(item):
+        try:
+            work(item)
+        except ProcessingError as e:
+            item.fail(e.message, e.status)
+        except Exception as e:
+            logger.exception(f"Batch item {item.index} failed")
+            item.fail(str(e))
+
+    list(pool.map(run, items))
+
+
+def _head(s3_client, item, llm, summarizer):
+    try:
+        item.head = s3_client.head_object(item.s3_key)
+    except Exception as e:
+        raise ProcessingError(f"S3 download failed: {str(e)}")
+    item.cache_key = document_cache_key(item.head, item.ext, llm, summarizer)
+
+
+def _download(s3_client, item):
+    item.text = inflight.do(
+        make_key("extract_document", item.cache_key), lambda: _download_and_extract(s3_client, item)
+    )
+
+
+def _download_and_extract(s3_client, item):
+    try:
+        # The batch already runs DOC_X_BATCH_IO_CONCURRENCY downloads at once
+        buffer = s3_client.open_stream(item.s3_key, profile="serial")
+    except Exception as e:
+        raise ProcessingError(f"S3 download failed: {str(e)}")
+    try:
+        return extract_and_normalize(buffer, item.ext)
+    except Exception as e:
+        raise ProcessingError(f"Text extraction failed: {str(e)}")
+
+
+def _summarize(item, llm, summarizer):
+    key = _work_key(item, llm, summarizer)
+    try:
+        if item.s3_key:
+            # Shares flights with process_s3_document, which yield (text, summary)
+            item.text, item.summary = inflight.do(key, lambda: (item.text, summarizer.summarize(item.text)))
+        else:
+            system_prompt = text_system_prompt(item.preferred_language)
+            item.summary = inflight.do(
+                key,
+                lambda: summarizer.summarize(
+                    item.text, system_prompt=system_prompt, preferred_language=item.preferred_language
+                ),
+            )
+    except Exception as e:
+        failure = "AI explanation failed" if item.s3_key else "Failed to process text"
+        raise ProcessingError(f"{failure}: {str(e)}")
+
+
+def _save_documents(items):
+    with transaction.atomic():
+        documents = Document.objects.bulk_create(
+            [Document(s3_key=item.s3_key or "TEXT", content=item.text, summary=item.summary) for item in items]
+        )
+        Conversation.objects.bulk_create(
+            [Conversation(document=document, role="assistant", message=document.summary) for document in documents]
+        )
+    for item, document in zip(items, documents):
+        item.document = document
+    index_documents(documents)
@@ -0,0 +1,162 @@
+# apps/doc_x/cache.py
+import hashlib
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DocumentCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentCache:
+    """
+    Persistent, content-addressed cache for processed documents.
+
+    Entries are keyed on the S3 ETag of the uploaded bytes together with the
+    extractor version, model and system prompt, so a re-upload of the same
+    file reuses the stored text and summary while any change to the
+    pipeline produces a fresh key. Eviction is TTL + LRU on `last_used_at`.
+    """
+
+    def __init__(self, ttl_seconds=None, max_entries=None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @property
+    def enabled(self):
+        return getattr(settings, "DOC_X_CACHE_ENABLED", True)
+
+    def _ttl(self):
+        if self.ttl_seconds is not None:
+            return self.ttl_seconds
+        return settings.DOC_X_CACHE_TTL_SECONDS
+
+    def _max_entries(self):
+        if self.max_entries is not None:
+            return self.max_entries
+        return settings.DOC_X_CACHE_MAX_ENTRIES
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    @staticmethod
+    def make_key(
+        etag: str, ext: str, extractor_version: str, model: str, system_prompt: str, summarizer: str = ""
+    ) -> str:
+        """Build the cache key for a document and pipeline configuration."""
+        raw = "\x1f".join([etag, ext, extractor_version, model, system_prompt, summarizer])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Return a live cache entry for `key` or None."""
+        if not self.enabled:
+            return None
+
+        entry = DocumentCacheEntry.objects.filter(cache_key=key).first()
+        if entry is None:
+            self._count("misses")
+            return None
+
+        if entry.created_at < timezone.now() - timedelta(seconds=self._ttl()):
+            entry.delete()
+            self._count("misses")
+            self._count("evictions")
+            return None
+
+        DocumentCacheEntry.objects.filter(pk=entry.pk).update(
+            hits=F("hits") + 1, last_used_at=timezone.now()
+        )
+        self._count("hits")
+        return entry
+
+    def get_many(self, keys) -> dict:
+        """Live entries for `keys` as {key: entry}, in one query (batch processing)."""
+        keys = set(keys)
+        if not self.enabled or not keys:
+            return {}
+
+        cutoff = timezone.now() - timedelta(seconds=self._ttl())
+        entries = list(DocumentCacheEntry.objects.filter(cache_key__in=keys))
+        live = {entry.cache_key: entry for entry in entries if entry.created_at >= cutoff}
+        expired = [entry.pk for entry in entries if entry.created_at < cutoff]
+
+        if expired:
+            DocumentCacheEntry.objects.filter(pk__in=expired).delete()
+            self._count("evictions", len(expired))
+        if live:
+            DocumentCacheEntry.objects.filter(pk__in=[entry.pk for entry in live.values()]).update(
+                hits=F("hits") + 1, last_used_at=timezone.now()
+            )
+        self._count("hits", len(live))
+        self._count("misses", len(keys) - len(live))
+        return live
+
+    def set(self, key: str, etag: str, content: str, summary: str):
+        """Store extracted text and summary under `key`, then evict."""
+        if not self.enabled:
+            return None
+
+        entry, _ = DocumentCacheEntry.objects.update_or_create(
+            cache_key=key,
+            defaults={"etag": etag, "content": content, "summary": summary},
+        )
+        self._count("stores")
+        self.evict()
+        return entry
+
+    def set_many(self, entries):
+        """
+        Store many (key, etag, content, summary) tuples in one upsert,
+        then evict once.
+        """
+        if not self.enabled or not entries:
+            return
+        # One row per key: an upsert cannot touch the same row twice
+        rows = {key: (etag, content, summary) for key, etag, content, summary in entries}
+        DocumentCacheEntry.objects.bulk_create(
+            [
+                DocumentCacheEntry(cache_key=key, etag=etag, content=content, summary=summary)
+                for key, (etag, content, summary) in rows.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["cache_key"],
+            update_fields=["etag", "content", "summary", "last_used_at"],
+        )
+        self._count("stores", len(rows))
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries and the least recently used beyond the cap."""
+        cutoff = timezone.now() - timedelta(seconds=self._ttl())
+        expired, _ = DocumentCacheEntry.objects.filter(created_at__lt=cutoff).delete()
+
+        overflow = DocumentCacheEntry.objects.count() - self._max_entries()
+        lru = 0
+        if overflow > 0:
+            stale_ids = list(
+                DocumentCacheEntry.objects.order_by("last_used_at")
+                .values_list("id", flat=True)[:overflow]
+            )
+            lru, _ = DocumentCacheEntry.objects.filter(id__in=stale_ids).delete()
+
+        if expired or lru:
+            logger.info(f"Document cache evicted {expired} expired and {lru} LRU entries")
+            self._count("evictions", expired + lru)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+document_cache = DocumentCache()
@@ -1,21 +1,240 @@
+import io
+import os
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
 from pypdf import PdfReader
 from docx import Document as DocxDocument
 import pytesseract
 from PIL import Image
 
+from .preprocess import preprocess_image, get_profile, OCR_PROFILE
+
+# Optional: renders PDF pages for OCR. Without it we OCR the page's
+# embedded scan image instead.
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever extraction output changes so cached results are invalidated.
+EXTRACTOR_VERSION = f"4+{OCR_PROFILE}"
+
+# Pages are joined with a form feed so page boundaries survive extraction.
+PAGE_BREAK = "\f"
+
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "500"))  # per-request page cap
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+PDF_OCR_ENABLED = os.getenv("PDF_OCR_ENABLED", "True") == "True"
+PDF_OCR_MIN_CHARS = int(os.getenv("PDF_OCR_MIN_CHARS", "20"))  # below this a page has no text layer
+PDF_OCR_DPI = int(os.getenv("PDF_OCR_DPI", "200"))
+PDF_WORKERS = max(1, min(int(os.getenv("PDF_WORKERS", "0")) or os.cpu_count() or 1, os.cpu_count() or 1))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Every extractor accepts either a filesystem path or a binary file-like
+# object (e.g. the spooled buffer returned by S3Client.open_stream).
+
+
+def get_process_pool():
+    """Return the process-wide extraction pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: workers only need pypdf/PIL, and forking a threaded
+            # Django worker is not safe.
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"Extraction process pool started with {PDF_WORKERS} workers")
+        return _pool
+
+
+def _reset_process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _pdf_input(source):
+    """Return something a worker process can reopen: a path or the raw bytes."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    source.seek(0)
+    return source.read()
+
+
+def _open_pdf(pdf_input):
+    if isinstance(pdf_input, bytes):
+        return PdfReader(io.BytesIO(pdf_input))
+    return PdfReader(pdf_input)
+
+
+def _extract_page_range(pdf_input, start, stop):
+    """Worker entry point: extract text for pages [start, stop)."""
+    reader = _open_pdf(pdf_input)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _rasterize_page(pdf_input, index, dpi):
+    """Render a single PDF page to a PIL image."""
+    if pdfium is not None:
+        pdf = pdfium.PdfDocument(pdf_input)
+        try:
+            return pdf[index].render(scale=dpi / 72).to_pil()
+        finally:
+            pdf.close()
+
+    # Scanned PDFs are one full-page image per page; OCR the largest one.
+    images = _open_pdf(pdf_input).pages[index].images
+    if not images:
+        return None
+    largest = max(images, key=lambda img: img.image.width * img.image.height)
+    return largest.image
+
 
-def extract_pdf(path):
-    reader = PdfReader(path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
-    return text
+def _ocr_page(pdf_input, index, dpi):
+    """Worker entry point: rasterize one page and OCR it."""
+    image = _rasterize_page(pdf_input, index, dpi)
+    if image is None:
+        return ""
+    return ocr_image(image, dpi=dpi)
 
 
-def extract_docx(path):
-    doc = DocxDocument(path)
+def _page_ranges(page_count, parts):
+    size, extra = divmod(page_count, parts)
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        if stop > start:
+            yield start, stop
+        start = stop
+
+
+def _extract_text_layer(reader, pdf_input, page_count):
+    if page_count < PDF_PARALLEL_MIN_PAGES or PDF_WORKERS == 1:
+        return [reader.pages[i].extract_text() or "" for i in range(page_count)]
+
+    pool = get_process_pool()
+    futures = [
+        pool.submit(_extract_page_range, pdf_input, start, stop)
+        for start, stop in _page_ranges(page_count, PDF_WORKERS)
+    ]
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+
+def _ocr_missing_pages(pages, pdf_input):
+    """OCR pages without a text layer and merge them back in page order."""
+    scanned = [i for i, text in enumerate(pages) if len(text.strip()) < PDF_OCR_MIN_CHARS]
+    if not scanned:
+        return pages
+
+    logger.info(f"OCR fallback for {len(scanned)} of {len(pages)} PDF pages")
+    pages = list(pages)
+    if PDF_WORKERS == 1 or len(scanned) == 1:
+        tasks = [(i, partial(_ocr_page, pdf_input, i, PDF_OCR_DPI)) for i in scanned]
+    else:
+        pool = get_process_pool()
+        tasks = [(i, pool.submit(_ocr_page, pdf_input, i, PDF_OCR_DPI).result) for i in scanned]
+
+    for index, get_text in tasks:
+        try:
+            pages[index] = get_text()
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            # Keep whatever text layer the page had rather than failing the document
+            logger.error(f"OCR failed for PDF page {index + 1}: {e}")
+    return pages
+
+
+def extract_pdf_pages(source, max_pages=None, ocr=None):
+    """
+    Extract text per page, in page order.
+
+    Large PDFs are split into contiguous page ranges that are extracted in
+    the shared process pool; small ones stay on the calling thread where
+    the pool round trip would cost more than it saves. Pages without a
+    text layer (scans) are then rasterized and OCR'd, one page per task.
+    """
+    max_pages = max_pages or PDF_MAX_PAGES
+    ocr = PDF_OCR_ENABLED if ocr is None else ocr
+    pdf_input = _pdf_input(source)
+    reader = _open_pdf(pdf_input)
+    page_count = len(reader.pages)
+    if page_count > max_pages:
+        logger.warning(f"PDF has {page_count} pages, extracting the first {max_pages}")
+        page_count = max_pages
+
+    try:
+        pages = _extract_text_layer(reader, pdf_input, page_count)
+        if ocr:
+            pages = _ocr_missing_pages(pages, pdf_input)
+        return pages
+    except BrokenProcessPool:
+        logger.error("Extraction process pool died, retrying serially")
+        _reset_process_pool()
+        pages = [reader.pages[i].extract_text() or "" for i in range(page_count)]
+        if ocr:
+            pages = _ocr_missing_pages(pages, pdf_input)
+        return pages
+
+
+def extract_pdf(source):
+    return PAGE_BREAK.join(extract_pdf_pages(source))
+
+
+def extract_docx(source):
+    doc = DocxDocument(source)
     return "\n".join(p.text for p in doc.paragraphs)
 
 
-def extract_image(path):
-    return pytesseract.image_to_string(Image.open(path))
+def ocr_image(image, profile=None, region=None, dpi=None):
+    """
+    Preprocess a PIL image with an OCR profile and run Tesseract on it.
+    `dpi` is the known resolution of rendered pages; photos fall back to
+    the profile's target DPI.
+    """
+    options = get_profile(profile)
+    image = preprocess_image(image, profile=profile, region=region)
+    if options and options["target_dpi"]:
+        dpi = min(dpi, options["target_dpi"]) if dpi else options["target_dpi"]
+    config = f"--dpi {dpi}" if dpi else ""
+    return pytesseract.image_to_string(image, config=config)
+
+
+def extract_image(source, profile=None, region=None):
+    with Image.open(source) as image:
+        return ocr_image(image, profile=profile, region=region)
+
+
+EXTRACTORS = {
+    "pdf": extract_pdf,
+    "docx": extract_docx,
+    "doc": extract_docx,
+    "png": extract_image,
+    "jpg": extract_image,
+    "jpeg": extract_image,
+}
+
+
+def extract_text(source, ext):
+    """Dispatch to the extractor for a file extension (without the dot)."""
+    try:
+        extractor = EXTRACTORS[ext]
+    except KeyError:
+        raise ValueError(f"Unsupported file type: {ext}")
+    return extractor(source)
@@ -0,0 +1,28 @@
+# apps/doc_x/history.py
+from services.history import HistoryManager, history_budget
+from .models import ConversationSummary
+
+
+def conversation_history(document, llm):
+    """
+    Messages to send with the next question: a rolling summary of older
+    turns plus the recent turns verbatim, within the model's history budget.
+    Only turns not yet folded into the summary are loaded.
+    """
+    stored = ConversationSummary.objects.filter(document=document).first()
+    summary = stored.summary if stored else ""
+    covered_until = stored.covered_until if stored else 0
+
+    rows = list(
+        document.conversations.filter(id__gt=covered_until).order_by("id").values_list("id", "role", "message")
+    )
+    turns = [{"role": role, "content": message} for _, role, message in rows]
+
+    manager = HistoryManager(llm.explain_text, budget_tokens=history_budget(llm.DEFAULT_MODEL))
+    messages, summary, folded = manager.compact(summary, turns)
+    if folded:
+        ConversationSummary.objects.update_or_create(
+            document=document,
+            defaults={"summary": summary, "covered_until": rows[folded - 1][0]},
+        )
+    return messages
@@ -0,0 +1,77 @@
+# apps/doc_x/indexing.py
+import json
+import logging
+
+from services.retrieval import BM25Index, INDEX_VERSION, RETRIEVAL_TOKEN_BUDGET, RETRIEVAL_TOP_K
+from .models import DocumentIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _payload(index):
+    return json.dumps(index.to_dict(), separators=(",", ":"))
+
+
+def build_document_index(document, new=False):
+    """
+    Chunk and index `document.content`, replacing any stored index.
+    With `new` (a document just created) the row is inserted directly.
+    """
+    index = BM25Index.build(document.content or "")
+    fields = {"version": INDEX_VERSION, "chunk_count": len(index.chunks), "data": _payload(index)}
+    if new:
+        DocumentIndex.objects.create(document=document, **fields)
+    else:
+        DocumentIndex.objects.update_or_create(document=document, defaults=fields)
+    return index
+
+
+def index_document(document):
+    """Build the index after processing; on failure ask() builds it lazily."""
+    try:
+        build_document_index(document, new=True)
+    except Exception as e:
+        logger.warning(f"Indexing Document {document.id} failed: {e}")
+
+
+def index_documents(documents):
+    """index_document for many new documents, with one bulk insert."""
+    rows = []
+    for document in documents:
+        try:
+            index = BM25Index.build(document.content or "")
+        except Exception as e:
+            logger.warning(f"Indexing Document {document.id} failed: {e}")
+            continue
+        rows.append(
+            DocumentIndex(
+                document=document, version=INDEX_VERSION, chunk_count=len(index.chunks), data=_payload(index)
+            )
+        )
+    try:
+        DocumentIndex.objects.bulk_create(rows)
+    except Exception as e:
+        logger.warning(f"Indexing {len(rows)} documents failed: {e}")
+
+
+def get_document_index(document):
+    """Load the stored index, building it for documents processed before indexing existed."""
+    stored = DocumentIndex.objects.filter(document=document, version=INDEX_VERSION).first()
+    if stored is None:
+        logger.info(f"Building missing search index for Document {document.id}")
+        return build_document_index(document)
+    return BM25Index.from_dict(json.loads(stored.data))
+
+
+def relevant_excerpts(document, question, k=RETRIEVAL_TOP_K, token_budget=RETRIEVAL_TOKEN_BUDGET):
+    """Top-k chunks of the document for `question`, within `token_budget`."""
+    return get_document_index(document).select(question, k=k, token_budget=token_budget)
+
+
+def grounded_question(document, question):
+    """The question prefixed with the document excerpts it should be answered from."""
+    excerpts = relevant_excerpts(document, question)
+    if not excerpts:
+        return question
+    context = "\n\n---\n\n".join(excerpts)
+    return f"Relevant excerpts from the document:\n{context}\n\nQuestion: {question}"
@@ -0,0 +1,228 @@
+# apps/doc_x/jobs.py
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ProcessingJob
+from .processing import process_s3_document, ProcessingError
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_document_job(s3_key, user=None, session_key=None):
+    """Queue `s3_key` for background processing and return the job."""
+    job = ProcessingJob.objects.create(s3_key=s3_key, user=user, session_key=session_key)
+    logger.info(f"Queued processing job {job.id} for {s3_key}")
+    return job
+
+
+def wants_async(request):
+    """Queue instead of processing inline: DOC_X_ASYNC_PROCESSING or a "Prefer: respond-async" header."""
+    prefer = request.headers.get("Prefer", "")
+    return settings.DOC_X_ASYNC_PROCESSING or "respond-async" in prefer
+
+
+def job_payload(job):
+    """The job as returned by the 202 response and the status endpoint."""
+    payload = {
+        "job_id": job.id,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress,
+        "status_url": f"/api/doc-x/jobs/{job.id}/",
+    }
+    if job.status == ProcessingJob.STATUS_SUCCEEDED and job.document:
+        payload["document_id"] = job.document.id
+        payload["summary"] = job.document.summary
+    if job.status == ProcessingJob.STATUS_FAILED:
+        payload["error"] = job.error
+    return payload
+
+
+def claim_next_job(worker_id):
+    """
+    Atomically move the oldest queued job to running and return it.
+
+    The conditional UPDATE is the lock: only one worker sees rowcount 1 for
+    a given job, on SQLite and PostgreSQL alike.
+    """
+    candidates = (
+        ProcessingJob.objects.filter(status=ProcessingJob.STATUS_QUEUED)
+        .order_by("created_at", "id")
+        .values_list("id", flat=True)[:10]
+    )
+    for job_id in candidates:
+        claimed = ProcessingJob.objects.filter(id=job_id, status=ProcessingJob.STATUS_QUEUED).update(
+            status=ProcessingJob.STATUS_RUNNING,
+            stage="starting",
+            worker=worker_id,
+            started_at=timezone.now(),
+            updated_at=timezone.now(),
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return ProcessingJob.objects.get(id=job_id)
+    return None
+
+
+def _claimed(job):
+    """
+    The job row, as long as this run still owns it. Once a job is requeued
+    (see requeue_stale_jobs) and claimed again, worker and attempts no
+    longer match and a superseded run's writes are dropped.
+    """
+    return ProcessingJob.objects.filter(
+        id=job.id, status=ProcessingJob.STATUS_RUNNING, worker=job.worker, attempts=job.attempts
+    )
+
+
+def _heartbeat(job, stop, interval):
+    """Touch updated_at every `interval` seconds until `stop` is set."""
+    try:
+        while not stop.wait(interval):
+            try:
+                if not _claimed(job).update(updated_at=timezone.now()):
+                    logger.warning(f"Processing job {job.id} was taken over by another worker")
+                    return
+            except Exception as e:
+                logger.error(f"Heartbeat for processing job {job.id} failed: {e}")
+    finally:
+        connection.close()
+
+
+def run_job(job):
+    """
+    Process a claimed job, recording progress and the outcome. A heartbeat
+    thread keeps the job fresh while long stages (OCR, map-reduce) run.
+    """
+
+    def progress(stage, percent):
+        _claimed(job).update(stage=stage, progress=percent, updated_at=timezone.now())
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_heartbeat,
+        args=(job, stop, settings.DOC_X_JOB_HEARTBEAT_SECONDS),
+        name=f"doc-x-job-{job.id}-heartbeat",
+        daemon=True,
+    )
+    heartbeat.start()
+    try:
+        document = process_s3_document(job.s3_key, progress=progress)
+    except ProcessingError as e:
+        outcome = {"status": ProcessingJob.STATUS_FAILED, "error": e.message, "error_status": e.status}
+    except Exception as e:
+        logger.exception(f"Processing job {job.id} crashed")
+        outcome = {
+            "status": ProcessingJob.STATUS_FAILED,
+            "error": f"Processing failed: {str(e)}",
+            "error_status": 500,
+        }
+    else:
+        outcome = {"status": ProcessingJob.STATUS_SUCCEEDED, "document": document}
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    _finish(job, **outcome)
+
+
+def _finish(job, status, document=None, error="", error_status=None):
+    updated = _claimed(job).update(
+        status=status,
+        stage="done" if status == ProcessingJob.STATUS_SUCCEEDED else "failed",
+        progress=100,
+        document=document,
+        error=error,
+        error_status=error_status,
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        logger.warning(f"Processing job {job.id} was superseded; dropping its {status} result")
+        return
+    logger.info(f"Processing job {job.id} {status}")
+
+
+def requeue_stale_jobs(stale_after=None, max_attempts=None):
+    """
+    Recover jobs whose worker died mid-run: requeue them, or fail them
+    once they have used up their attempts. Live workers heartbeat every
+    DOC_X_JOB_HEARTBEAT_SECONDS, so a job only goes stale when its worker
+    has stopped.
+    """
+    stale_after = stale_after or settings.DOC_X_JOB_STALE_SECONDS
+    max_attempts = max_attempts or settings.DOC_X_JOB_MAX_ATTEMPTS
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    stale = ProcessingJob.objects.filter(status=ProcessingJob.STATUS_RUNNING, updated_at__lt=cutoff)
+
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=ProcessingJob.STATUS_FAILED,
+        stage="failed",
+        error="Processing timed out",
+        error_status=504,
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status=ProcessingJob.STATUS_QUEUED, stage="", progress=0, worker="", updated_at=timezone.now()
+    )
+    if failed or requeued:
+        logger.warning(f"Recovered stale jobs: {requeued} requeued, {failed} failed")
+    return requeued, failed
+
+
+class JobWorkerPool:
+    """
+    A pool of threads that poll the job table. Extraction already fans out
+    to its own process pool, so threads here mostly wait on S3 and the LLM.
+    """
+
+    def __init__(self, concurrency=2, poll_interval=1.0):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self.processed = 0
+        self._lock = threading.Lock()
+
+    def _loop(self, index, drain):
+        worker_id = f"{self.worker_prefix}:{index}"
+        next_recovery = timezone.now()
+        while not self.stop_event.is_set():
+            close_old_connections()
+            if index == 0 and timezone.now() >= next_recovery:
+                requeue_stale_jobs()
+                next_recovery = timezone.now() + timedelta(seconds=settings.DOC_X_JOB_STALE_SECONDS / 2)
+            job = claim_next_job(worker_id)
+            if job is None:
+                if drain:
+                    break
+                self.stop_event.wait(self.poll_interval)
+                continue
+            run_job(job)
+            with self._lock:
+                self.processed += 1
+        close_old_connections()
+
+    def run(self, drain=False):
+        """Block until stop() is called, or until the queue is empty if `drain`."""
+        threads = [
+            threading.Thread(target=self._loop, args=(i, drain), name=f"doc-x-job-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+
+    def stop(self):
+        self.stop_event.set()
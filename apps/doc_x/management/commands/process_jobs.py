@@ -0,0 +1,45 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.doc_x.jobs import JobWorkerPool
+from services.registry import registry
+
+
+class Command(BaseCommand):
+    help = "Run background workers that process queued Doc-X documents."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.DOC_X_JOB_CONCURRENCY,
+            help="Number of worker threads (default: DOC_X_JOB_CONCURRENCY)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.DOC_X_JOB_POLL_INTERVAL,
+            help="Seconds to sleep when the queue is empty",
+        )
+        parser.add_argument(
+            "--drain",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling forever",
+        )
+
+    def handle(self, *args, **options):
+        pool = JobWorkerPool(concurrency=options["concurrency"], poll_interval=options["poll_interval"])
+
+        def shutdown(signum, frame):
+            self.stdout.write("Stopping workers after current jobs...")
+            pool.stop()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        registry.warm_up()
+        self.stdout.write(f"Processing jobs with {options['concurrency']} worker(s)")
+        pool.run(drain=options["drain"])
+        self.stdout.write(self.style.SUCCESS(f"Workers stopped, {pool.processed} job(s) processed"))
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-17 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doc_x", "0002_alter_document_s3_key_documentinteraction_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentCacheEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cache_key", models.CharField(max_length=64, unique=True)),
+                ("etag", models.CharField(max_length=255)),
+                ("content", models.TextField()),
+                ("summary", models.TextField()),
+                ("hits", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_used_at", models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
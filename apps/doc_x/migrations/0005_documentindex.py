@@ -0,0 +1,40 @@
+# Generated by Django 5.1.15 on 2026-10-17 20:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doc_x", "0004_processingjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentIndex",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveSmallIntegerField(default=1)),
+                ("chunk_count", models.PositiveIntegerField(default=0)),
+                ("data", models.JSONField(default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "document",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_index",
+                        to="doc_x.document",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-17 20:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def delete_session_documents(apps, schema_editor):
+    """Drop the empty SESSION_<key> placeholder documents the old decorator created."""
+    Document = apps.get_model("doc_x", "Document")
+    Document.objects.filter(s3_key__startswith="SESSION_", content="").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doc_x", "0006_conversation_history"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="userquestionlimit",
+            name="document",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="doc_x.document",
+            ),
+        ),
+        migrations.RunPython(delete_session_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.15 on 2026-10-17 20:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doc_x", "0007_userquestionlimit_optional_document"),
+    ]
+
+    # Create the composite index before dropping the single-column FK index
+    operations = [
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                fields=["document", "id"], name="doc_x_conv_document_id_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="conversation",
+            name="document",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="conversations",
+                to="doc_x.document",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="document",
+            name="s3_key",
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+    ]
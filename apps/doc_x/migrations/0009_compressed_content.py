@@ -0,0 +1,96 @@
+# Generated by Django 5.1.15 on 2026-10-17 21:40
+
+from django.db import migrations, models, transaction
+
+from apps.doc_x.storage import CompressedTextField, decode
+
+BATCH_SIZE = 500
+MODELS = ["Document", "DocumentCacheEntry"]
+
+
+def _copy(apps, model_name, source, target):
+    """Copy `source` into `target` in primary-key batches, one transaction each."""
+    Model = apps.get_model("doc_x", model_name)
+    last_id = 0
+    while True:
+        rows = list(
+            Model.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", source)[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        with transaction.atomic():
+            Model.objects.bulk_update(
+                [Model(id=pk, **{target: _text(value)}) for pk, value in rows], [target]
+            )
+        last_id = rows[-1][0]
+
+
+def _text(value):
+    if isinstance(value, (bytes, memoryview)):
+        return decode(value)
+    return value or ""
+
+
+def compress_content(apps, schema_editor):
+    for model_name in MODELS:
+        _copy(apps, model_name, "content", "content_blob")
+
+
+def decompress_content(apps, schema_editor):
+    for model_name in MODELS:
+        _copy(apps, model_name, "content_blob", "content")
+
+
+class Migration(migrations.Migration):
+    # Each backfill batch commits on its own so large tables are not
+    # rewritten in one long transaction.
+    atomic = False
+
+    dependencies = [
+        ("doc_x", "0008_hot_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="content_blob",
+            field=CompressedTextField(null=True),
+        ),
+        migrations.AddField(
+            model_name="documentcacheentry",
+            name="content_blob",
+            field=CompressedTextField(null=True),
+        ),
+        # Nullable while both columns exist, so the migration can be reversed
+        migrations.AlterField(
+            model_name="document",
+            name="content",
+            field=models.TextField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="documentcacheentry",
+            name="content",
+            field=models.TextField(null=True),
+        ),
+        migrations.RunPython(compress_content, decompress_content),
+        migrations.RemoveField(model_name="document", name="content"),
+        migrations.RemoveField(model_name="documentcacheentry", name="content"),
+        migrations.RenameField(
+            model_name="document", old_name="content_blob", new_name="content"
+        ),
+        migrations.RenameField(
+            model_name="documentcacheentry", old_name="content_blob", new_name="content"
+        ),
+        migrations.AlterField(
+            model_name="document",
+            name="content",
+            field=CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name="documentcacheentry",
+            name="content",
+            field=CompressedTextField(),
+        ),
+    ]
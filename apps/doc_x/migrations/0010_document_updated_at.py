@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-17 22:30
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    Document = apps.get_model("doc_x", "Document")
+    Document.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doc_x", "0009_compressed_content"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.15 on 2026-10-17 23:10
+
+import json
+
+from django.db import migrations, models, transaction
+
+from apps.doc_x.storage import CompressedTextField, decode
+
+BATCH_SIZE = 500
+
+
+def _copy(apps, source, target, convert):
+    """Copy `source` into `target` in primary-key batches, one transaction each."""
+    DocumentIndex = apps.get_model("doc_x", "DocumentIndex")
+    last_id = 0
+    while True:
+        rows = list(
+            DocumentIndex.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", source)[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        with transaction.atomic():
+            DocumentIndex.objects.bulk_update(
+                [DocumentIndex(id=pk, **{target: convert(value)}) for pk, value in rows], [target]
+            )
+        last_id = rows[-1][0]
+
+
+def _to_json(value):
+    return json.dumps(value or {}, separators=(",", ":"))
+
+
+def _from_blob(value):
+    return json.loads(decode(value) or "{}")
+
+
+def compress_data(apps, schema_editor):
+    _copy(apps, "data", "data_blob", _to_json)
+
+
+def decompress_data(apps, schema_editor):
+    _copy(apps, "data_blob", "data", _from_blob)
+
+
+class Migration(migrations.Migration):
+    # Each backfill batch commits on its own so large tables are not
+    # rewritten in one long transaction.
+    atomic = False
+
+    dependencies = [
+        ("doc_x", "0010_document_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentindex",
+            name="data_blob",
+            field=CompressedTextField(null=True, offload=False),
+        ),
+        # Nullable while both columns exist, so the migration can be reversed
+        migrations.AlterField(
+            model_name="documentindex",
+            name="data",
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(compress_data, decompress_data),
+        migrations.RemoveField(model_name="documentindex", name="data"),
+        migrations.RenameField(
+            model_name="documentindex", old_name="data_blob", new_name="data"
+        ),
+        migrations.AlterField(
+            model_name="documentindex",
+            name="data",
+            field=CompressedTextField(offload=False),
+        ),
+    ]
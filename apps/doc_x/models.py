@@ -2,25 +2,47 @@
 from django.db import models
 from django.conf import settings
 
+from .storage import CompressedTextField
+
 
 class Document(models.Model):
-    s3_key = models.CharField(max_length=255)
-    content = models.TextField()
+    s3_key = models.CharField(max_length=255, db_index=True)
+    content = CompressedTextField()  # full extracted text, compressed or offloaded (see storage.py)
     summary = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # drives the detail endpoint's ETag/Last-Modified
 
     def __str__(self):
         return f"Document {self.id}"
 
 
 class Conversation(models.Model):
-    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name="conversations")
+    # Covered by the (document, id) index below, which also serves history reads in id order
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name="conversations", db_index=False)
     role = models.CharField(max_length=20)  # 'user' or 'assistant'
     message = models.TextField()
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)  # estimated, user turns only
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["document", "id"], name="doc_x_conv_document_id_idx")]
+
+    def __str__(self):
+        return f"{self.role} - Doc {self.document_id}"
+
+
+class ConversationSummary(models.Model):
+    """
+    Rolling summary of a document's older conversation turns.
+    Turns with id <= covered_until are folded into `summary`.
+    """
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, related_name="history_summary")
+    summary = models.TextField(blank=True, default="")
+    covered_until = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
-        return f"{self.role} - Doc {self.document.id}"
+        return f"Summary for Doc {self.document_id} (up to {self.covered_until})"
 
 
 class DocumentInteraction(models.Model):
@@ -39,8 +61,8 @@ class DocumentInteraction(models.Model):
 
     def __str__(self):
         if self.user:
-            return f"{self.user.username} - Doc {self.document.id} ({self.questions_asked})"
-        return f"Session {self.session_key} - Doc {self.document.id} ({self.questions_asked})"
+            return f"{self.user.username} - Doc {self.document_id} ({self.questions_asked})"
+        return f"Session {self.session_key} - Doc {self.document_id} ({self.questions_asked})"
 
 
 class UserQuestionLimit(models.Model):
@@ -54,7 +76,7 @@ class UserQuestionLimit(models.Model):
         on_delete=models.CASCADE
     )
     session_key = models.CharField(max_length=40, null=True, blank=True)
-    document = models.ForeignKey(Document, on_delete=models.CASCADE)
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, null=True, blank=True)  # null for session quotas
     count = models.PositiveIntegerField(default=0)
     last_asked = models.DateTimeField(auto_now=True)
 
@@ -63,5 +85,76 @@ class UserQuestionLimit(models.Model):
 
     def __str__(self):
         if self.user:
-            return f"{self.user.username} - Doc {self.document.id} ({self.count})"
-        return f"Session {self.session_key} - Doc {self.document.id} ({self.count})"
+            return f"{self.user.username} - Doc {self.document_id} ({self.count})"
+        return f"Session {self.session_key} - Doc {self.document_id} ({self.count})"
+
+
+class DocumentCacheEntry(models.Model):
+    """
+    Content-addressed cache of extracted text and AI summary.
+    The key covers the S3 ETag, extractor version, model and system prompt.
+    """
+    cache_key = models.CharField(max_length=64, unique=True)
+    etag = models.CharField(max_length=255)
+    content = CompressedTextField()
+    summary = models.TextField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"Cache {self.cache_key[:12]} ({self.hits} hits)"
+
+
+class ProcessingJob(models.Model):
+    """
+    A queued document-processing request, picked up by `manage.py process_jobs`.
+    """
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
+    session_key = models.CharField(max_length=40, null=True, blank=True)
+    s3_key = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    stage = models.CharField(max_length=32, blank=True, default="")
+    progress = models.PositiveSmallIntegerField(default=0)
+    document = models.ForeignKey(Document, on_delete=models.SET_NULL, null=True, blank=True, related_name="jobs")
+    error = models.TextField(blank=True, default="")
+    error_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"], name="doc_x_job_status_created_idx")]
+
+    def __str__(self):
+        return f"Job {self.id} ({self.status})"
+
+
+class DocumentIndex(models.Model):
+    """
+    Chunks and BM25 postings for a Document (see services/retrieval.py),
+    built once so each question only sends the relevant excerpts.
+    """
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, related_name="search_index")
+    version = models.PositiveSmallIntegerField(default=1)
+    chunk_count = models.PositiveIntegerField(default=0)
+    # BM25Index.to_dict() as JSON, compressed; never offloaded since every question reads it
+    data = CompressedTextField(offload=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Index for Doc {self.document_id} ({self.chunk_count} chunks)"
@@ -0,0 +1,201 @@
+import os
+import re
+import math
+import logging
+import threading
+from collections import Counter
+
+from services.tokens import estimate_tokens
+from .extract import PAGE_BREAK
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever normalization output changes so cached results are invalidated.
+NORMALIZER_VERSION = "3"
+
+# Lines this close to the top or bottom of a page are header/footer candidates.
+NORMALIZE_EDGE_LINES = int(os.getenv("NORMALIZE_EDGE_LINES", "3"))
+# A header/footer line must recur on at least this share of pages (and on two).
+NORMALIZE_REPEAT_RATIO = float(os.getenv("NORMALIZE_REPEAT_RATIO", "0.5"))
+
+# Characters that only add tokens: non-breaking and zero-width spaces, tabs, soft hyphens.
+_INVISIBLE = str.maketrans({"\u00a0": " ", "\u2009": " ", "\u202f": " ", "\t": " ", "\u200b": None, "\u00ad": None})
+_SPACES = re.compile(r" {2,}")
+_DIGITS = re.compile(r"\d+")
+_BLANK_LINES = re.compile(r"\n{2,}")
+# "informa-\ntion" -> "information"; capitalised words ("Smith-\nJones") keep their hyphen
+_HYPHENATED = re.compile(r"([a-z])-\n([a-z])")
+_SENTENCES = re.compile(r"(?<=[.!?]) ")
+
+# Page numbers, only dropped in the header/footer zone of a page.
+PAGE_NUMBER_PATTERNS = [
+    re.compile(r"page\s*\d{1,4}(\s*(of|/)\s*\d{1,4})?|\d{1,4}\s*(of|/)\s*\d{1,4}", re.IGNORECASE),
+    re.compile(r"[-\u2013\u2014]\s*\d{1,4}\s*[-\u2013\u2014]"),
+]
+# A bare number is only a page number if it counts up with the neighbouring pages
+_BARE_NUMBER = re.compile(r"\d{1,4}")
+
+# Sentences starting like this are dropped wherever they appear.
+BOILERPLATE_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in [
+        r"this (e-?mail|message|letter|document)( and any (attachments?|files?)[^.]*)? "
+        r"(is|are|may be|contains?) (strictly )?(confidential|privileged)",
+        r"if you (are not the intended recipient|have received this [^.]*in error)",
+        r"please consider the environment before printing",
+        r"printed on (100% )?recycled paper",
+        r"calls (may be|are|will be) (recorded|monitored)",
+        r"registered (in england( and wales)?|office|company|charity)\b",
+    ]
+]
+
+
+def _line_key(line):
+    """Lines that differ only in numbers (dates, page and reference numbers) are the same line."""
+    return _DIGITS.sub("#", line.lower())
+
+
+class TextNormalizer:
+    """
+    Shrinks extracted text before it reaches the LLM.
+
+    Letters repeat letterheads, footers, disclaimers and page numbers on
+    every page; extraction passes all of it through. Per page this
+
+    - drops header/footer lines (within `edge_lines` of the top or bottom)
+      that recur on `repeat_ratio` of the pages, keeping the first copy
+      so the sender is still known, and page numbers in the same zone
+      ("Page 2", "2 of 5", "- 2 -", or a bare 2 between pages 1 and 3)
+    - drops sentences matching `patterns` (disclaimers and the like),
+      along with their lowercase continuation lines; the rest of the
+      line and page is kept, since DOCX and PDF text often has no blank
+      lines between a disclaimer and the body
+    - removes invisible characters, collapses spaces and blank lines and
+      rejoins words hyphenated across a line break
+
+    Page breaks are kept so chunking still splits on pages.
+    """
+
+    def __init__(self, edge_lines=NORMALIZE_EDGE_LINES, repeat_ratio=NORMALIZE_REPEAT_RATIO, patterns=None):
+        self.edge_lines = edge_lines
+        self.repeat_ratio = repeat_ratio
+        self.patterns = BOILERPLATE_PATTERNS if patterns is None else patterns
+        self._lock = threading.Lock()
+        self._stats = {"documents": 0, "tokens_before": 0, "tokens_after": 0}
+
+    def clean(self, text: str):
+        """Return (normalized text, report) where the report counts what was removed."""
+        report = {"repeated_lines": 0, "page_numbers": 0, "boilerplate": 0}
+        pages = [self._lines(page) for page in (text or "").split(PAGE_BREAK)]
+        repeated = self._repeated(pages)
+        numbered = self._bare_page_numbers(pages)
+
+        seen, cleaned = set(), []
+        for page_index, lines in enumerate(pages):
+            kept = []
+            for i, line in enumerate(lines):
+                edge = i < self.edge_lines or i >= len(lines) - self.edge_lines
+                key = _line_key(line)
+                if edge and (any(p.fullmatch(line) for p in PAGE_NUMBER_PATTERNS) or (page_index, i) in numbered):
+                    report["page_numbers"] += 1
+                elif edge and key in repeated and key in seen:
+                    report["repeated_lines"] += 1
+                else:
+                    seen.add(key)
+                    kept.append(line)
+            page = _HYPHENATED.sub(r"\1\2", "\n".join(kept))
+            page, dropped = self._drop_boilerplate(page)
+            report["boilerplate"] += dropped
+            paragraphs = [p.strip() for p in _BLANK_LINES.split(page)]
+            paragraphs = [p for p in paragraphs if p]
+            if paragraphs:
+                cleaned.append("\n\n".join(paragraphs))
+
+        normalized = PAGE_BREAK.join(cleaned)
+        report["tokens_before"] = estimate_tokens(text)
+        report["tokens_after"] = estimate_tokens(normalized)
+        report["tokens_saved"] = report["tokens_before"] - report["tokens_after"]
+        return normalized, report
+
+    def normalize(self, text: str) -> str:
+        """Clean `text`, log the tokens saved and add them to the running totals."""
+        normalized, report = self.clean(text)
+        with self._lock:
+            self._stats["documents"] += 1
+            self._stats["tokens_before"] += report["tokens_before"]
+            self._stats["tokens_after"] += report["tokens_after"]
+        logger.info(
+            f"Normalization saved {report['tokens_saved']} of {report['tokens_before']} tokens "
+            f"({report['repeated_lines']} repeated lines, {report['page_numbers']} page numbers, "
+            f"{report['boilerplate']} boilerplate sentences)"
+        )
+        return normalized
+
+    @staticmethod
+    def _lines(page):
+        lines = [_SPACES.sub(" ", line.translate(_INVISIBLE)).strip() for line in page.splitlines()]
+        # Drop leading/trailing blank lines so the edge zone starts at real text
+        while lines and not lines[0]:
+            lines.pop(0)
+        while lines and not lines[-1]:
+            lines.pop()
+        return lines
+
+    def _drop_boilerplate(self, page):
+        """Remove matching sentences from `page`; returns (page, sentences removed)."""
+        lines, wrapped, dropped = [], False, 0
+        for line in page.split("\n"):
+            sentences = _SENTENCES.split(line) if line else []
+            kept = []
+            for n, sentence in enumerate(sentences):
+                if n == 0 and wrapped and sentence[:1].islower():
+                    continue  # the rest of a sentence dropped on the line before
+                if any(pattern.match(sentence) for pattern in self.patterns):
+                    dropped += 1
+                    continue
+                kept.append(n)
+            # A dropped sentence that runs off the end of the line continues on the next
+            last = len(sentences) - 1
+            wrapped = last >= 0 and last not in kept and not sentences[last].endswith((".", "!", "?"))
+            if kept or not line:
+                lines.append(" ".join(sentences[n] for n in kept))
+        return "\n".join(lines), dropped
+
+    def _edge_indexes(self, lines):
+        top = range(min(self.edge_lines, len(lines)))
+        bottom = range(max(0, len(lines) - self.edge_lines), len(lines))
+        return sorted(set(top) | set(bottom))
+
+    def _bare_page_numbers(self, pages):
+        """(page, line) positions of bare edge numbers that go up by one from the page before or to the next."""
+        candidates = [
+            {i: int(lines[i]) for i in self._edge_indexes(lines) if _BARE_NUMBER.fullmatch(lines[i])}
+            for lines in pages
+        ]
+        numbered = set()
+        for page_index, numbers in enumerate(candidates):
+            before = set(candidates[page_index - 1].values()) if page_index else set()
+            after = set(candidates[page_index + 1].values()) if page_index + 1 < len(candidates) else set()
+            numbered.update((page_index, i) for i, n in numbers.items() if n - 1 in before or n + 1 in after)
+        return numbered
+
+    def _repeated(self, pages):
+        """Keys of header/footer lines that recur across pages."""
+        if len(pages) < 2:
+            return set()
+        counts = Counter()
+        for lines in pages:
+            edges = lines[:self.edge_lines] + lines[max(self.edge_lines, len(lines) - self.edge_lines):]
+            # Bare numbers all share the key "#"; only _bare_page_numbers may drop them
+            counts.update({_line_key(line) for line in edges if line and not _BARE_NUMBER.fullmatch(line)})
+        threshold = max(2, math.ceil(len(pages) * self.repeat_ratio))
+        return {key for key, count in counts.items() if count >= threshold}
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+        return stats
+
+
+normalizer = TextNormalizer()
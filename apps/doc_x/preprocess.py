@@ -0,0 +1,151 @@
+import os
+import logging
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Long side of an A4/Letter page in inches, used to turn a target DPI into
+# a pixel budget for phone photos that carry no trustworthy DPI metadata.
+PAGE_LONG_SIDE_INCHES = 11.7
+
+# Preprocessing profiles applied before Tesseract.
+#   target_dpi: downscale so a full page is at most this DPI (None = keep)
+#   binarize:   grayscale + Otsu threshold to pure black/white
+#   deskew:     estimate and undo small rotations (slower)
+#   autocrop:   trim empty margins around the text
+PROFILES = {
+    "none": None,
+    "fast": {"target_dpi": 200, "binarize": True, "deskew": False, "autocrop": True},
+    "default": {"target_dpi": 300, "binarize": True, "deskew": False, "autocrop": True},
+    "quality": {"target_dpi": 300, "binarize": True, "deskew": True, "autocrop": True},
+}
+
+OCR_PROFILE = os.getenv("OCR_PROFILE", "default")
+
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.5
+AUTOCROP_MARGIN = 0.02  # fraction of the image kept around the text box
+
+
+def get_profile(name=None):
+    name = name or OCR_PROFILE
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown OCR profile: {name}")
+
+
+def _otsu_threshold(gray):
+    """Pick the threshold that best separates ink from paper."""
+    histogram = gray.histogram()
+    total = sum(histogram)
+    sum_all = sum(i * h for i, h in enumerate(histogram))
+    sum_bg = weight_bg = 0
+    best_threshold, best_variance = 127, -1.0
+    for level, count in enumerate(histogram):
+        weight_bg += count
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += level * count
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = level, variance
+    return best_threshold
+
+
+def _downscale(image, target_dpi):
+    max_side = int(target_dpi * PAGE_LONG_SIDE_INCHES)
+    if max(image.size) <= max_side:
+        return image
+    scale = max_side / max(image.size)
+    size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+
+def _projection_score(ink, angle):
+    """Variance of row ink density; sharpest when text lines are horizontal."""
+    rotated = ink.rotate(angle, resample=Image.Resampling.BILINEAR, fillcolor=0)
+    rows = list(rotated.resize((1, rotated.height), Image.Resampling.BOX).getdata())
+    mean = sum(rows) / len(rows)
+    return sum((r - mean) ** 2 for r in rows)
+
+
+def estimate_skew(gray):
+    """Return the rotation (degrees) that straightens the text lines."""
+    thumb = gray.copy()
+    thumb.thumbnail((800, 800))
+    ink = ImageOps.invert(thumb)
+    steps = int(DESKEW_MAX_ANGLE / DESKEW_STEP)
+    angles = [i * DESKEW_STEP for i in range(-steps, steps + 1)]
+    return max(angles, key=lambda angle: _projection_score(ink, angle))
+
+
+def _autocrop(gray, threshold):
+    ink = gray.point(lambda p: 255 if p < threshold else 0)
+    box = ink.getbbox()
+    if not box:
+        return gray
+    margin_x = int(gray.width * AUTOCROP_MARGIN)
+    margin_y = int(gray.height * AUTOCROP_MARGIN)
+    left, top, right, bottom = box
+    return gray.crop((
+        max(0, left - margin_x),
+        max(0, top - margin_y),
+        min(gray.width, right + margin_x),
+        min(gray.height, bottom + margin_y),
+    ))
+
+
+def preprocess_image(image, profile=None, region=None):
+    """
+    Prepare a photo or scan for OCR.
+
+    Args:
+        image: PIL image (opened lazily, so JPEG decode can be downscaled)
+        profile: Name of an entry in PROFILES (default: OCR_PROFILE)
+        region: Optional (left, top, right, bottom) crop as fractions 0-1
+
+    Returns:
+        A PIL image ready for Tesseract.
+    """
+    options = get_profile(profile)
+    if options is None:
+        return image
+
+    # JPEG can decode at 1/2, 1/4 or 1/8 scale; skips most of the 12 MP work.
+    target_dpi = options["target_dpi"]
+    if target_dpi and image.format == "JPEG":
+        max_side = int(target_dpi * PAGE_LONG_SIDE_INCHES)
+        image.draft("L", (max_side, max_side))
+
+    image = ImageOps.exif_transpose(image)
+    if target_dpi:
+        image = _downscale(image, target_dpi)
+
+    gray = image.convert("L")
+    if region:
+        left, top, right, bottom = region
+        gray = gray.crop((
+            int(left * gray.width),
+            int(top * gray.height),
+            int(right * gray.width),
+            int(bottom * gray.height),
+        ))
+
+    if options["deskew"]:
+        angle = estimate_skew(gray)
+        if angle:
+            gray = gray.rotate(angle, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=255)
+
+    threshold = _otsu_threshold(gray)
+    if options["autocrop"]:
+        gray = _autocrop(gray, threshold)
+    if options["binarize"]:
+        gray = gray.point(lambda p: 255 if p > threshold else 0)
+    return gray
@@ -0,0 +1,215 @@
+# apps/doc_x/processing.py
+import os
+import logging
+
+from asgiref.sync import sync_to_async
+
+from services.registry import get_s3_client, get_llm_client
+from services.singleflight import inflight, make_key
+from services.summarize import MapReduceSummarizer
+from .models import Document, Conversation
+from .extract import extract_text, EXTRACTORS, EXTRACTOR_VERSION
+from .normalize import normalizer, NORMALIZER_VERSION
+from .cache import document_cache
+from .indexing import index_document
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessingError(Exception):
+    """A pipeline failure with the HTTP status the API should report."""
+
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _no_progress(stage, percent):
+    pass
+
+
+def file_extension(s3_key):
+    _, ext = os.path.splitext(s3_key)
+    return ext.lower().replace(".", "")
+
+
+def process_s3_document(s3_key, progress=None):
+    """
+    Download a document from S3, extract text, generate AI explanation,
+    and store Document + initial Conversation.
+
+    Args:
+        s3_key: Key of the uploaded file in the configured bucket
+        progress: Optional callback(stage, percent) for job status reporting
+
+    Returns:
+        The created Document
+
+    Raises:
+        ProcessingError: with a message and HTTP status for the client
+    """
+    progress = progress or _no_progress
+    ext = file_extension(s3_key)
+    if ext not in EXTRACTORS:
+        raise ProcessingError("Unsupported file type", status=400)
+
+    s3_client = get_s3_client()
+    llm = get_llm_client()
+    summarizer = MapReduceSummarizer(llm.explain_text, model=llm.DEFAULT_MODEL)
+
+    # Look up a previous result for the same bytes (cheap HEAD, no download)
+    progress("checking_cache", 5)
+    try:
+        head = s3_client.head_object(s3_key)
+    except Exception as e:
+        raise ProcessingError(f"S3 download failed: {str(e)}")
+
+    cache_key = document_cache_key(head, ext, llm, summarizer)
+    cached = document_cache.get(cache_key)
+
+    if cached:
+        text, explanation = cached.content, cached.summary
+    else:
+        # Concurrent requests for the same bytes share one download/extract/summarize
+        text, explanation = inflight.do(
+            document_flight_key(cache_key),
+            lambda: _extract_and_summarize(s3_client, s3_key, ext, head, summarizer, cache_key, progress),
+            recheck=lambda: _cached_result(cache_key),
+        )
+
+    # Store in DB
+    progress("saving", 95)
+    return _save_document(s3_key, text, explanation)
+
+
+async def aprocess_s3_document(s3_key):
+    """
+    Async variant of process_s3_document for ASGI views: S3 calls and text
+    extraction run in worker threads, the LLM calls are awaited and the
+    database work goes through sync_to_async.
+    """
+    ext = file_extension(s3_key)
+    if ext not in EXTRACTORS:
+        raise ProcessingError("Unsupported file type", status=400)
+
+    s3_client = get_s3_client()
+    llm = get_llm_client()
+    summarizer = MapReduceSummarizer(llm.explain_text, model=llm.DEFAULT_MODEL, aexplain=llm.aexplain_text)
+
+    try:
+        head = await s3_client.ahead_object(s3_key)
+    except Exception as e:
+        raise ProcessingError(f"S3 download failed: {str(e)}")
+
+    cache_key = document_cache_key(head, ext, llm, summarizer)
+    cached = await sync_to_async(_cached_result)(cache_key)
+
+    if cached:
+        text, explanation = cached
+    else:
+        text, explanation = await inflight.ado(
+            document_flight_key(cache_key),
+            lambda: _aextract_and_summarize(s3_client, s3_key, ext, head, summarizer, cache_key),
+            recheck=lambda: sync_to_async(_cached_result)(cache_key),
+        )
+
+    return await sync_to_async(_save_document)(s3_key, text, explanation)
+
+
+def _extract_and_summarize(s3_client, s3_key, ext, head, summarizer, cache_key, progress):
+    # Stream file from S3 into a spooled buffer and extract text
+    progress("downloading", 15)
+    try:
+        buffer = s3_client.open_stream(s3_key, size=head["size"])
+    except Exception as e:
+        raise ProcessingError(f"S3 download failed: {str(e)}")
+
+    progress("extracting", 35)
+    try:
+        text = extract_and_normalize(buffer, ext)
+    except Exception as e:
+        raise ProcessingError(f"Text extraction failed: {str(e)}")
+
+    # Generate AI explanation (map-reduce over chunks for long documents)
+    progress("summarizing", 70)
+    try:
+        explanation = summarizer.summarize(text)
+    except Exception as e:
+        raise ProcessingError(f"AI explanation failed: {str(e)}")
+
+    document_cache.set(cache_key, etag=head["etag"], content=text, summary=explanation)
+    return text, explanation
+
+
+async def _aextract_and_summarize(s3_client, s3_key, ext, head, summarizer, cache_key):
+    try:
+        buffer = await s3_client.aopen_stream(s3_key, size=head["size"])
+    except Exception as e:
+        raise ProcessingError(f"S3 download failed: {str(e)}")
+
+    try:
+        text = await sync_to_async(extract_and_normalize, thread_sensitive=False)(buffer, ext)
+    except Exception as e:
+        raise ProcessingError(f"Text extraction failed: {str(e)}")
+
+    try:
+        explanation = await summarizer.asummarize(text)
+    except Exception as e:
+        raise ProcessingError(f"AI explanation failed: {str(e)}")
+
+    await sync_to_async(document_cache.set)(cache_key, etag=head["etag"], content=text, summary=explanation)
+    return text, explanation
+
+
+def document_flight_key(cache_key):
+    """Flight for extracting and summarizing one S3 document; it yields (text, summary)."""
+    return make_key("process_document", cache_key)
+
+
+def text_flight_key(text, llm, summarizer, system_prompt, preferred_language):
+    return make_key("process_text", text, llm.MODEL_SET, system_prompt, preferred_language, summarizer.version)
+
+
+def text_system_prompt(preferred_language):
+    return (
+        "You explain government, school, and official documents "
+        "in very simple, clear language. "
+        f"Always respond in {preferred_language}."
+    )
+
+
+def document_cache_key(head, ext, llm, summarizer):
+    return document_cache.make_key(
+        etag=head["etag"],
+        ext=ext,
+        extractor_version=f"{EXTRACTOR_VERSION}+n{NORMALIZER_VERSION}",
+        # Any model in the router's set may have written the summary
+        model=llm.MODEL_SET,
+        system_prompt=llm.build_system_prompt(),
+        summarizer=summarizer.version,
+    )
+
+
+def _cached_result(cache_key):
+    cached = document_cache.get(cache_key)
+    return (cached.content, cached.summary) if cached else None
+
+
+def extract_and_normalize(buffer, ext):
+    # Headers, footers and boilerplate are dropped before the text is stored or summarized
+    with buffer:
+        text = extract_text(buffer, ext)
+    return normalizer.normalize(text)
+
+
+def _save_document(s3_key, text, explanation):
+    doc = Document.objects.create(s3_key=s3_key, content=text, summary=explanation)
+    Conversation.objects.create(document=doc, role="assistant", message=explanation)
+    index_document(doc)
+    return doc
+
+
+def save_text_document(text, explanation):
+    """Store pasted text and its summary the way an upload is stored (s3_key "TEXT")."""
+    return _save_document("TEXT", text, explanation)
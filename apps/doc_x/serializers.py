@@ -2,13 +2,36 @@
 from rest_framework import serializers
 from .models import Document, Conversation
 
-class DocumentSerializer(serializers.ModelSerializer):
+
+class SparseFieldsetsMixin:
+    """
+    Limit the serialized fields with `?fields=id,summary` on the request
+    (or a `fields` argument). Unknown names are ignored.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            request = self.context.get("request")
+            fields = request.query_params.get("fields") if request is not None else None
+        if not fields:
+            return
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        wanted = {name.strip() for name in fields}
+        if not wanted & set(self.fields):
+            return
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
+
+
+class DocumentSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = Document
-        fields = ['id', 's3_key', 'content', 'summary', 'created_at']
+        fields = ['id', 's3_key', 'content', 'summary', 'created_at', 'updated_at']
 
 
-class ConversationSerializer(serializers.ModelSerializer):
+class ConversationSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = Conversation
         fields = ['id', 'document', 'role', 'message', 'created_at']
@@ -0,0 +1,162 @@
+# apps/doc_x/storage.py
+import hashlib
+import logging
+import zlib
+
+from django import forms
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+try:
+    import zstandard
+except ImportError:  # optional, zlib is used instead
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# One-byte header in front of every stored value
+RAW = b"T"
+ZLIB = b"Z"
+ZSTD = b"S"
+OFFLOADED = b"O"  # followed by the S3 key of a RAW/ZLIB/ZSTD payload
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _compress(data: bytes) -> bytes:
+    if len(data) < _setting("DOC_X_CONTENT_COMPRESS_MIN_BYTES", 1024):
+        return RAW + data
+    codec = _setting("DOC_X_CONTENT_CODEC", "auto")
+    if codec == "none":
+        return RAW + data
+    if codec in ("auto", "zstd") and zstandard is not None:
+        packed = ZSTD + zstandard.ZstdCompressor(level=3).compress(data)
+    else:
+        packed = ZLIB + zlib.compress(data, 6)
+    return packed if len(packed) < len(data) + 1 else RAW + data
+
+
+def _offload(data: bytes) -> bytes:
+    from services.registry import get_s3_client
+
+    key = _setting("DOC_X_CONTENT_OFFLOAD_PREFIX", "doc-x/content/") + hashlib.sha256(data).hexdigest()
+    get_s3_client().put_bytes(key, _compress(data))
+    return OFFLOADED + key.encode("utf-8")
+
+
+def encode(text: str, offload: bool = True) -> bytes:
+    """
+    Serialize `text` for storage: raw below the compression threshold,
+    zstd (or zlib) above it, and offloaded to S3 under a content-addressed
+    key above DOC_X_CONTENT_OFFLOAD_MIN_BYTES (0 or `offload=False`
+    disables offloading). Falls back to inline storage if the upload fails.
+    """
+    data = text.encode("utf-8")
+    offload_min = _setting("DOC_X_CONTENT_OFFLOAD_MIN_BYTES", 0)
+    if offload and offload_min and len(data) >= offload_min:
+        try:
+            return _offload(data)
+        except Exception as e:
+            logger.warning(f"Content offload failed, storing inline: {e}")
+    return _compress(data)
+
+
+def decode(raw) -> str:
+    """Inverse of encode()."""
+    if raw is None:
+        return None
+    raw = bytes(raw)
+    header, body = raw[:1], raw[1:]
+    if header == OFFLOADED:
+        from services.registry import get_s3_client
+
+        raw = get_s3_client().get_bytes(body.decode("utf-8"))
+        header, body = raw[:1], raw[1:]
+    if header in (RAW, b""):
+        return body.decode("utf-8")
+    if header == ZLIB:
+        return zlib.decompress(body).decode("utf-8")
+    if header == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed content")
+        return zstandard.ZstdDecompressor().decompress(body).decode("utf-8")
+    raise ValueError(f"Unknown content encoding {header!r}")
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """
+    Keeps the stored bytes until the attribute is first read, then decodes
+    once. The encoded bytes are remembered so saving an unchanged instance
+    writes them back without recompressing (or re-uploading).
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, (bytes, memoryview)):
+            raw = bytes(value)
+            value = decode(raw)
+            instance.__dict__[self.field.attname] = value
+            instance.__dict__[self.field.encoded_cache_name] = (value, raw)
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.BinaryField):
+    """
+    A text field stored compressed (see encode()). Reads return str and
+    writes accept str; the column itself is binary, so it cannot be
+    filtered or searched in SQL. With `offload=False` values always stay
+    in the row, for data read on every request.
+    """
+
+    descriptor_class = CompressedTextDescriptor
+
+    def __init__(self, *args, offload=True, **kwargs):
+        self.offload = offload
+        kwargs.setdefault("editable", True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs.pop("editable", None)
+        if not self.offload:
+            kwargs["offload"] = False
+        return name, path, args, kwargs
+
+    @property
+    def encoded_cache_name(self):
+        return f"_{self.attname}_encoded"
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        cached = model_instance.__dict__.get(self.encoded_cache_name)
+        if cached is not None and cached[0] is value:
+            return cached[1]
+        return value
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if isinstance(value, str):
+            value = encode(value, offload=self.offload)
+        return super().get_db_prep_value(value, connection, prepared)
+
+    def get_default(self):
+        default = super().get_default()
+        return "" if default == b"" else default
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decode(value)
+        return value
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{"form_class": forms.CharField, "widget": forms.Textarea, **kwargs})
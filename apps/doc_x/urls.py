@@ -1,9 +1,27 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Under ASGI (SERVER_MODE=asgi in entrypoint.sh) the main routes can serve
+# the async views; the async/ routes are always available.
+if settings.DOC_X_ASYNC_VIEWS:
+    process_document, ask, process_text = async_views.process_document, async_views.ask, async_views.process_text
+else:
+    process_document, ask, process_text = views.process_document, views.ask, views.process_text
 
 urlpatterns = [
-    path("process/", views.process_document, name="process_document"),
-    path("ask/", views.ask, name="ask"),
-    path("process-text/", views.process_text),
+    path("process/", process_document, name="process_document"),
+    path("documents/<int:pk>/", views.document_detail, name="document_detail"),
+    path("documents/<int:pk>/conversations/", views.document_conversations, name="document_conversations"),
+    path("ask/", ask, name="ask"),
+    path("ask/stream/", views.ask_stream, name="ask_stream"),
+    path("process-text/", process_text),
+    path("batch/", views.process_batch, name="process_batch"),
+    path("process-text/stream/", views.process_text_stream, name="process_text_stream"),
     path("ask/remaining/", views.get_remaining_questions),
+    path("jobs/<int:job_id>/", views.job_status, name="job_status"),
+    path("metrics/", views.metrics, name="doc_x_metrics"),
+    path("async/process/", async_views.process_document, name="async_process_document"),
+    path("async/ask/", async_views.ask, name="async_ask"),
+    path("async/process-text/", async_views.process_text, name="async_process_text"),
 ]
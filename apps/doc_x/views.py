@@ -1,19 +1,44 @@
 # apps/doc_x/views.py
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from .models import Document, Conversation, UserQuestionLimit
+from django.db.models import Avg, Count, Max, OuterRef, Subquery
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from .models import Document, Conversation, UserQuestionLimit, ProcessingJob
 from .serializers import DocumentSerializer
-from .extract import extract_pdf, extract_docx, extract_image
-from services.s3 import S3Client
-from services.ai import AIClient
-from services.gemini import GeminiClient
-from guidewisey.decorators import question_limit  # <-- our reusable decorator
-import tempfile
-import os
+from .extract import EXTRACTORS
+from .cache import document_cache
+from .normalize import normalizer
+from .jobs import enqueue_document_job, job_payload, wants_async
+from .sse import EventStreamRenderer, sse_event, event_stream_response
+from .batch import parse_batch, process_batch as run_batch
+from .processing import (
+    process_s3_document,
+    file_extension,
+    ProcessingError,
+    save_text_document,
+    text_flight_key,
+    text_system_prompt,
+)
+from .answers import answer_cache_key, build_prompt, save_answer
+from services import resilience
+from services.registry import get_llm_client, registry
+from services.semantic_cache import answer_cache
+from services.singleflight import inflight
+from services.summarize import MapReduceSummarizer
+from guidewisey.decorators import compress_response, question_limit  # <-- our reusable decorator
+from guidewisey.quota import quota_engine
+import base64
+import binascii
+import hashlib
+import time
 
 
 MAX_QUESTIONS_PER_USER = 3
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 200
 
 # -------------------------------
 # Process uploaded document
@@ -21,52 +46,154 @@ MAX_QUESTIONS_PER_USER = 3
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 @question_limit(use_session=True)
-def process_document(request, document=None, user_question_limit=None):
+def process_document(request, document=None, quota=None):
     """
     Upload document from S3, extract text, generate AI explanation,
     and store Document + initial Conversation.
+
+    With DOC_X_ASYNC_PROCESSING (or a "Prefer: respond-async" header) the
+    work is queued instead and the response is 202 with a job to poll.
+    Pass `?fields=id,summary` to leave the extracted text out of the response.
     """
-    s3_client = S3Client()
     s3_key = request.data.get("s3_key")
     if not s3_key:
         return Response({"error": "s3_key is required"}, status=400)
 
-    _, ext = os.path.splitext(s3_key)
-    ext = ext.lower().replace(".", "")
+    if wants_async(request):
+        if file_extension(s3_key) not in EXTRACTORS:
+            return Response({"error": "Unsupported file type"}, status=400)
+        job = enqueue_document_job(
+            s3_key,
+            user=request.user if request.user.is_authenticated else None,
+            session_key=request.session.session_key,
+        )
+        return Response(job_payload(job), status=202)
 
-    # Download file from S3 to temp path
-    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{ext}") as tmp_file:
-        local_path = tmp_file.name
     try:
-        s3_client.download_file(s3_key, local_path)
-    except Exception as e:
-        os.remove(local_path)
-        return Response({"error": f"S3 download failed: {str(e)}"}, status=500)
+        doc = process_s3_document(s3_key)
+    except ProcessingError as e:
+        return Response({"error": e.message}, status=e.status)
 
-    # Extract text from file
-    try:
-        if ext == "pdf":
-            text = extract_pdf(local_path)
-        elif ext in ["docx", "doc"]:
-            text = extract_docx(local_path)
-        elif ext in ["png", "jpg", "jpeg"]:
-            text = extract_image(local_path)
-        else:
-            return Response({"error": "Unsupported file type"}, status=400)
-    finally:
-        os.remove(local_path)
+    return Response(DocumentSerializer(doc, context={"request": request}).data)
+
+
+# -------------------------------
+# Poll a queued processing job
+# -------------------------------
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def job_status(request, job_id):
+    job = ProcessingJob.objects.select_related("document").filter(id=job_id, user=request.user).first()
+    if job is None:
+        return Response({"error": "Job not found"}, status=404)
+    return Response(job_payload(job))
+
+
+# -------------------------------
+# Document summary and metadata
+# -------------------------------
+DETAIL_FIELDS = ["id", "s3_key", "summary", "created_at", "updated_at"]
+
+
+@compress_response()
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def document_detail(request, pk):
+    """
+    Read a processed document. Conditional requests (If-None-Match /
+    If-Modified-Since) are answered with 304 before anything is serialized.
+    The extracted text is only loaded when asked for with `?fields=content,...`.
+    """
+    document = Document.objects.defer("content").filter(pk=pk).first()
+    if document is None:
+        return Response({"error": "Document not found"}, status=404)
+
+    serializer = DocumentSerializer(document, fields=request.query_params.get("fields") or DETAIL_FIELDS)
+    etag = _document_etag(document, serializer.fields)
+    last_modified = int(document.updated_at.timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = Response(serializer.data)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
-    # Generate AI explanation
+
+def _document_etag(document, fields):
+    """Strong ETag over the row version and the selected fields."""
+    raw = f"{document.pk}:{document.updated_at.isoformat()}:{','.join(fields)}"
+    return f'"{hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]}"'
+
+
+# -------------------------------
+# Conversation history (keyset pages)
+# -------------------------------
+@compress_response()
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def document_conversations(request, pk):
+    """
+    Page through a document's conversation, newest page first.
+
+    Pages are keyset-paginated on (document_id, id): pass `cursor` from the
+    previous response to get the next (older) page. For incremental sync,
+    pass `since=<last turn id seen>` to get the newer turns instead, oldest
+    first; `cursor` then continues forward. Turns within a page are always
+    in chronological order. `limit` defaults to HISTORY_PAGE_SIZE.
+    """
     try:
-        explanation = ai_client.explain_text(text)
-    except Exception as e:
-        return Response({"error": f"AI explanation failed: {str(e)}"}, status=500)
+        limit = min(int(request.query_params.get("limit", HISTORY_PAGE_SIZE)), HISTORY_MAX_PAGE_SIZE)
+        direction, after = _parse_history_cursor(request.query_params)
+    except ValueError:
+        return Response({"error": "Invalid cursor, since or limit"}, status=400)
+    if limit < 1:
+        return Response({"error": "Invalid cursor, since or limit"}, status=400)
+    if not Document.objects.filter(pk=pk).exists():
+        return Response({"error": "Document not found"}, status=404)
+
+    turns = Conversation.objects.filter(document_id=pk)
+    if direction == "after":
+        turns = turns.filter(id__gt=after).order_by("id")
+    else:
+        if after is not None:
+            turns = turns.filter(id__lt=after)
+        turns = turns.order_by("-id")
+    rows = turns.values("id", "role", "message", "created_at")[: limit + 1]
 
-    # Store in DB
-    doc = Document.objects.create(s3_key=s3_key, content=text, summary=explanation)
-    Conversation.objects.create(document=doc, role="assistant", message=explanation)
+    results = list(rows.iterator(chunk_size=limit + 1))
+    has_more = len(results) > limit
+    results = results[:limit]
+    next_cursor = None
+    if has_more:
+        next_cursor = _history_cursor(direction, results[-1]["id"])
+    if direction == "before":
+        results.reverse()
 
-    return Response(DocumentSerializer(doc).data)
+    return Response({"results": results, "next_cursor": next_cursor, "has_more": has_more})
+
+
+def _history_cursor(direction, turn_id):
+    return base64.urlsafe_b64encode(f"{direction}:{turn_id}".encode()).decode().rstrip("=")
+
+
+def _parse_history_cursor(params):
+    """Return (direction, turn id) from `cursor` or `since`; raises ValueError."""
+    cursor = params.get("cursor")
+    if cursor:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        except (binascii.Error, UnicodeDecodeError) as e:
+            raise ValueError(cursor) from e
+        direction, _, turn_id = raw.partition(":")
+        if direction not in ("before", "after"):
+            raise ValueError(cursor)
+        return direction, int(turn_id)
+    since = params.get("since")
+    if since is not None:
+        return "after", int(since)
+    return "before", None
 
 
 # -------------------------------
@@ -75,33 +202,70 @@ def process_document(request, document=None, user_question_limit=None):
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 @question_limit()
-def ask(request, document, user_question_limit):
-    ai_client = AIClient()
-    gemini = GeminiClient()
+def ask(request, document, quota):
+    llm = get_llm_client()
     question = request.data.get("question")
     if not question:
         return Response({"error": "Question is required"}, status=400)
 
-    # Fetch conversation history
-    conv_history = document.conversations.order_by("id").all()
-    conversation = [{"role": c.role, "content": c.message} for c in conv_history]
+    cache_key = answer_cache_key(document)
 
-    # Generate AI answer
-    try:
-        answer = gemini.explain_text(question, conversation)
-    except Exception as e:
-        return Response({"error": f"AI explanation failed: {str(e)}"}, status=500)
+    # Reuse the answer to a near-identical question about the same document
+    answer = answer_cache.lookup(cache_key, question)
+    usage = {}
+    if answer is None:
+        started = time.perf_counter()
+        try:
+            prompt, conversation = build_prompt(llm, document, question)
+            answer = llm.explain_text(prompt, conversation, usage=usage)
+        except Exception as e:
+            return Response({"error": f"AI explanation failed: {str(e)}"}, status=500)
+        answer_cache.store(cache_key, question, answer, latency=time.perf_counter() - started)
 
-    # Save conversation
-    Conversation.objects.create(document=document, role="user", message=question)
-    Conversation.objects.create(document=document, role="assistant", message=answer)
+    remaining = save_answer(document, quota, question, answer, usage.get("prompt_tokens"))
+    return Response({"answer": answer, "remaining": remaining})
 
-    # Increment user's question count
-    user_question_limit.count += 1
-    user_question_limit.save()
 
-    remaining = 3 - user_question_limit.count
-    return Response({"answer": answer, "remaining": remaining})
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+@question_limit()
+def ask_stream(request, document, quota):
+    """
+    SSE variant of ask: emits `token` events as the answer is generated
+    and a final `done` event once the conversation has been saved.
+    """
+    llm = get_llm_client()
+    question = request.data.get("question")
+    if not question:
+        return Response({"error": "Question is required"}, status=400)
+
+    cache_key = answer_cache_key(document)
+
+    def events():
+        answer = answer_cache.lookup(cache_key, question)
+        usage = {}
+        if answer is not None:
+            yield sse_event("token", {"text": answer})
+        else:
+            chunks = []
+            started = time.perf_counter()
+            try:
+                prompt, conversation = build_prompt(llm, document, question)
+                for chunk in llm.stream_text(prompt, conversation, usage=usage):
+                    chunks.append(chunk)
+                    yield sse_event("token", {"text": chunk})
+            except Exception as e:
+                quota.release()
+                yield sse_event("error", {"error": f"AI explanation failed: {str(e)}"})
+                return
+            answer = "".join(chunks).strip()
+            answer_cache.store(cache_key, question, answer, latency=time.perf_counter() - started)
+
+        remaining = save_answer(document, quota, question, answer, usage.get("prompt_tokens"))
+        yield sse_event("done", {"answer": answer, "remaining": remaining})
+
+    return event_stream_response(events())
 
 
 # -------------------------------
@@ -110,9 +274,8 @@ def ask(request, document, user_question_limit):
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 @question_limit(use_session=True)
-def process_text(request, document=None, user_question_limit=None):
-    ai_client = AIClient()
-    gemini = GeminiClient()
+def process_text(request, document=None, quota=None):
+    llm = get_llm_client()
     text = request.data.get("text")
     preferred_language = request.data.get("preferred_language", "English")
 
@@ -122,43 +285,134 @@ def process_text(request, document=None, user_question_limit=None):
             status=400,
         )
 
-    system_prompt = (
-        "You explain government, school, and official documents "
-        "in very simple, clear language. "
-        f"Always respond in {preferred_language}."
-    )
-
+    summarizer = MapReduceSummarizer(llm.explain_text, model=llm.DEFAULT_MODEL)
+    system_prompt = text_system_prompt(preferred_language)
     try:
-        explanation = gemini.explain_text(text=text, system_prompt=system_prompt)
+        # A double submit of the same text waits for the first request's summary
+        explanation = inflight.do(
+            text_flight_key(text, llm, summarizer, system_prompt, preferred_language),
+            lambda: summarizer.summarize(text, system_prompt=system_prompt, preferred_language=preferred_language),
+        )
     except Exception as e:
         return Response({"error": f"Failed to process text: {str(e)}"}, status=500)
 
-    doc = Document.objects.create(
-        s3_key="TEXT",
-        content=text,
-        summary=explanation,
-    )
+    doc = save_text_document(text, explanation)
+    return Response({"document_id": doc.id, "summary": explanation})
 
-    Conversation.objects.create(
-        document=doc,
-        role="assistant",
-        message=explanation,
-    )
 
-    return Response({"document_id": doc.id, "summary": explanation})
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+@question_limit(use_session=True)
+def process_text_stream(request, document=None, quota=None):
+    """
+    SSE variant of process_text: emits `token` events as the summary is
+    generated and a final `done` event with the stored document id.
+    """
+    llm = get_llm_client()
+    text = request.data.get("text")
+    preferred_language = request.data.get("preferred_language", "English")
+
+    if not text or len(text.strip()) < 10:
+        return Response(
+            {"error": "Text is required and must be meaningful"},
+            status=400,
+        )
+
+    def events():
+        chunks = []
+        try:
+            # Long input: notes from the map phase, then stream the reduce call
+            stream = llm.stream_text(
+                text=MapReduceSummarizer(llm.explain_text, model=llm.DEFAULT_MODEL).condense(text),
+                system_prompt=text_system_prompt(preferred_language),
+                preferred_language=preferred_language,
+            )
+            for chunk in stream:
+                chunks.append(chunk)
+                yield sse_event("token", {"text": chunk})
+        except Exception as e:
+            yield sse_event("error", {"error": f"Failed to process text: {str(e)}"})
+            return
+
+        explanation = "".join(chunks).strip()
+        doc = save_text_document(text, explanation)
+        yield sse_event("done", {"document_id": doc.id, "summary": explanation})
+
+    return event_stream_response(events())
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_remaining_questions(request):
+    """Read-only: one quota-store lookup, or a single query on a cold store."""
     document_id = request.query_params.get("document_id")
     if not document_id:
         return Response({"error": "document_id is required"}, status=400)
+
+    used = quota_engine.peek(quota_engine.key(user_id=request.user.id, document_id=document_id))
+    if used is None:
+        row = (
+            Document.objects.filter(id=document_id)
+            .annotate(
+                used=Subquery(
+                    UserQuestionLimit.objects.filter(user=request.user, document=OuterRef("pk")).values("count")[:1]
+                )
+            )
+            .values_list("used", flat=True)
+        )
+        if not row:
+            return Response({"error": "Document not found"}, status=404)
+        used = row[0] or 0
+
+    remaining = MAX_QUESTIONS_PER_USER - used
+    return Response({"remaining": remaining})
+
+
+# -------------------------------
+# Process many documents / texts
+# -------------------------------
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@question_limit(use_session=True)
+def process_batch(request, document=None, quota=None):
+    """
+    Process a batch of uploads and texts in one call:
+    {"items": [{"s3_key": "..."}, {"text": "...", "preferred_language": "..."}]}
+
+    Items are downloaded, extracted and summarized concurrently (see
+    apps/doc_x/batch.py). The response lists one result per item, in
+    request order: {"index", "document_id", "summary", "cached"} or
+    {"index", "error", "status"}.
+    """
     try:
-        doc = Document.objects.get(id=document_id)
-    except Document.DoesNotExist:
-        return Response({"error": "Document not found"}, status=404)
+        items = parse_batch(request.data.get("items"))
+    except ProcessingError as e:
+        return Response({"error": e.message}, status=e.status)
 
-    uq, _ = UserQuestionLimit.objects.get_or_create(user=request.user, document=doc)
-    remaining = MAX_QUESTIONS_PER_USER - uq.count
-    return Response({"remaining": remaining})
\ No newline at end of file
+    results = [item.result() for item in run_batch(items)]
+    succeeded = sum(1 for result in results if "error" not in result)
+    return Response({"results": results, "succeeded": succeeded, "failed": len(results) - succeeded})
+
+
+# -------------------------------
+# Operational metrics (staff only)
+# -------------------------------
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    jobs = dict(ProcessingJob.objects.values_list("status").annotate(total=Count("id")))
+    prompt_tokens = Conversation.objects.filter(role="user", prompt_tokens__isnull=False).aggregate(
+        turns=Count("id"), avg=Avg("prompt_tokens"), max=Max("prompt_tokens")
+    )
+    return Response({
+        "document_cache": document_cache.stats(),
+        "normalization": normalizer.stats(),
+        "jobs": jobs,
+        "clients": registry.metrics(),
+        "llm_router": registry.llm_stats(),
+        "dependencies": resilience.metrics(),
+        "answer_cache": answer_cache.stats(),
+        "singleflight": inflight.stats(),
+        "prompt_tokens": prompt_tokens,
+    })
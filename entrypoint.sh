@@ -30,9 +30,21 @@ export PYTHONWARNINGS="ignore::DeprecationWarning:pypdf"
 # Gunicorn configuration
 WEB_CONCURRENCY=${WEB_CONCURRENCY:-1}   # 1 worker by default for small Render instance
 GUNICORN_TIMEOUT=${GUNICORN_TIMEOUT:-120}  # 120s timeout
+SERVER_MODE=${SERVER_MODE:-wsgi}  # "asgi": uvicorn workers + async doc_x views
 
-echo "Starting Gunicorn with $WEB_CONCURRENCY worker(s) and timeout $GUNICORN_TIMEOUT..."
-exec gunicorn guidewisey.wsgi:application \
+if [ "$SERVER_MODE" = "asgi" ]; then
+  export DOC_X_ASYNC_VIEWS=${DOC_X_ASYNC_VIEWS:-True}
+  APP=guidewisey.asgi:application
+  WORKER_CLASS=uvicorn_worker.UvicornWorker
+else
+  APP=guidewisey.wsgi:application
+  WORKER_CLASS=sync
+fi
+
+echo "Starting Gunicorn ($SERVER_MODE) with $WEB_CONCURRENCY worker(s) and timeout $GUNICORN_TIMEOUT..."
+exec gunicorn $APP \
+    --config gunicorn.conf.py \
+    --worker-class $WORKER_CLASS \
     --bind 0.0.0.0:${PORT:-8000} \
     --workers $WEB_CONCURRENCY \
     --timeout $GUNICORN_TIMEOUT \
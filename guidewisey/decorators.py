@@ -1,12 +1,39 @@
 # guidewisey/decorators.py
+import gzip
+import re
 from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
 from rest_framework.response import Response
-from apps.doc_x.models import Document, UserQuestionLimit
+from apps.doc_x.models import Document
+from .quota import quota_engine
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only
+    brotli = None
 
 MAX_QUESTIONS_PER_USER = 3  # default
 
 def question_limit(max_questions=MAX_QUESTIONS_PER_USER, use_session=False):
+    """
+    Enforce a per-user, per-document question quota.
+
+    The question is reserved atomically before the view runs and released
+    again if the view fails (status >= 400 or an exception). Views receive
+    `document` and `quota` (a QuotaReservation; its `remaining` is the
+    number of questions left). With `use_session`, the session's quota is
+    only checked, nothing is reserved, and `document`/`quota` are None.
+
+    Async views (see apps/doc_x/async_views.py) get the same behaviour with
+    JsonResponse errors; they must set `request.data` first.
+    """
     def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            return _async_question_limit(view_func, max_questions, use_session)
+
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
             if use_session:
@@ -15,39 +42,154 @@ def question_limit(max_questions=MAX_QUESTIONS_PER_USER, use_session=False):
                     request.session.create()
                     session_key = request.session.session_key
 
-                # Create a dummy session-based document
-                doc, _ = Document.objects.get_or_create(
-                    s3_key=f"SESSION_{session_key}",
-                    defaults={"content": "", "summary": ""}
-                )
+                if quota_engine.used(quota_engine.key(session_key=session_key)) >= max_questions:
+                    return Response({"error": "Question limit reached"}, status=403)
 
-                uq, _ = UserQuestionLimit.objects.get_or_create(
-                    user=None,
-                    document=doc,
-                    session_key=session_key
-                )
+                kwargs["document"] = None
+                kwargs["quota"] = None
+                return view_func(request, *args, **kwargs)
 
-            else:
-                user = request.user
-                document_id = request.data.get("document_id")
-                if not document_id:
-                    return Response({"error": "document_id is required"}, status=400)
-                try:
-                    doc = Document.objects.get(id=document_id)
-                except Document.DoesNotExist:
-                    return Response({"error": "Document not found"}, status=404)
-
-                uq, _ = UserQuestionLimit.objects.get_or_create(
-                    user=user,
-                    document=doc
-                )
-
-            if uq.count >= max_questions:
+            document_id = request.data.get("document_id")
+            if not document_id:
+                return Response({"error": "document_id is required"}, status=400)
+            try:
+                doc = Document.objects.get(id=document_id)
+            except Document.DoesNotExist:
+                return Response({"error": "Document not found"}, status=404)
+
+            reservation = quota_engine.reserve(max_questions, user_id=request.user.id, document_id=doc.id)
+            if reservation is None:
                 return Response({"error": "Question limit reached"}, status=403)
 
             kwargs["document"] = doc
-            kwargs["user_question_limit"] = uq
-            return view_func(request, *args, **kwargs)
+            kwargs["quota"] = reservation
+            try:
+                response = view_func(request, *args, **kwargs)
+            except Exception:
+                reservation.release()
+                raise
+            if response.status_code >= 400:
+                reservation.release()
+            return response
+
+        return _wrapped_view
+    return decorator
+
+
+def _async_question_limit(view_func, max_questions, use_session):
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        if use_session:
+            session_key = request.session.session_key
+            if not session_key:
+                await sync_to_async(request.session.create)()
+                session_key = request.session.session_key
+
+            if await sync_to_async(quota_engine.used)(quota_engine.key(session_key=session_key)) >= max_questions:
+                return JsonResponse({"error": "Question limit reached"}, status=403)
+
+            kwargs["document"] = None
+            kwargs["quota"] = None
+            return await view_func(request, *args, **kwargs)
+
+        document_id = request.data.get("document_id")
+        if not document_id:
+            return JsonResponse({"error": "document_id is required"}, status=400)
+        doc = await Document.objects.filter(id=document_id).afirst()
+        if doc is None:
+            return JsonResponse({"error": "Document not found"}, status=404)
+
+        user = await request.auser()
+        reservation = await sync_to_async(quota_engine.reserve)(max_questions, user_id=user.id, document_id=doc.id)
+        if reservation is None:
+            return JsonResponse({"error": "Question limit reached"}, status=403)
+
+        kwargs["document"] = doc
+        kwargs["quota"] = reservation
+        try:
+            response = await view_func(request, *args, **kwargs)
+        except Exception:
+            await sync_to_async(reservation.release)()
+            raise
+        if response.status_code >= 400:
+            await sync_to_async(reservation.release)()
+        return response
+
+    return _wrapped_view
+
+
+# Compressed bodies get their own strong ETag: "<tag>-gzip" / "<tag>-br"
+_ENCODED_ETAG = re.compile(r'-(?:br|gzip)"')
+
+
+def _negotiate_encoding(accept_encoding):
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _encoded_etag(etag, encoding):
+    if etag.startswith("W/"):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def compress_response(min_bytes=None):
+    """
+    Brotli- or gzip-compress successful bodies of at least `min_bytes`
+    (default RESPONSE_COMPRESS_MIN_BYTES), per the request's Accept-Encoding.
+
+    The ETag stays strong: compressed bodies carry the view's ETag with an
+    encoding suffix, and the suffix is stripped from If-None-Match before
+    the view compares it. Apply it above @api_view.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            encoding = _negotiate_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+            if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+            if if_none_match:
+                request.META["HTTP_IF_NONE_MATCH"] = _ENCODED_ETAG.sub('"', if_none_match)
+
+            response = view_func(request, *args, **kwargs)
+            patch_vary_headers(response, ("Accept-Encoding",))
+
+            if response.status_code == 304:
+                # Echo the variant the client holds
+                if encoding and if_none_match and f'-{encoding}"' in if_none_match and response.has_header("ETag"):
+                    response["ETag"] = _encoded_etag(response["ETag"], encoding)
+                return response
+            if (
+                encoding is None
+                or response.streaming
+                or response.status_code != 200
+                or response.has_header("Content-Encoding")
+            ):
+                return response
+
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+            threshold = settings.RESPONSE_COMPRESS_MIN_BYTES if min_bytes is None else min_bytes
+            if len(response.content) < threshold:
+                return response
+
+            if encoding == "br":
+                response.content = brotli.compress(response.content, quality=5)
+            else:
+                response.content = gzip.compress(response.content, compresslevel=6, mtime=0)
+            response["Content-Encoding"] = encoding
+            response["Content-Length"] = str(len(response.content))
+            if response.has_header("ETag"):
+                response["ETag"] = _encoded_etag(response["ETag"], encoding)
+            return response
 
         return _wrapped_view
     return decorator
@@ -0,0 +1,303 @@
+# guidewisey/quota.py
+import os
+import time
+import atexit
+import fcntl
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------
+# Counter stores
+# -------------------------------
+class LocalQuotaStore:
+    """In-process counters. Only correct for a single worker process (dev, tests)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def get(self, key):
+        return self._counts.get(key)
+
+    def add(self, key, value):
+        """Set `key` only if it is missing; returns True if it was set."""
+        with self._lock:
+            if key in self._counts:
+                return False
+            self._counts[key] = value
+            return True
+
+    def incr(self, key, delta=1):
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + delta
+            return self._counts[key]
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+class FileQuotaStore:
+    """
+    One small file per counter, updated under an exclusive fcntl lock, so
+    every worker process on the host sees the same counts.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def _update(self, key, change):
+        fd = os.open(self._path(key), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.read(fd, 32)
+            current = int(raw) if raw else None
+            new = change(current)
+            if new != current:
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, str(new).encode("ascii"))
+            return current, new
+        finally:
+            os.close(fd)  # releases the lock
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as handle:
+                fcntl.flock(handle, fcntl.LOCK_SH)
+                raw = handle.read()
+        except FileNotFoundError:
+            return None
+        return int(raw) if raw else None
+
+    def add(self, key, value):
+        current, _ = self._update(key, lambda current: value if current is None else current)
+        return current is None
+
+    def incr(self, key, delta=1):
+        _, new = self._update(key, lambda current: (current or 0) + delta)
+        return new
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            os.unlink(os.path.join(self.directory, name))
+
+
+class CacheQuotaStore:
+    """Counters in a shared Django cache; add/incr are atomic on Redis and memcached."""
+
+    def __init__(self, alias="default", timeout=None):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def add(self, key, value):
+        return self.cache.add(key, value, timeout=self.timeout)
+
+    def incr(self, key, delta=1):
+        try:
+            return self.cache.incr(key, delta)
+        except ValueError:  # evicted since it was seeded
+            self.cache.add(key, 0, timeout=self.timeout)
+            return self.cache.incr(key, delta)
+
+    def clear(self):
+        self.cache.clear()
+
+
+def build_store(backend):
+    if backend == "cache":
+        return CacheQuotaStore(getattr(settings, "QUOTA_CACHE_ALIAS", "default"))
+    if backend == "file":
+        return FileQuotaStore(settings.QUOTA_FILE_DIR)
+    if backend == "local":
+        return LocalQuotaStore()
+    raise ValueError(f"Unknown QUOTA_BACKEND: {backend}")
+
+
+# -------------------------------
+# Quota engine
+# -------------------------------
+class QuotaReservation:
+    """One reserved question; release() gives it back if the request fails."""
+
+    def __init__(self, engine, key, used, limit):
+        self.engine = engine
+        self.key = key
+        self.used = used
+        self.limit = limit
+        self.released = False
+
+    @property
+    def remaining(self):
+        return self.limit - self.used
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.engine._incr(self.key, -1)
+
+
+class QuotaEngine:
+    """
+    Per-user, per-document question counters with atomic increment-and-check.
+
+    Counters live in a shared store (see QUOTA_BACKEND) and are seeded from
+    UserQuestionLimit on first use. Touched counters are written back to
+    the database at most every QUOTA_FLUSH_INTERVAL seconds and at exit,
+    so the request path does no row locking or read-modify-write.
+
+    The first change after a flush arms a one-shot timer, so counters are
+    written within the interval even if no further request arrives. A
+    worker killed without running atexit (SIGKILL, OOM) leaves the
+    database up to QUOTA_FLUSH_INTERVAL seconds of questions behind; the
+    shared stores still hold them, the "local" store loses them.
+    """
+
+    def __init__(self, store=None, flush_interval=None):
+        self._store = store
+        self._flush_interval = flush_interval
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = build_store(settings.QUOTA_BACKEND)
+        return self._store
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return settings.QUOTA_FLUSH_INTERVAL
+
+    @staticmethod
+    def key(user_id=None, document_id=None, session_key=None):
+        return f"quota:u{user_id or ''}:s{session_key or ''}:d{document_id or ''}"
+
+    @staticmethod
+    def _parse(key):
+        _, user, session, document = key.split(":")
+        return {
+            "user_id": int(user[1:]) if user[1:] else None,
+            "session_key": session[1:] or None,
+            "document_id": int(document[1:]) if document[1:] else None,
+        }
+
+    def _stored_count(self, key):
+        from apps.doc_x.models import UserQuestionLimit
+
+        count = UserQuestionLimit.objects.filter(**self._parse(key)).values_list("count", flat=True).first()
+        return count or 0
+
+    def used(self, key):
+        """Current count, seeding the store from the database on first use."""
+        value = self.store.get(key)
+        if value is None:
+            self.store.add(key, self._stored_count(key))
+            value = self.store.get(key) or 0
+        return value
+
+    def peek(self, key):
+        """Current count from the store if present, else None. Never writes."""
+        return self.store.get(key)
+
+    def _incr(self, key, delta):
+        used = self.store.incr(key, delta)
+        with self._lock:
+            self._dirty.add(key)
+            self._schedule_flush()
+        self.maybe_flush()
+        return used
+
+    def reserve(self, limit, **owner):
+        """Atomically take one question; returns a QuotaReservation or None if the limit is reached."""
+        key = self.key(**owner)
+        if self.used(key) >= limit:
+            return None
+        used = self._incr(key, 1)
+        if used > limit:
+            self._incr(key, -1)
+            return None
+        return QuotaReservation(self, key, used, limit)
+
+    def _schedule_flush(self):
+        # Caller holds self._lock
+        if self._timer is None:
+            delay = max(0.0, self._last_flush + self.flush_interval - time.monotonic())
+            self._timer = threading.Timer(delay, self._flush_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_on_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.warning(f"Quota flush on timer failed: {e}")
+        finally:
+            connection.close()
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write touched counters to UserQuestionLimit."""
+        from apps.doc_x.models import UserQuestionLimit
+
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            self._last_flush = time.monotonic()
+        for key in dirty:
+            count = self.store.get(key)
+            if count is None:
+                continue
+            try:
+                UserQuestionLimit.objects.update_or_create(**self._parse(key), defaults={"count": max(count, 0)})
+            except Exception as e:
+                logger.warning(f"Quota flush failed for {key}: {e}")
+                with self._lock:
+                    self._dirty.add(key)
+                    self._schedule_flush()
+
+    def reset(self):
+        """Forget all counters (tests)."""
+        with self._lock:
+            self._dirty.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if self._store is not None:
+            self._store.clear()
+
+
+quota_engine = QuotaEngine()
+
+
+def _flush_at_exit():
+    try:
+        quota_engine.flush()
+    except Exception as e:
+        logger.warning(f"Quota flush at exit failed: {e}")
+
+
+atexit.register(_flush_at_exit)
@@ -86,9 +86,10 @@ TEMPLATES = [
 ]
 
 # -------------------------------
-# WSGI
+# WSGI / ASGI
 # -------------------------------
 WSGI_APPLICATION = "guidewisey.wsgi.application"
+ASGI_APPLICATION = "guidewisey.asgi.application"
 
 # -------------------------------
 # Database
@@ -272,4 +273,91 @@ if IS_PRODUCTION:
 # -------------------------------
 # Default Primary Key Field Type
 # -------------------------------
-DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
\ No newline at end of file
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# -------------------------------
+# Doc-X Processing Cache
+# -------------------------------
+DOC_X_CACHE_ENABLED = os.getenv("DOC_X_CACHE_ENABLED", "True") == "True"
+DOC_X_CACHE_TTL_SECONDS = int(os.getenv("DOC_X_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))  # 30 days
+DOC_X_CACHE_MAX_ENTRIES = int(os.getenv("DOC_X_CACHE_MAX_ENTRIES", "10000"))
+
+# -------------------------------
+# Doc-X Background Jobs
+# -------------------------------
+# When enabled, process_document queues a job and returns 202; clients can
+# also opt in per request with "Prefer: respond-async".
+DOC_X_ASYNC_PROCESSING = os.getenv("DOC_X_ASYNC_PROCESSING", "False") == "True"
+DOC_X_JOB_CONCURRENCY = int(os.getenv("DOC_X_JOB_CONCURRENCY", "2"))
+DOC_X_JOB_POLL_INTERVAL = float(os.getenv("DOC_X_JOB_POLL_INTERVAL", "1.0"))
+DOC_X_JOB_STALE_SECONDS = int(os.getenv("DOC_X_JOB_STALE_SECONDS", "600"))
+# Running jobs touch updated_at this often, so only dead workers look stale
+DOC_X_JOB_HEARTBEAT_SECONDS = float(os.getenv("DOC_X_JOB_HEARTBEAT_SECONDS", "30"))
+DOC_X_JOB_MAX_ATTEMPTS = int(os.getenv("DOC_X_JOB_MAX_ATTEMPTS", "3"))
+
+# -------------------------------
+# Doc-X Batch Processing
+# -------------------------------
+# POST /api/doc-x/batch/ takes up to DOC_X_BATCH_MAX_ITEMS uploads/texts.
+# S3 downloads and extraction run on DOC_X_BATCH_IO_CONCURRENCY threads and
+# LLM summaries on DOC_X_BATCH_LLM_CONCURRENCY (keep these within
+# S3_POOL_SIZE and HTTP_POOL_SIZE).
+DOC_X_BATCH_MAX_ITEMS = int(os.getenv("DOC_X_BATCH_MAX_ITEMS", "50"))
+DOC_X_BATCH_IO_CONCURRENCY = int(os.getenv("DOC_X_BATCH_IO_CONCURRENCY", "8"))
+DOC_X_BATCH_LLM_CONCURRENCY = int(os.getenv("DOC_X_BATCH_LLM_CONCURRENCY", "4"))
+
+# -------------------------------
+# Doc-X Content Storage
+# -------------------------------
+# Extracted document text is stored compressed ("auto" picks zstd when the
+# zstandard package is installed, else zlib; "none" stores it raw) once it
+# reaches DOC_X_CONTENT_COMPRESS_MIN_BYTES. Above DOC_X_CONTENT_OFFLOAD_MIN_BYTES
+# (0 disables) it is moved to the S3 bucket under DOC_X_CONTENT_OFFLOAD_PREFIX.
+DOC_X_CONTENT_CODEC = os.getenv("DOC_X_CONTENT_CODEC", "auto")
+DOC_X_CONTENT_COMPRESS_MIN_BYTES = int(os.getenv("DOC_X_CONTENT_COMPRESS_MIN_BYTES", "1024"))
+DOC_X_CONTENT_OFFLOAD_MIN_BYTES = int(os.getenv("DOC_X_CONTENT_OFFLOAD_MIN_BYTES", "0"))
+DOC_X_CONTENT_OFFLOAD_PREFIX = os.getenv("DOC_X_CONTENT_OFFLOAD_PREFIX", "doc-x/content/")
+
+# -------------------------------
+# Async Views
+# -------------------------------
+# Route ask/, process/ and process-text/ to the async views in
+# apps/doc_x/async_views.py. Only worth it under ASGI (SERVER_MODE=asgi);
+# under WSGI each async view gets its own event loop.
+DOC_X_ASYNC_VIEWS = os.getenv("DOC_X_ASYNC_VIEWS", "False") == "True"
+
+# -------------------------------
+# Response Compression
+# -------------------------------
+# Views wrapped in @compress_response brotli/gzip-compress bodies of at
+# least this many bytes (brotli needs the `brotli` package).
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+
+# -------------------------------
+# Caches
+# -------------------------------
+# Set REDIS_URL to share the cache (and question quotas) across processes
+# and hosts; requires the `redis` package.
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}}
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# -------------------------------
+# Question Quota
+# -------------------------------
+# "cache" (shared Django cache), "file" (fcntl-locked files, one host) or
+# "local" (per process, development only). Counts are flushed to
+# UserQuestionLimit within QUOTA_FLUSH_INTERVAL seconds of changing.
+QUOTA_BACKEND = os.getenv("QUOTA_BACKEND", "cache" if REDIS_URL else ("file" if IS_PRODUCTION else "local"))
+QUOTA_CACHE_ALIAS = os.getenv("QUOTA_CACHE_ALIAS", "default")
+QUOTA_FILE_DIR = os.getenv("QUOTA_FILE_DIR", "/tmp/guidewisey-quota")
+QUOTA_FLUSH_INTERVAL = float(os.getenv("QUOTA_FLUSH_INTERVAL", "5"))
+
+# -------------------------------
+# Doc-X Admin
+# -------------------------------
+# Unfiltered changelists on PostgreSQL show the planner's row estimate
+# instead of running COUNT(*) once a table has this many rows.
+DOC_X_ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv("DOC_X_ADMIN_ESTIMATED_COUNT_THRESHOLD", "100000"))
@@ -0,0 +1,13 @@
+# gunicorn.conf.py
+# Loaded by `gunicorn` from the working directory (see entrypoint.sh).
+import os
+
+
+def post_fork(server, worker):
+    """Give each worker its own client pools and optionally warm them up."""
+    from services.registry import registry
+
+    registry.reset()  # never share sockets inherited from the master
+    if os.getenv("WARM_CLIENTS_ON_BOOT", "False") == "True":
+        registry.warm_up(connect=True)
+        server.log.info(f"Worker {worker.pid}: shared clients warmed up")
@@ -0,0 +1,136 @@
+"""
+Benchmark concurrent /ask requests against a fake slow LLM: the sync view
+on one sync worker versus the async view on one ASGI worker.
+
+Usage:
+    python scripts/bench_async_concurrency.py [--requests 20] [--latency 1.0]
+
+Both runs use the real URL routing, middleware, sessions, quota and ORM
+(on a scratch SQLite database); only the Gemini client is replaced by one
+that sleeps for --latency seconds per call. A sync worker handles one
+request at a time, so its wall time grows with --requests; the ASGI
+worker overlaps the LLM waits.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "guidewisey.settings")
+
+import django  # noqa: E402
+import httpx  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+
+class SlowGemini:
+    DEFAULT_MODEL = MODEL_SET = "gemini-2.5-flash"
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def build_system_prompt(self, *args, **kwargs):
+        return "system"
+
+    def explain_text(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return "An answer."
+
+    async def aexplain_text(self, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return "An answer."
+
+
+def seed(count):
+    from django.contrib.auth import get_user_model
+    from apps.doc_x.models import Document
+
+    user = get_user_model().objects.create_user(username="bench", password="benchpass123")
+    documents = [
+        Document.objects.create(s3_key=f"uploads/{n}.pdf", content=f"Council tax bill {n}.") for n in range(count)
+    ]
+    return user, [document.id for document in documents]
+
+
+def run_sync(user, document_ids):
+    """One sync worker: requests are served back to back."""
+    from django.test import Client
+
+    client = Client()
+    client.force_login(user)
+    started = time.perf_counter()
+    for document_id in document_ids:
+        response = client.post(
+            "/api/doc-x/ask/", {"document_id": document_id, "question": "When to pay?"}, content_type="application/json"
+        )
+        assert response.status_code == 200, response.content
+    return time.perf_counter() - started
+
+
+async def run_async(document_ids):
+    """One ASGI worker: all requests in flight at once."""
+    from django.core.asgi import get_asgi_application
+
+    transport = httpx.ASGITransport(app=get_asgi_application())
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        await client.get("/api/accounts/csrf/")
+        response = await client.post("/api/accounts/login/", json={"username": "bench", "password": "benchpass123"})
+        response.raise_for_status()
+        headers = {"X-CSRFToken": client.cookies.get("csrftoken", ""), "Referer": "http://localhost/"}
+
+        async def ask(document_id):
+            response = await client.post(
+                "/api/doc-x/async/ask/", json={"document_id": document_id, "question": "When to pay?"}, headers=headers
+            )
+            assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*(ask(document_id) for document_id in document_ids))
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=1.0, help="fake LLM latency in seconds")
+    args = parser.parse_args()
+
+    scratch = tempfile.NamedTemporaryFile(suffix=".sqlite3", delete=False)
+    # Each in-flight ASGI request runs its ORM work in its own thread; let
+    # SQLite writers wait for the lock instead of failing
+    settings.DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": scratch.name,
+        "OPTIONS": {"timeout": 30, "transaction_mode": "IMMEDIATE"},
+    }
+    settings.ALLOWED_HOSTS = ["*"]
+    django.setup()
+
+    from django.core.management import call_command
+    from guidewisey.quota import quota_engine
+
+    gemini = SlowGemini(args.latency)
+    try:
+        call_command("migrate", verbosity=0)
+        user, document_ids = seed(args.requests * 2)
+        with mock.patch("apps.doc_x.views.get_llm_client", return_value=gemini), mock.patch(
+            "apps.doc_x.async_views.get_llm_client", return_value=gemini
+        ):
+            sync_elapsed = run_sync(user, document_ids[: args.requests])
+            async_elapsed = asyncio.run(run_async(document_ids[args.requests:]))
+        quota_engine.flush()
+    finally:
+        os.unlink(scratch.name)
+
+    print(f"{args.requests} requests, {args.latency:.2f}s fake LLM latency")
+    for label, elapsed in [("sync worker", sync_elapsed), ("asgi worker", async_elapsed)]:
+        print(f"  {label:<12} {elapsed:7.2f}s  {args.requests / elapsed:7.2f} req/s")
+    print(f"  speedup      {sync_elapsed / async_elapsed:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark hot doc_x lookups before and after the 0008 index migration.
+
+Usage:
+    python scripts/bench_indexes.py [--documents 100000] [--turns 10] [--lookups 500]
+                                    [--configured-db]
+
+Seeds a scratch SQLite database (or, with --configured-db, the database from
+settings, e.g. a throwaway Postgres) migrated to 0007, times the lookups,
+applies 0008 and times them again. Query plans are printed for both runs.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "guidewisey.settings")
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+BEFORE = "0007_userquestionlimit_optional_document"
+AFTER = "0008_hot_lookup_indexes"
+
+
+def seed(args):
+    from django.contrib.auth import get_user_model
+    from apps.doc_x.models import Conversation, Document, UserQuestionLimit
+
+    users = get_user_model().objects.bulk_create(
+        [get_user_model()(username=f"bench{n}") for n in range(100)]
+    )
+    batch = 5000
+    for start in range(0, args.documents, batch):
+        documents = Document.objects.bulk_create(
+            [
+                Document(s3_key=f"uploads/{n:08d}.pdf", content="text", summary="summary")
+                for n in range(start, min(start + batch, args.documents))
+            ]
+        )
+        Conversation.objects.bulk_create(
+            [
+                Conversation(document=document, role="user" if turn % 2 == 0 else "assistant", message="message")
+                for document in documents
+                for turn in range(args.turns)
+            ]
+        )
+        UserQuestionLimit.objects.bulk_create(
+            [UserQuestionLimit(user=random.choice(users), document=document, count=1) for document in documents]
+        )
+        print(f"  seeded {start + len(documents)} documents", end="\r", flush=True)
+    print()
+
+
+def lookups(args):
+    from apps.doc_x.models import Conversation, Document, UserQuestionLimit
+
+    rng = random.Random(42)
+    ids = [rng.randrange(1, args.documents + 1) for _ in range(args.lookups)]
+    return {
+        "document by s3_key": lambda n: Document.objects.filter(s3_key=f"uploads/{n - 1:08d}.pdf").first(),
+        "history by document, id": lambda n: list(
+            Conversation.objects.filter(document_id=n, id__gt=0).order_by("id").values_list("id", "role", "message")
+        ),
+        "quota by document": lambda n: UserQuestionLimit.objects.filter(document_id=n, session_key=None)
+        .values_list("count", flat=True)
+        .first(),
+    }, ids
+
+
+def explain(queryset):
+    try:
+        return queryset.explain().replace("\n", " | ")
+    except Exception as e:
+        return f"(explain unavailable: {e})"
+
+
+def measure(label, args):
+    from apps.doc_x.models import Conversation, Document
+
+    print(f"\n{label}")
+    print("  plan s3_key:  " + explain(Document.objects.filter(s3_key="uploads/00000001.pdf")))
+    print("  plan history: " + explain(Conversation.objects.filter(document_id=1, id__gt=0).order_by("id")))
+    queries, ids = lookups(args)
+    results = {}
+    for name, query in queries.items():
+        started = time.perf_counter()
+        for n in ids:
+            query(n)
+        elapsed = (time.perf_counter() - started) / len(ids) * 1000
+        results[name] = elapsed
+        print(f"  {name:<26} {elapsed:8.3f} ms/lookup")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--configured-db", action="store_true", help="use the database from settings")
+    args = parser.parse_args()
+
+    scratch = None
+    if not args.configured_db:
+        scratch = tempfile.NamedTemporaryFile(suffix=".sqlite3", delete=False)
+        settings.DATABASES["default"] = {"ENGINE": "django.db.backends.sqlite3", "NAME": scratch.name}
+    django.setup()
+
+    from django.core.management import call_command
+
+    try:
+        call_command("migrate", verbosity=0)
+        call_command("migrate", "doc_x", BEFORE, verbosity=0)
+        print(f"Seeding {args.documents} documents x {args.turns} turns")
+        seed(args)
+
+        before = measure(f"Before ({BEFORE})", args)
+        call_command("migrate", "doc_x", AFTER, verbosity=0)
+        after = measure(f"After ({AFTER})", args)
+
+        print("\nSpeedup")
+        for name in before:
+            print(f"  {name:<26} {before[name] / after[name]:8.1f}x")
+    finally:
+        if scratch is not None:
+            os.unlink(scratch.name)
+
+
+if __name__ == "__main__":
+    main()
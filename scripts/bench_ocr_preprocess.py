@@ -0,0 +1,89 @@
+"""
+Benchmark OCR time and memory per megapixel with and without preprocessing.
+
+Usage:
+    python scripts/bench_ocr_preprocess.py [--megapixels 3 12] [--profiles none fast default quality]
+                                           [--no-ocr]
+
+Each run happens in a fresh process so peak memory is not shared between
+runs. Peak memory is the Python process RSS plus the largest tesseract
+child. --no-ocr times preprocessing alone (no tesseract binary needed).
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+LINE = "Please submit the signed form before the deadline stated above"
+
+
+def make_photo(megapixels):
+    """A phone-style JPEG photo of a one-page letter."""
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    image = Image.new("RGB", (width, height), (235, 230, 220))
+    draw = ImageDraw.Draw(image)
+    step = max(12, height // 40)
+    for n in range(30):
+        draw.text((width // 5, height // 10 + n * step), LINE, fill=(25, 25, 25))
+    image = image.rotate(2, fillcolor=(235, 230, 220))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def _run(data, profile, ocr, queue):
+    from apps.doc_x.extract import ocr_image
+    from apps.doc_x.preprocess import preprocess_image
+
+    start = time.perf_counter()
+    with Image.open(io.BytesIO(data)) as image:
+        if ocr:
+            ocr_image(image, profile=profile)
+        else:
+            preprocess_image(image, profile=profile).load()
+    elapsed = time.perf_counter() - start
+
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    queue.put((elapsed, (own + child) / 1024))  # ru_maxrss is KiB on Linux
+
+
+def measure(data, profile, ocr):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run, args=(data, profile, ocr, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[3, 12])
+    parser.add_argument("--profiles", nargs="+", default=["none", "fast", "default", "quality"])
+    parser.add_argument("--no-ocr", action="store_true")
+    args = parser.parse_args()
+
+    ocr = not args.no_ocr
+    print(f"{'MP':>5} {'profile':>8} {'seconds':>8} {'s/MP':>7} {'peak MB':>8} {'MB/MP':>7}")
+    for megapixels in args.megapixels:
+        data = make_photo(megapixels)
+        for profile in args.profiles:
+            elapsed, peak_mb = measure(data, profile, ocr)
+            print(
+                f"{megapixels:>5g} {profile:>8} {elapsed:>8.2f} {elapsed / megapixels:>7.3f} "
+                f"{peak_mb:>8.0f} {peak_mb / megapixels:>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
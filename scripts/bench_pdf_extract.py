@@ -0,0 +1,119 @@
+"""
+Benchmark PDF extraction: the old serial path vs. the page-parallel engine.
+
+Usage:
+    python scripts/bench_pdf_extract.py [--pages 10 50 200] [--repeat 3] [--scanned]
+
+Text PDFs measure text-layer extraction only. --scanned builds image-only
+PDFs (no text layer) so every page goes through the OCR fallback; this
+needs the tesseract binary on PATH.
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytesseract  # noqa: E402
+from PIL import Image, ImageDraw  # noqa: E402
+from pypdf import PdfReader, PdfWriter, PageObject  # noqa: E402
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject  # noqa: E402
+
+from apps.doc_x import extract  # noqa: E402
+
+LINE = "Your benefit payment for the period has been reviewed and approved"
+
+
+def make_text_pdf(pages, lines_per_page=40):
+    writer = PdfWriter()
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    })
+    for page_no in range(pages):
+        page = PageObject.create_blank_page(width=612, height=792)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+        ops = ["BT /F1 10 Tf 14 TL 50 750 Td"]
+        ops += [f"({LINE} - page {page_no} line {n}) '" for n in range(lines_per_page)]
+        ops.append("ET")
+        stream = DecodedStreamObject()
+        stream.set_data("\n".join(ops).encode())
+        page[NameObject("/Contents")] = writer._add_object(stream)
+        writer.add_page(page)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def make_scanned_pdf(pages, dpi=150):
+    images = []
+    for page_no in range(pages):
+        image = Image.new("L", (int(8.27 * dpi), int(11.69 * dpi)), 255)
+        draw = ImageDraw.Draw(image)
+        for n in range(30):
+            draw.text((60, 60 + n * 40), f"{LINE} - page {page_no} line {n}", fill=0)
+        images.append(image)
+    buffer = io.BytesIO()
+    images[0].save(buffer, "PDF", save_all=True, append_images=images[1:], resolution=dpi)
+    return buffer.getvalue()
+
+
+def serial_baseline(data):
+    """The pre-engine path: every page on the calling thread, string +=."""
+    reader = PdfReader(io.BytesIO(data))
+    text = ""
+    for index, page in enumerate(reader.pages):
+        page_text = page.extract_text() or ""
+        if len(page_text.strip()) < extract.PDF_OCR_MIN_CHARS:
+            page_text = extract._ocr_page(data, index, extract.PDF_OCR_DPI)
+        text += page_text
+    return text
+
+
+def engine(data):
+    return extract.PAGE_BREAK.join(extract.extract_pdf_pages(io.BytesIO(data)))
+
+
+def timed(fn, data, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(data)
+        runs.append(time.perf_counter() - start)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scanned", action="store_true")
+    args = parser.parse_args()
+
+    if args.scanned:
+        try:
+            pytesseract.get_tesseract_version()
+        except Exception:
+            sys.exit("tesseract is not installed; --scanned needs it")
+
+    # Warm the pool so its start-up cost is not billed to the first row
+    extract.get_process_pool().submit(int).result()
+
+    kind = "scanned" if args.scanned else "text"
+    print(f"{kind} PDFs, workers={extract.PDF_WORKERS}, median of {args.repeat}")
+    print(f"{'pages':>6} {'serial s':>10} {'engine s':>10} {'speedup':>8}")
+    for pages in args.pages:
+        data = make_scanned_pdf(pages) if args.scanned else make_text_pdf(pages)
+        serial = timed(serial_baseline, data, args.repeat)
+        parallel = timed(engine, data, args.repeat)
+        print(f"{pages:>6} {serial:>10.3f} {parallel:>10.3f} {serial / parallel:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark end-to-end summarization latency, single-shot vs map-reduce.
+
+Usage:
+    python scripts/bench_summarize.py [--tokens 4000 20000 100000 400000]
+                                      [--workers 4] [--time-scale 0.01]
+
+The LLM is simulated: each call sleeps for a prefill cost proportional to
+the prompt length plus a decode cost for its answer (short notes for map
+calls, a full explanation for the final call), and fails when the prompt
+exceeds --context tokens. --time-scale shrinks the sleeps so a full run
+takes seconds; reported numbers are scaled back up.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.summarize import MAP_PROMPT, MapReduceSummarizer  # noqa: E402
+from services.tokens import estimate_tokens  # noqa: E402
+
+PARAGRAPH = (
+    "The municipality confirms receipt of your application for a parking "
+    "permit. Please submit proof of residence and vehicle registration "
+    "before the deadline, otherwise the application will be closed. "
+)
+
+
+class FakeLLM:
+    def __init__(self, args):
+        self.args = args
+        self.calls = 0
+
+    def explain(self, text, system_prompt=None, **kwargs):
+        self.calls += 1
+        tokens = estimate_tokens(text)
+        if tokens > self.args.context:
+            raise RuntimeError(f"prompt of {tokens} tokens exceeds context")
+        output = self.args.map_output_tokens if system_prompt == MAP_PROMPT else self.args.output_tokens
+        seconds = tokens / self.args.prefill_tps + output / self.args.decode_tps + self.args.overhead
+        time.sleep(seconds * self.args.time_scale)
+        return "- note " * (output // 2)
+
+
+def make_document(tokens):
+    paragraphs = max(1, tokens // estimate_tokens(PARAGRAPH))
+    return "\n\n".join(PARAGRAPH for _ in range(paragraphs))
+
+
+def run(args, text, single_shot_tokens):
+    llm = FakeLLM(args)
+    summarizer = MapReduceSummarizer(
+        llm.explain,
+        single_shot_tokens=single_shot_tokens,
+        chunk_tokens=args.chunk_tokens,
+        max_workers=args.workers,
+    )
+    started = time.perf_counter()
+    try:
+        summarizer.summarize(text)
+    except RuntimeError:
+        return None, llm.calls
+    return (time.perf_counter() - started) / args.time_scale, llm.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, nargs="+", default=[4000, 20000, 100000, 400000])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-tokens", type=int, default=6000)
+    parser.add_argument("--single-shot-tokens", type=int, default=12000)
+    parser.add_argument("--context", type=int, default=128000)
+    parser.add_argument("--prefill-tps", type=float, default=5000.0, help="prompt tokens per second")
+    parser.add_argument("--decode-tps", type=float, default=80.0, help="output tokens per second")
+    parser.add_argument("--output-tokens", type=int, default=300, help="final answer length")
+    parser.add_argument("--map-output-tokens", type=int, default=150, help="notes per chunk")
+    parser.add_argument("--overhead", type=float, default=0.4, help="seconds per call")
+    parser.add_argument("--time-scale", type=float, default=0.01)
+    args = parser.parse_args()
+
+    print(f"{'tokens':>8} {'single-shot':>12} {'map-reduce':>12} {'calls':>6} {'speedup':>8}")
+    for tokens in args.tokens:
+        text = make_document(tokens)
+        single, _ = run(args, text, single_shot_tokens=sys.maxsize)
+        mapped, calls = run(args, text, single_shot_tokens=args.single_shot_tokens)
+        single_s = f"{single:.1f}s" if single is not None else "fails"
+        speedup = f"{single / mapped:.1f}x" if single is not None else "-"
+        print(f"{estimate_tokens(text):>8} {single_s:>12} {mapped:>11.1f}s {calls:>6} {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
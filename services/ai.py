@@ -1,7 +1,11 @@
 import os
+import time
 import logging
-from typing import List, Optional
-from openai import OpenAI, OpenAIError
+from typing import Iterator, List, Optional
+from openai import AsyncOpenAI, OpenAI, OpenAIError
+
+from .resilience import dependency
+from .tokens import estimate_messages_tokens
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -11,6 +15,7 @@ class AIClient:
     """
     Lightweight LLM client for explaining documents and answering questions.
     Pure service: no Django, no DB, no S3 dependency.
+    Calls go through the "openai" circuit breaker (services.resilience).
     """
 
     DEFAULT_SYSTEM_PROMPT = (
@@ -18,10 +23,14 @@ class AIClient:
         "in very simple, clear language."
     )
 
-    def __init__(self):
+    def __init__(self, http_client=None, async_http_client=None):
         """
         Initialize OpenAI client at runtime.
         This MUST NOT fail during Django startup or migrations.
+
+        Args:
+            http_client: Optional shared httpx.Client (connection pool)
+            async_http_client: Optional shared httpx.AsyncClient for aexplain_text
         """
         self.api_key = os.getenv("OPENAI_API_KEY")
 
@@ -30,14 +39,18 @@ class AIClient:
                 "OPENAI_API_KEY not set. AIClient will be disabled until provided."
             )
             self.client = None
+            self.async_client = None
             return
 
         try:
-            self.client = OpenAI(api_key=self.api_key)
+            # Completions are not idempotent: no SDK retries (see services.resilience)
+            self.client = OpenAI(api_key=self.api_key, http_client=http_client, max_retries=0)
+            self.async_client = AsyncOpenAI(api_key=self.api_key, http_client=async_http_client, max_retries=0)
             logger.info("OpenAI client initialized successfully")
         except Exception as exc:
             logger.error(f"Failed to initialize OpenAI client: {exc}")
             self.client = None
+            self.async_client = None
             raise
 
     def explain_text(
@@ -63,6 +76,105 @@ class AIClient:
             LLM-generated response as string
         """
 
+        messages = self._build_messages(text, conversation, system_prompt)
+
+        try:
+            response = dependency("openai").call(
+                lambda timeout: self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=timeout,
+                )
+            )
+
+            answer = response.choices[0].message.content.strip()
+            logger.info("LLM response generated successfully")
+            return answer
+
+        except Exception as exc:
+            logger.error(f"OpenAI API error: {exc}")
+            raise
+
+    async def aexplain_text(
+        self,
+        text: str,
+        conversation: Optional[List[dict]] = None,
+        system_prompt: Optional[str] = None,
+        model: str = "gpt-4o-mini",
+        temperature: float = 0.2,
+    ) -> str:
+        """
+        Async variant of explain_text for ASGI views. Arguments are the
+        same as explain_text.
+        """
+        messages = self._build_messages(text, conversation, system_prompt)
+
+        try:
+            response = await dependency("openai").acall(
+                lambda timeout: self.async_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=timeout,
+                )
+            )
+
+            answer = response.choices[0].message.content.strip()
+            logger.info("LLM response generated successfully")
+            return answer
+
+        except Exception as exc:
+            logger.error(f"OpenAI API error: {exc}")
+            raise
+
+    def stream_text(
+        self,
+        text: str,
+        conversation: Optional[List[dict]] = None,
+        system_prompt: Optional[str] = None,
+        model: str = "gpt-4o-mini",
+        temperature: float = 0.2,
+    ) -> Iterator[str]:
+        """
+        Streaming variant of explain_text: yields text chunks as they
+        arrive. Arguments are the same as explain_text.
+        """
+        messages = self._build_messages(text, conversation, system_prompt)
+        return self._stream(messages, model, temperature)
+
+    def _stream(self, messages, model, temperature):
+        gate = dependency("openai")
+        gate.before_call()
+        started = time.perf_counter()
+        try:
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                timeout=gate.timeout(),
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            logger.info("LLM stream completed successfully")
+
+        except GeneratorExit:  # the client went away mid-stream
+            gate.record_success()
+            raise
+        except Exception as exc:
+            gate.record_failure(exc)
+            logger.error(f"OpenAI API stream error: {exc}")
+            raise
+        gate.record_success(time.perf_counter() - started)
+
+    def prompt_tokens(self, text: str, conversation: Optional[List[dict]] = None, system_prompt: Optional[str] = None):
+        """Estimated size of the messages explain_text would send."""
+        return estimate_messages_tokens(self._messages(text, conversation, system_prompt))
+
+    def _build_messages(self, text, conversation, system_prompt):
+        """Validate input and build the chat messages list."""
         if not self.client:
             raise OpenAIError(
                 "OPENAI_API_KEY is missing. Cannot call OpenAI."
@@ -71,6 +183,9 @@ class AIClient:
         if not text or not text.strip():
             raise ValueError("Text to explain cannot be empty")
 
+        return self._messages(text, conversation, system_prompt)
+
+    def _messages(self, text, conversation, system_prompt):
         if conversation is None:
             conversation = []
 
@@ -98,18 +213,4 @@ class AIClient:
                 "content": text,
             }
         )
-
-        try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-            )
-
-            answer = response.choices[0].message.content.strip()
-            logger.info("LLM response generated successfully")
-            return answer
-
-        except Exception as exc:
-            logger.error(f"OpenAI API error: {exc}")
-            raise
+        return messages
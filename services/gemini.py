@@ -1,15 +1,20 @@
 import os
+import time
+import asyncio
 import logging
-from typing import List, Optional
+from typing import Iterator, List, Optional
+
+from .resilience import dependency, run_with_timeout
+from .tokens import estimate_messages_tokens
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # Optional imports
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI, OpenAI
 except ImportError:
-    OpenAI = None
+    AsyncOpenAI = OpenAI = None
 
 try:
     from google import genai
@@ -26,6 +31,8 @@ class GeminiClient:
     - Optional preferred output language
     - Supports conversation history
     - Supports native Gemini SDK or OpenAI-compatible endpoint
+    - Async variant (aexplain_text) for ASGI views
+    - Circuit breaker and adaptive timeout per engine (services.resilience)
     - No Django / S3 dependency
     """
 
@@ -41,22 +48,43 @@ class GeminiClient:
         "- Be concise and helpful\n"
     )
 
-    def __init__(self):
+    DEFAULT_MODEL = "gemini-2.5-flash"
+
+    OPENAI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+    def __init__(self, http_client=None, async_http_client=None):
+        """
+        Args:
+            http_client: Optional shared httpx.Client for the OpenAI-compatible endpoint
+            async_http_client: Optional shared httpx.AsyncClient for its async variant
+        """
         self.gemini_key = os.getenv("GEMINI_API_KEY")
 
         if not self.gemini_key:
             logger.warning("GEMINI_API_KEY not set. GeminiClient disabled.")
             self.openai_style = None
+            self.openai_async = None
             self.native = None
             return
 
         # OpenAI-compatible Gemini client
         self.openai_style = None
+        self.openai_async = None
         if OpenAI is not None:
             try:
+                # Completions are not idempotent: no SDK retries, the breaker
+                # and the router's failover handle outages instead
                 self.openai_style = OpenAI(
                     api_key=self.gemini_key,
-                    base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
+                    base_url=self.OPENAI_BASE_URL,
+                    http_client=http_client,
+                    max_retries=0,
+                )
+                self.openai_async = AsyncOpenAI(
+                    api_key=self.gemini_key,
+                    base_url=self.OPENAI_BASE_URL,
+                    http_client=async_http_client,
+                    max_retries=0,
                 )
                 logger.info("Gemini OpenAI-style client initialized.")
             except Exception as e:
@@ -77,7 +105,7 @@ class GeminiClient:
         conversation: Optional[List[dict]] = None,
         preferred_language: str = "English",
         system_prompt: Optional[str] = None,
-        model: str = "gemini-2.5-flash",
+        model: str = DEFAULT_MODEL,
         engine: str = "native",  # "native" or "openai"
     ) -> str:
         """
@@ -99,8 +127,7 @@ class GeminiClient:
 
         conversation = conversation or []
 
-        final_prompt = system_prompt or self.DEFAULT_SYSTEM_PROMPT
-        final_prompt += f"\n\nOutput language: {preferred_language}."
+        final_prompt = self.build_system_prompt(system_prompt, preferred_language)
 
         if engine == "openai" and self.openai_style:
             return self._call_openai(
@@ -113,17 +140,119 @@ class GeminiClient:
         if engine == "native" and self.native:
             return self._call_native(
                 text=text,
+                conversation=conversation,
+                system_prompt=final_prompt,
+                model=model,
+            )
+
+        raise RuntimeError("No valid Gemini client available.")
+
+    async def aexplain_text(
+        self,
+        text: str,
+        conversation: Optional[List[dict]] = None,
+        preferred_language: str = "English",
+        system_prompt: Optional[str] = None,
+        model: str = DEFAULT_MODEL,
+        engine: str = "native",  # "native" or "openai"
+    ) -> str:
+        """
+        Async variant of explain_text: awaits the SDK's async API instead of
+        blocking a thread. Arguments are the same as explain_text.
+        """
+        if not text or len(text.strip()) < 5:
+            raise ValueError("Text must be meaningful")
+
+        conversation = conversation or []
+
+        final_prompt = self.build_system_prompt(system_prompt, preferred_language)
+
+        if engine == "openai" and self.openai_async:
+            return await self._acall_openai(
+                text=text,
+                conversation=conversation,
+                system_prompt=final_prompt,
+                model=model,
+            )
+
+        if engine == "native" and self.native:
+            return await self._acall_native(
+                text=text,
+                conversation=conversation,
                 system_prompt=final_prompt,
                 model=model,
             )
 
         raise RuntimeError("No valid Gemini client available.")
 
+    def stream_text(
+        self,
+        text: str,
+        conversation: Optional[List[dict]] = None,
+        preferred_language: str = "English",
+        system_prompt: Optional[str] = None,
+        model: str = DEFAULT_MODEL,
+        engine: str = "native",  # "native" or "openai"
+    ) -> Iterator[str]:
+        """
+        Streaming variant of explain_text: yields text chunks as the model
+        produces them. Arguments are the same as explain_text.
+        """
+        if not text or len(text.strip()) < 5:
+            raise ValueError("Text must be meaningful")
+
+        conversation = conversation or []
+
+        final_prompt = self.build_system_prompt(system_prompt, preferred_language)
+
+        if engine == "openai" and self.openai_style:
+            return self._stream_openai(
+                text=text,
+                conversation=conversation,
+                system_prompt=final_prompt,
+                model=model,
+            )
+
+        if engine == "native" and self.native:
+            return self._stream_native(
+                text=text,
+                conversation=conversation,
+                system_prompt=final_prompt,
+                model=model,
+            )
+
+        raise RuntimeError("No valid Gemini client available.")
+
+    def build_system_prompt(
+        self,
+        system_prompt: Optional[str] = None,
+        preferred_language: str = "English",
+    ) -> str:
+        """Return the exact system prompt sent to the model."""
+        final_prompt = system_prompt or self.DEFAULT_SYSTEM_PROMPT
+        return final_prompt + f"\n\nOutput language: {preferred_language}."
+
+    def prompt_tokens(
+        self,
+        text: str,
+        conversation: Optional[List[dict]] = None,
+        preferred_language: str = "English",
+        system_prompt: Optional[str] = None,
+        engine: str = "native",
+    ) -> int:
+        """Estimated size of the payload explain_text would send with `engine`."""
+        final_prompt = self.build_system_prompt(system_prompt, preferred_language)
+        if engine == "openai":
+            return estimate_messages_tokens(self._openai_messages(text, conversation or [], final_prompt))
+        contents = self._native_contents(text, conversation or [], final_prompt)
+        return estimate_messages_tokens([{"content": part["text"]} for c in contents for part in c["parts"]])
+
     # ----------------------------
     # Internal methods
     # ----------------------------
 
-    def _call_openai(self, text, conversation, system_prompt, model):
+    @staticmethod
+    def _openai_messages(text, conversation, system_prompt):
         messages = [{"role": "system", "content": system_prompt}]
         messages.extend(conversation)
         messages.append(
@@ -132,27 +261,131 @@ class GeminiClient:
                 "content": f"Explain the following document:\n{text}",
             }
         )
+        return messages
+
+    @staticmethod
+    def _native_contents(text, conversation, system_prompt):
+        """
+        The same turns as _openai_messages, as Gemini contents: assistant
+        turns become "model" turns, and system messages (the history
+        summary) are sent as user turns since Gemini has no system role.
+        """
+        contents = [
+            {"role": "model" if msg["role"] == "assistant" else "user", "parts": [{"text": msg["content"]}]}
+            for msg in conversation
+            if "role" in msg and "content" in msg
+        ]
+        prompt = f"{system_prompt}\n\nExplain the following document:\n{text}"
+        contents.append({"role": "user", "parts": [{"text": prompt}]})
+        return contents
 
+    def _call_openai(self, text, conversation, system_prompt, model):
         try:
-            response = self.openai_style.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.2,
+            response = dependency("gemini-openai").call(
+                lambda timeout: self.openai_style.chat.completions.create(
+                    model=model,
+                    messages=self._openai_messages(text, conversation, system_prompt),
+                    temperature=0.2,
+                    timeout=timeout,
+                )
             )
             return response.choices[0].message.content.strip()
         except Exception as e:
             logger.error(f"Gemini OpenAI-style call failed: {e}")
             raise
 
-    def _call_native(self, text, system_prompt, model):
+    def _call_native(self, text, conversation, system_prompt, model):
+        # The pinned google-genai has no per-request timeout: wait on a worker thread instead
         try:
-            response = self.native.models.generate_content(
-                model=model,
-                contents=[
-                    f"{system_prompt}\n\nExplain the following document:\n{text}"
-                ],
+            response = dependency("gemini-native").call(
+                lambda timeout: run_with_timeout(
+                    lambda: self.native.models.generate_content(
+                        model=model,
+                        contents=self._native_contents(text, conversation, system_prompt),
+                    ),
+                    timeout,
+                )
             )
             return response.text.strip()
         except Exception as e:
             logger.error(f"Gemini native call failed: {e}")
             raise
+
+    async def _acall_openai(self, text, conversation, system_prompt, model):
+        try:
+            response = await dependency("gemini-openai").acall(
+                lambda timeout: self.openai_async.chat.completions.create(
+                    model=model,
+                    messages=self._openai_messages(text, conversation, system_prompt),
+                    temperature=0.2,
+                    timeout=timeout,
+                )
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            logger.error(f"Gemini OpenAI-style call failed: {e}")
+            raise
+
+    async def _acall_native(self, text, conversation, system_prompt, model):
+        aio = getattr(self.native, "aio", None)
+        if aio is None:  # older SDKs: keep the event loop free with a thread
+            return await asyncio.to_thread(self._call_native, text, conversation, system_prompt, model)
+        try:
+            response = await dependency("gemini-native").acall(
+                lambda timeout: asyncio.wait_for(
+                    aio.models.generate_content(
+                        model=model,
+                        contents=self._native_contents(text, conversation, system_prompt),
+                    ),
+                    timeout,
+                )
+            )
+            return response.text.strip()
+        except Exception as e:
+            logger.error(f"Gemini native call failed: {e}")
+            raise
+
+    def _stream_openai(self, text, conversation, system_prompt, model):
+        gate = dependency("gemini-openai")
+        gate.before_call()
+        started = time.perf_counter()
+        try:
+            stream = self.openai_style.chat.completions.create(
+                model=model,
+                messages=self._openai_messages(text, conversation, system_prompt),
+                temperature=0.2,
+                stream=True,
+                timeout=gate.timeout(),
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except GeneratorExit:  # the client went away mid-stream
+            gate.record_success()
+            raise
+        except Exception as e:
+            gate.record_failure(e)
+            logger.error(f"Gemini OpenAI-style stream failed: {e}")
+            raise
+        gate.record_success(time.perf_counter() - started)
+
+    def _stream_native(self, text, conversation, system_prompt, model):
+        gate = dependency("gemini-native")
+        gate.before_call()
+        started = time.perf_counter()
+        try:
+            stream = self.native.models.generate_content_stream(
+                model=model,
+                contents=self._native_contents(text, conversation, system_prompt),
+            )
+            for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+        except GeneratorExit:  # the client went away mid-stream
+            gate.record_success()
+            raise
+        except Exception as e:
+            gate.record_failure(e)
+            logger.error(f"Gemini native stream failed: {e}")
+            raise
+        gate.record_success(time.perf_counter() - started)
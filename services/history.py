@@ -0,0 +1,108 @@
+import os
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from .tokens import context_tokens, estimate_message_tokens, estimate_tokens, CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+HISTORY_KEEP_RECENT = int(os.getenv("HISTORY_KEEP_RECENT", "6"))
+HISTORY_FOLD_BATCH = int(os.getenv("HISTORY_FOLD_BATCH", "6"))
+
+FOLD_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an "
+    "assistant about one document. Merge the previous summary and the new "
+    "messages into a single updated summary. Keep facts, figures, dates, "
+    "decisions and open questions; drop greetings and repetition. "
+    "Use at most {words} words."
+)
+
+
+def history_budget(model: str) -> int:
+    """History tokens allowed per turn: the configured budget, capped at 1/8 of the model context."""
+    return min(HISTORY_TOKEN_BUDGET, context_tokens(model) // 8)
+
+
+class HistoryManager:
+    """
+    Keep conversation history within a token budget.
+
+    The newest turns are sent verbatim. Once there are more than
+    `keep_recent + fold_batch` of them, or they no longer fit the budget,
+    the older ones are folded into a rolling summary with one LLM call and
+    sent as a single system message ahead of the recent turns. Folding in
+    batches keeps the extra call off most questions.
+
+    Args:
+        summarize: callable(text, system_prompt=None) -> str
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[..., str],
+        budget_tokens: int = HISTORY_TOKEN_BUDGET,
+        keep_recent: int = HISTORY_KEEP_RECENT,
+        fold_batch: int = HISTORY_FOLD_BATCH,
+    ):
+        self.summarize = summarize
+        self.budget_tokens = budget_tokens
+        self.keep_recent = keep_recent
+        self.fold_batch = fold_batch
+
+    @property
+    def summary_tokens(self) -> int:
+        return self.budget_tokens // 3
+
+    @staticmethod
+    def summary_message(summary: str) -> dict:
+        return {"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}
+
+    def _fitting(self, turns: List[dict], budget: int, limit: Optional[int]) -> int:
+        """How many of the newest turns fit in `budget` (at most `limit`)."""
+        used, count = 0, 0
+        for turn in reversed(turns):
+            tokens = estimate_message_tokens(turn)
+            if (limit is not None and count >= limit) or used + tokens > budget:
+                break
+            used += tokens
+            count += 1
+        return count
+
+    def compact(self, summary: str, turns: List[dict]) -> Tuple[List[dict], str, int]:
+        """
+        Args:
+            summary: Current rolling summary ("" if none)
+            turns: Turns not yet in the summary, oldest first
+
+        Returns:
+            (messages to send, updated summary, number of oldest turns folded)
+        """
+        reserved = estimate_message_tokens(self.summary_message(summary)) if summary else 0
+        fits = self._fitting(turns, self.budget_tokens - reserved, None)
+        if fits == len(turns) and len(turns) <= self.keep_recent + self.fold_batch:
+            return self._messages(summary, turns), summary, 0
+
+        keep = self._fitting(turns, self.budget_tokens - self.summary_tokens - 4, self.keep_recent)
+        older, recent = turns[:len(turns) - keep], turns[len(turns) - keep:]
+        try:
+            summary = self._fold(summary, older)
+        except Exception as e:
+            # Keep the previous summary; the older turns are retried next time
+            logger.warning(f"History fold failed, dropping {len(older)} old turns for this request: {e}")
+            return self._messages(summary, recent), summary, 0
+        return self._messages(summary, recent), summary, len(older)
+
+    def _fold(self, summary: str, older: List[dict]) -> str:
+        transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in older)
+        text = f"Previous summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"
+        words = int(self.summary_tokens * 0.75)
+        folded = self.summarize(text, system_prompt=FOLD_PROMPT.format(words=words)).strip()
+        if estimate_tokens(folded) > self.summary_tokens:
+            folded = folded[: self.summary_tokens * CHARS_PER_TOKEN]
+        logger.info(f"Folded {len(older)} turns into a {estimate_tokens(folded)}-token summary")
+        return folded
+
+    def _messages(self, summary: str, turns: List[dict]) -> List[dict]:
+        return ([self.summary_message(summary)] if summary else []) + list(turns)
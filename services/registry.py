@@ -0,0 +1,249 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+
+import httpx
+
+from .s3 import S3Client
+from .ai import AIClient
+from .gemini import GeminiClient
+from .router import LLMRouter
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "120"))
+S3_POOL_SIZE = int(os.getenv("S3_POOL_SIZE", "10"))
+
+
+class LoopLocalAsyncClient(httpx.AsyncClient):
+    """
+    httpx.AsyncClient with one connection pool per event loop.
+
+    Pooled connections belong to the loop that opened them. Under ASGI a
+    worker has one loop, so this is one shared pool. When the async views
+    run under WSGI, async_to_sync gives each request a new loop, and a
+    keep-alive connection from the previous (closed) one would fail with
+    "Event loop is closed". Pools of closed loops are dropped on the next
+    request.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._pool_kwargs = kwargs
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+
+    def _pool(self):
+        loop = asyncio.get_running_loop()
+        with self._pools_lock:
+            for closed in [other for other in self._pools if other.is_closed()]:
+                del self._pools[closed]
+            pool = self._pools.get(loop)
+            if pool is None:
+                pool = self._pools[loop] = httpx.AsyncClient(**self._pool_kwargs)
+        return pool
+
+    async def send(self, request, **kwargs):
+        return await self._pool().send(request, **kwargs)
+
+    async def aclose(self):
+        with self._pools_lock:
+            pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+        await super().aclose()
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of shared S3, OpenAI and Gemini clients.
+
+    Clients are built lazily on first use and then reused by every request
+    in the process, so TLS connections stay warm in keep-alive pools
+    instead of being re-established per request. boto3, OpenAI and httpx
+    clients are all thread-safe. Call reset() after fork.
+
+    Checkouts count the clients handed to callers; building a client for
+    the router, warming up or reading metrics does not count as one.
+    """
+
+    def __init__(self):
+        # Reentrant: the router's factory builds the clients it wraps
+        self._lock = threading.RLock()
+        self._clients = {}
+        self._http_clients = {}
+        self._async_http_clients = {}
+        self._stats = {}
+
+    def _http_client(self, name):
+        client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_SIZE,
+                max_keepalive_connections=HTTP_POOL_SIZE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=HTTP_TIMEOUT,
+        )
+        self._http_clients[name] = client
+        return client
+
+    def _async_http_client(self, name):
+        """AsyncClient twin of _http_client (pooled per event loop), used by the clients' async methods."""
+        client = LoopLocalAsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_SIZE,
+                max_keepalive_connections=HTTP_POOL_SIZE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=HTTP_TIMEOUT,
+        )
+        self._async_http_clients[name] = client
+        return client
+
+    def _get(self, name, factory, checkout=True):
+        client = self._clients.get(name)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(name)
+                if client is None:
+                    started = time.perf_counter()
+                    client = factory()
+                    self._clients[name] = client
+                    self._stats[name] = {
+                        "created_at": time.time(),
+                        "init_ms": round((time.perf_counter() - started) * 1000, 1),
+                        "checkouts": 0,
+                    }
+                    logger.info(f"Registry created shared {name} client")
+        if checkout:
+            with self._lock:
+                if name in self._stats:
+                    self._stats[name]["checkouts"] += 1
+        return client
+
+    def s3(self, checkout=True) -> S3Client:
+        return self._get("s3", lambda: S3Client(max_pool_connections=S3_POOL_SIZE), checkout)
+
+    def ai(self, checkout=True) -> AIClient:
+        return self._get(
+            "openai",
+            lambda: AIClient(
+                http_client=self._http_client("openai"), async_http_client=self._async_http_client("openai")
+            ),
+            checkout,
+        )
+
+    def gemini(self, checkout=True) -> GeminiClient:
+        return self._get(
+            "gemini",
+            lambda: GeminiClient(
+                http_client=self._http_client("gemini"), async_http_client=self._async_http_client("gemini")
+            ),
+            checkout,
+        )
+
+    def llm(self) -> LLMRouter:
+        return self._get(
+            "llm", lambda: LLMRouter.from_clients(self.gemini(checkout=False), self.ai(checkout=False))
+        )
+
+    def llm_stats(self) -> dict:
+        """Router latency and health, or {} if no request has used it yet."""
+        router = self._clients.get("llm")
+        return router.stats() if router else {}
+
+    def warm_up(self, connect=False):
+        """
+        Build all clients up front (e.g. at worker boot). With `connect`,
+        also open a pooled connection to S3 and OpenAI so the first request
+        skips the TLS handshake. Failures are logged, never raised.
+        """
+        s3, ai, _ = self.s3(checkout=False), self.ai(checkout=False), self.gemini(checkout=False)
+        if not connect:
+            return
+        try:
+            if s3.client:
+                s3.client.head_bucket(Bucket=s3.bucket)
+        except Exception as e:
+            logger.warning(f"S3 warm-up failed: {e}")
+        try:
+            if ai.client:
+                ai.client.models.list()
+        except Exception as e:
+            logger.warning(f"OpenAI warm-up failed: {e}")
+
+    def reset(self):
+        """Drop all clients, closing their pools (tests, post-fork)."""
+        with self._lock:
+            for client in self._http_clients.values():
+                client.close()
+            # AsyncClients can only be closed from their event loop; after a
+            # fork (the only reset in production) they have no open sockets.
+            self._clients.clear()
+            self._http_clients.clear()
+            self._async_http_clients.clear()
+            self._stats.clear()
+
+    def metrics(self) -> dict:
+        """Per-client checkout counts plus pool size and idle connections."""
+        metrics = {}
+        for name, stats in list(self._stats.items()):
+            entry = dict(stats)
+            if name in self._http_clients:
+                entry.update(_httpx_pool_stats(self._http_clients[name]))
+            elif name == "s3":
+                entry.update(_boto_pool_stats(self._clients[name]))
+                entry["transfers"] = self._clients[name].stats.snapshot()
+            metrics[name] = entry
+        return metrics
+
+
+def _httpx_pool_stats(client):
+    stats = {"pool_size": HTTP_POOL_SIZE}
+    try:
+        connections = client._transport._pool.connections
+        stats["open"] = len(connections)
+        stats["idle"] = sum(1 for conn in connections if conn.is_idle())
+    except AttributeError:
+        pass
+    return stats
+
+
+def _boto_pool_stats(s3):
+    stats = {"pool_size": s3.max_pool_connections}
+    try:
+        manager = s3.client._endpoint.http_session._manager
+        pools = [manager.pools[key] for key in manager.pools.keys()]
+        # urllib3 pre-fills its queue with None placeholders; count real connections
+        stats["idle"] = sum(
+            1 for pool in pools if pool.pool for conn in list(pool.pool.queue) if conn is not None
+        )
+        stats["created"] = sum(pool.num_connections for pool in pools)
+    except (AttributeError, TypeError):
+        pass
+    return stats
+
+
+registry = ClientRegistry()
+
+
+def get_s3_client() -> S3Client:
+    return registry.s3()
+
+
+def get_ai_client() -> AIClient:
+    return registry.ai()
+
+
+def get_gemini_client() -> GeminiClient:
+    return registry.gemini()
+
+
+def get_llm_client() -> LLMRouter:
+    """Latency-routed client over Gemini (native and OpenAI-style) and OpenAI."""
+    return registry.llm()
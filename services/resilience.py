@@ -0,0 +1,345 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Circuit breaker: consecutive failures before opening, seconds before a probe
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+# Adaptive timeout: TIMEOUT_MULTIPLIER x the TIMEOUT_PERCENTILE latency,
+# clamped to [TIMEOUT_MIN, TIMEOUT_MAX]; TIMEOUT_DEFAULT until there are samples
+TIMEOUT_PERCENTILE = float(os.getenv("TIMEOUT_PERCENTILE", "99"))
+TIMEOUT_MULTIPLIER = float(os.getenv("TIMEOUT_MULTIPLIER", "2.0"))
+TIMEOUT_MIN = float(os.getenv("TIMEOUT_MIN", "2.0"))
+TIMEOUT_MAX = float(os.getenv("TIMEOUT_MAX", os.getenv("HTTP_TIMEOUT", "120")))
+TIMEOUT_DEFAULT = float(os.getenv("TIMEOUT_DEFAULT", "60"))
+TIMEOUT_MIN_SAMPLES = int(os.getenv("TIMEOUT_MIN_SAMPLES", "20"))
+TIMEOUT_WINDOW = int(os.getenv("TIMEOUT_WINDOW", "200"))
+
+# Retries (idempotent calls only): total attempts and full-jitter backoff bounds
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.1"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "2.0"))
+
+# Threads for run_with_timeout (SDK calls without a per-request timeout)
+BOUNDED_CALL_THREADS = int(os.getenv("BOUNDED_CALL_THREADS", "16"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+_bounded_pool = None
+_bounded_pool_lock = threading.Lock()
+
+
+def percentile(samples, q: float) -> Optional[float]:
+    """Nearest-rank percentile of `samples` (None if empty)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * q // 100))  # ceil
+    return ordered[int(rank) - 1]
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} unavailable (circuit open, retry in {retry_in:.1f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+def status_code(exc) -> Optional[int]:
+    """HTTP status carried by an OpenAI, google-genai or botocore error, if any."""
+    for attr in ("status_code", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):
+        return response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return None
+
+
+def is_transient(exc) -> bool:
+    """
+    True for errors that say the dependency is unwell: timeouts, connection
+    errors, 5xx, 408 and 429. Bad input and other 4xx answers are the
+    caller's problem; they are neither retried nor counted by the breaker.
+    """
+    if isinstance(exc, (ValueError, TypeError, CircuitOpenError)):
+        return False
+    status = status_code(exc)
+    return status is None or status >= 500 or status in (408, 429)
+
+
+def run_with_timeout(fn: Callable[[], object], timeout: float):
+    """
+    Run `fn()` on a worker thread and wait at most `timeout` seconds, for
+    SDKs that take no per-request timeout. On expiry TimeoutError is
+    raised and the call is abandoned; its thread is freed once the SDK's
+    own timeout ends it.
+    """
+    global _bounded_pool
+    with _bounded_pool_lock:
+        if _bounded_pool is None:
+            _bounded_pool = ThreadPoolExecutor(max_workers=BOUNDED_CALL_THREADS, thread_name_prefix="bounded-call")
+    future = _bounded_pool.submit(fn)
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError:
+        future.cancel()
+        raise TimeoutError(f"No response within {timeout:.1f}s")
+
+
+class Dependency:
+    """
+    Circuit breaker, latency window and retry policy for one outbound
+    dependency ("s3", "openai", "gemini-native", ...).
+
+    Breaker: LLM calls and S3 requests go through `call`/`acall`. After
+    `failure_threshold` transient failures in a row the breaker opens and
+    calls fail immediately with CircuitOpenError, instead of each request
+    waiting out the HTTP timeout. After `reset_timeout` one probe call is
+    let through (half-open); its outcome closes or re-opens the breaker.
+
+    Timeout: `timeout()` is `multiplier` x the `percentile` latency of
+    recent successful calls, clamped to [min_timeout, max_timeout], and is
+    passed to the wrapped function so it can hand it to the SDK.
+
+    Retries: only with `idempotent=True`, up to `attempts` tries with
+    full-jitter exponential backoff, and only for transient errors.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+        percentile: float = TIMEOUT_PERCENTILE,
+        multiplier: float = TIMEOUT_MULTIPLIER,
+        min_timeout: float = TIMEOUT_MIN,
+        max_timeout: float = TIMEOUT_MAX,
+        default_timeout: float = TIMEOUT_DEFAULT,
+        min_samples: int = TIMEOUT_MIN_SAMPLES,
+        window: int = TIMEOUT_WINDOW,
+        attempts: int = RETRY_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        permanent: tuple = (),
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.default_timeout = default_timeout
+        self.min_samples = min_samples
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.permanent = permanent
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._counts = {"calls": 0, "failures": 0, "rejected": 0, "retries": 0, "opened": 0}
+
+    # ----------------------------
+    # Breaker state
+    # ----------------------------
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    def is_open(self) -> bool:
+        """True while calls are being rejected (half-open probes still allowed)."""
+        return self.state == OPEN
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                self._counts["calls"] += 1
+                return
+            if state == HALF_OPEN and not self._probing:
+                self._state, self._probing = HALF_OPEN, True
+                self._counts["calls"] += 1
+                logger.info(f"Circuit {self.name} half-open, probing")
+                return
+            self._counts["rejected"] += 1
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(self.name, retry_in)
+
+    def record_success(self, seconds: Optional[float] = None):
+        with self._lock:
+            if seconds is not None:
+                self._samples.append(seconds)
+            if self._state != CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self._state, self._failures, self._probing = CLOSED, 0, False
+
+    def record_failure(self, exc):
+        """Count `exc` against the breaker if it is transient; returns whether it was."""
+        if isinstance(exc, self.permanent) or not is_transient(exc):
+            with self._lock:
+                # The dependency answered; a half-open probe has done its job
+                if self._state == HALF_OPEN:
+                    self._state, self._failures, self._probing = CLOSED, 0, False
+            return False
+        with self._lock:
+            self._failures += 1
+            self._counts["failures"] += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._counts["opened"] += 1
+                    logger.warning(f"Circuit {self.name} open after {self._failures} failures: {exc}")
+                self._state, self._opened_at, self._probing = OPEN, time.monotonic(), False
+        return True
+
+    # ----------------------------
+    # Timeouts and retries
+    # ----------------------------
+
+    def timeout(self) -> float:
+        with self._lock:
+            samples = list(self._samples)
+        if len(samples) < self.min_samples:
+            return self.default_timeout
+        value = percentile(samples, self.percentile) * self.multiplier
+        return min(max(value, self.min_timeout), self.max_timeout)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _should_retry(self, exc, attempt, idempotent):
+        if not idempotent or attempt + 1 >= self.attempts or isinstance(exc, CircuitOpenError):
+            return False
+        if isinstance(exc, self.permanent) or not is_transient(exc):
+            return False
+        with self._lock:
+            self._counts["retries"] += 1
+        return True
+
+    def call(self, fn: Callable[[float], object], idempotent: bool = False):
+        """
+        Run `fn(timeout)` through the breaker.
+
+        Args:
+            fn: Callable taking the timeout in seconds
+            idempotent: Retry transient failures with jittered backoff
+        """
+        attempt = 0
+        while True:
+            self.before_call()
+            started = time.perf_counter()
+            try:
+                result = fn(self.timeout())
+            except Exception as e:
+                self.record_failure(e)
+                if not self._should_retry(e, attempt, idempotent):
+                    raise
+                delay = self._backoff(attempt)
+                logger.info(f"Retrying {self.name} in {delay:.2f}s after: {e}")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.record_success(time.perf_counter() - started)
+            return result
+
+    async def acall(self, fn: Callable[[float], Awaitable], idempotent: bool = False):
+        """Async variant of call; `fn(timeout)` returns an awaitable."""
+        attempt = 0
+        while True:
+            self.before_call()
+            started = time.perf_counter()
+            try:
+                result = await fn(self.timeout())
+            except asyncio.CancelledError:
+                # A hedged loser, not a dependency failure; free the probe slot
+                with self._lock:
+                    self._probing = False
+                raise
+            except Exception as e:
+                self.record_failure(e)
+                if not self._should_retry(e, attempt, idempotent):
+                    raise
+                delay = self._backoff(attempt)
+                logger.info(f"Retrying {self.name} in {delay:.2f}s after: {e}")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.record_success(time.perf_counter() - started)
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._state, self._failures, self._probing = CLOSED, 0, False
+            self._counts = dict.fromkeys(self._counts, 0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            samples = list(self._samples)
+            counts = dict(self._counts)
+            failures = self._failures
+        p50, p99 = percentile(samples, 50), percentile(samples, 99)
+        return {
+            "state": state,
+            "consecutive_failures": failures,
+            "timeout_s": round(self.timeout(), 2),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+            **counts,
+        }
+
+
+_dependencies = {}
+_dependencies_lock = threading.Lock()
+
+
+def dependency(name: str, **kwargs) -> Dependency:
+    """Process-wide Dependency for `name`; kwargs only apply on first use."""
+    dep = _dependencies.get(name)
+    if dep is None:
+        with _dependencies_lock:
+            dep = _dependencies.setdefault(name, Dependency(name, **kwargs))
+    return dep
+
+
+def is_open(name: str) -> bool:
+    """True if `name` has a breaker and it is rejecting calls."""
+    dep = _dependencies.get(name)
+    return dep is not None and dep.is_open()
+
+
+def reset():
+    """Close every breaker and forget latencies (tests)."""
+    for dep in list(_dependencies.values()):
+        dep.reset()
+
+
+def metrics() -> dict:
+    """Breaker state, current timeout and call counts per dependency."""
+    return {name: dep.snapshot() for name, dep in sorted(_dependencies.items())}
@@ -0,0 +1,93 @@
+import os
+import re
+import math
+from collections import Counter
+from typing import List
+
+from .tokens import chunk_text, estimate_tokens
+
+RETRIEVAL_CHUNK_TOKENS = int(os.getenv("RETRIEVAL_CHUNK_TOKENS", "300"))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "1500"))
+
+INDEX_VERSION = 1
+_WORDS = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    "a an and are as at be by do does for from has have how i in is it its my "
+    "of on or the this to was what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in _WORDS.findall(text.lower()) if word not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the chunks of one document.
+
+    The index is a plain dict of chunks, chunk lengths and postings
+    (term -> [[chunk, term frequency], ...]) so it can be stored in a
+    JSONField and loaded back without rebuilding.
+    """
+
+    def __init__(self, chunks, lengths, postings, k1=1.5, b=0.75):
+        self.chunks = chunks
+        self.lengths = lengths
+        self.postings = postings
+        self.k1 = k1
+        self.b = b
+        self.avgdl = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    @classmethod
+    def build(cls, text: str, chunk_tokens: int = RETRIEVAL_CHUNK_TOKENS) -> "BM25Index":
+        chunks = chunk_text(text, chunk_tokens)
+        lengths, postings = [], {}
+        for number, chunk in enumerate(chunks):
+            terms = Counter(tokenize(chunk))
+            lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                postings.setdefault(term, []).append([number, frequency])
+        return cls(chunks, lengths, postings)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BM25Index":
+        return cls(data["chunks"], data["lengths"], data["postings"])
+
+    def to_dict(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "chunks": self.chunks,
+            "lengths": self.lengths,
+            "postings": self.postings,
+        }
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K) -> List[tuple]:
+        """Return up to `k` (chunk number, score) pairs, best first."""
+        total = len(self.chunks)
+        scores = Counter()
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for number, frequency in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[number] / self.avgdl)
+                scores[number] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return scores.most_common(k)
+
+    def select(self, query: str, k: int = RETRIEVAL_TOP_K, token_budget: int = RETRIEVAL_TOKEN_BUDGET) -> List[str]:
+        """
+        Best matching chunks that fit in `token_budget`, returned in
+        document order. Falls back to the opening chunks when nothing
+        matches (e.g. "what is this letter about?").
+        """
+        ranked = [number for number, _ in self.search(query, k)] or list(range(min(k, len(self.chunks))))
+        selected, used = [], 0
+        for number in ranked:
+            tokens = estimate_tokens(self.chunks[number])
+            if used + tokens > token_budget:
+                continue
+            selected.append(number)
+            used += tokens
+        return [self.chunks[number] for number in sorted(selected)]
@@ -0,0 +1,431 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, List, Optional
+
+from . import resilience
+from .resilience import percentile
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Provider names in priority order (used until there are latency samples)
+LLM_PROVIDERS = [p.strip() for p in os.getenv("LLM_PROVIDERS", "gemini-native,gemini-openai,openai").split(",")]
+LLM_OPENAI_MODEL = os.getenv("LLM_OPENAI_MODEL", "gpt-4o-mini")
+LLM_ROUTER_WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "200"))
+LLM_ROUTER_MIN_SAMPLES = int(os.getenv("LLM_ROUTER_MIN_SAMPLES", "5"))
+LLM_FAILURE_THRESHOLD = int(os.getenv("LLM_FAILURE_THRESHOLD", "3"))
+LLM_FAILURE_COOLDOWN = float(os.getenv("LLM_FAILURE_COOLDOWN", "30"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "True") == "True"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0"))
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "10.0"))
+LLM_ROUTER_THREADS = int(os.getenv("LLM_ROUTER_THREADS", "16"))
+
+
+class Provider:
+    """
+    One backend the router can send a call to.
+
+    Args:
+        name: e.g. "gemini-native"
+        model: Model name the backend is called with
+        explain: callable(text, conversation, preferred_language, system_prompt) -> str
+        aexplain: async variant of `explain`
+        stream: callable with the same arguments returning an iterator of chunks
+        prompt_tokens: callable with the same arguments returning the
+            estimated size of the payload the backend sends
+        available: False when the backend has no configured client
+    """
+
+    def __init__(self, name, model, explain, aexplain=None, stream=None, prompt_tokens=None, available=True):
+        self.name = name
+        self.model = model
+        self.explain = explain
+        self.aexplain = aexplain
+        self.stream = stream
+        self.prompt_tokens = prompt_tokens
+        self.available = available
+
+    @property
+    def key(self):
+        return f"{self.name}:{self.model}"
+
+
+class LatencyTracker:
+    """Rolling latency window and consecutive-failure health per provider/model."""
+
+    def __init__(
+        self,
+        window: int = LLM_ROUTER_WINDOW,
+        failure_threshold: int = LLM_FAILURE_THRESHOLD,
+        cooldown: float = LLM_FAILURE_COOLDOWN,
+    ):
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._failures = {}
+        self._down_until = {}
+        self._counts = {}
+
+    def _count(self, key, name):
+        counts = self._counts.setdefault(key, {"calls": 0, "errors": 0, "hedges": 0, "hedge_wins": 0})
+        counts[name] += 1
+
+    def record(self, key, seconds):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+            self._failures[key] = 0
+            self._down_until.pop(key, None)
+            self._count(key, "calls")
+
+    def record_failure(self, key):
+        with self._lock:
+            self._failures[key] = self._failures.get(key, 0) + 1
+            self._count(key, "calls")
+            self._count(key, "errors")
+            if self._failures[key] >= self.failure_threshold:
+                self._down_until[key] = time.monotonic() + self.cooldown
+                logger.warning(f"LLM provider {key} unhealthy after {self._failures[key]} failures")
+
+    def record_hedge(self, key, won=False):
+        with self._lock:
+            self._count(key, "hedge_wins" if won else "hedges")
+
+    def healthy(self, key) -> bool:
+        return time.monotonic() >= self._down_until.get(key, 0)
+
+    def percentile(self, key, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+        if len(samples) < min_samples:
+            return None
+        return percentile(samples, q)
+
+    def snapshot(self, key) -> dict:
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+            counts = dict(self._counts.get(key, {"calls": 0, "errors": 0, "hedges": 0, "hedge_wins": 0}))
+        p50, p95 = percentile(samples, 50), percentile(samples, 95)
+        return {
+            "samples": len(samples),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "healthy": self.healthy(key),
+            **counts,
+        }
+
+
+class LLMRouter:
+    """
+    Routes LLM calls across providers by observed latency.
+
+    Each call goes to the healthy provider with the lowest rolling p50
+    (providers without LLM_ROUTER_MIN_SAMPLES samples keep their priority
+    order, after measured ones). If the call has not returned by the
+    provider's p95 (LLM_HEDGE_PERCENTILE), a hedged request goes to the
+    next provider and whichever answers first wins. A provider that fails
+    is skipped for the rest of the call; LLM_FAILURE_THRESHOLD failures in
+    a row take it out of rotation for LLM_FAILURE_COOLDOWN seconds, as does
+    an open circuit breaker for the provider (services.resilience).
+
+    Exposes the GeminiClient interface the views use (explain_text,
+    aexplain_text, stream_text, build_system_prompt, DEFAULT_MODEL), plus
+    MODEL_SET: every model it may answer with, for keying cached output.
+    Streams are not hedged, but fail over if no chunk has arrived yet.
+    Pass a dict as `usage` to learn which provider answered and the
+    estimated size of the prompt it was sent.
+    """
+
+    def __init__(
+        self,
+        providers: List[Provider],
+        default_model: str,
+        build_system_prompt: Callable[..., str],
+        tracker: Optional[LatencyTracker] = None,
+        hedge: bool = LLM_HEDGE_ENABLED,
+        hedge_percentile: float = LLM_HEDGE_PERCENTILE,
+        hedge_min_delay: float = LLM_HEDGE_MIN_DELAY,
+        hedge_default_delay: float = LLM_HEDGE_DEFAULT_DELAY,
+        min_samples: int = LLM_ROUTER_MIN_SAMPLES,
+    ):
+        self.providers = providers
+        self.DEFAULT_MODEL = default_model
+        self.MODEL_SET = ",".join(sorted({provider.model for provider in providers}))
+        self.build_system_prompt = build_system_prompt
+        self.tracker = tracker or LatencyTracker()
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.min_samples = min_samples
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @classmethod
+    def from_clients(cls, gemini, ai, names=None, **kwargs):
+        """Build the router over a GeminiClient (native + OpenAI-style) and an AIClient."""
+        gemini_model = gemini.DEFAULT_MODEL
+
+        def gemini_provider(name, engine, available):
+            return Provider(
+                name,
+                gemini_model,
+                explain=lambda text, conversation, language, system_prompt: gemini.explain_text(
+                    text, conversation, language, system_prompt, model=gemini_model, engine=engine
+                ),
+                aexplain=lambda text, conversation, language, system_prompt: gemini.aexplain_text(
+                    text, conversation, language, system_prompt, model=gemini_model, engine=engine
+                ),
+                stream=lambda text, conversation, language, system_prompt: gemini.stream_text(
+                    text, conversation, language, system_prompt, model=gemini_model, engine=engine
+                ),
+                prompt_tokens=lambda text, conversation, language, system_prompt: gemini.prompt_tokens(
+                    text, conversation, language, system_prompt, engine=engine
+                ),
+                available=available,
+            )
+
+        def openai_args(text, conversation, language, system_prompt):
+            # Same final prompt as the Gemini backends
+            return dict(
+                text=text,
+                conversation=conversation,
+                system_prompt=gemini.build_system_prompt(system_prompt, language),
+                model=LLM_OPENAI_MODEL,
+            )
+
+        available = {
+            "gemini-native": gemini_provider("gemini-native", "native", bool(getattr(gemini, "native", None))),
+            "gemini-openai": gemini_provider("gemini-openai", "openai", bool(getattr(gemini, "openai_style", None))),
+            "openai": Provider(
+                "openai",
+                LLM_OPENAI_MODEL,
+                explain=lambda *args: ai.explain_text(**openai_args(*args)),
+                aexplain=lambda *args: ai.aexplain_text(**openai_args(*args)),
+                stream=lambda *args: ai.stream_text(**openai_args(*args)),
+                prompt_tokens=lambda *args: ai.prompt_tokens(
+                    **{k: v for k, v in openai_args(*args).items() if k != "model"}
+                ),
+                available=bool(getattr(ai, "client", None)),
+            ),
+        }
+        providers = [available[name] for name in (names or LLM_PROVIDERS) if name in available]
+        return cls(providers, gemini_model, gemini.build_system_prompt, **kwargs)
+
+    # ----------------------------
+    # Ranking
+    # ----------------------------
+
+    def ranked(self) -> List[Provider]:
+        """Available providers, fastest healthy first."""
+        candidates = [p for p in self.providers if p.available]
+        if not candidates:
+            raise RuntimeError("No LLM provider available.")
+        healthy = [
+            p for p in candidates if self.tracker.healthy(p.key) and not resilience.is_open(p.name)
+        ] or candidates
+
+        def sort_key(indexed):
+            priority, provider = indexed
+            p50 = self.tracker.percentile(provider.key, 50, self.min_samples)
+            return (p50 is None, p50 or 0.0, priority)
+
+        return [provider for _, provider in sorted(enumerate(healthy), key=sort_key)]
+
+    def _hedge_delay(self, provider) -> float:
+        p = self.tracker.percentile(provider.key, self.hedge_percentile, self.min_samples)
+        return max(p if p is not None else self.hedge_default_delay, self.hedge_min_delay)
+
+    def _pool(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=LLM_ROUTER_THREADS, thread_name_prefix="llm-router")
+        return self._executor
+
+    # ----------------------------
+    # Calls
+    # ----------------------------
+
+    @staticmethod
+    def _report(usage, provider, args):
+        if usage is not None:
+            usage["provider"] = provider.key
+            usage["prompt_tokens"] = provider.prompt_tokens(*args) if provider.prompt_tokens else None
+
+    def _timed(self, provider, args):
+        started = time.perf_counter()
+        try:
+            result = provider.explain(*args)
+        except Exception:
+            self.tracker.record_failure(provider.key)
+            raise
+        self.tracker.record(provider.key, time.perf_counter() - started)
+        return result
+
+    async def _atimed(self, provider, args):
+        started = time.perf_counter()
+        try:
+            if provider.aexplain is not None:
+                result = await provider.aexplain(*args)
+            else:
+                result = await asyncio.to_thread(provider.explain, *args)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.tracker.record_failure(provider.key)
+            raise
+        self.tracker.record(provider.key, time.perf_counter() - started)
+        return result
+
+    def explain_text(
+        self,
+        text: str,
+        conversation: Optional[List[dict]] = None,
+        preferred_language: str = "English",
+        system_prompt: Optional[str] = None,
+        usage: Optional[dict] = None,
+        **kwargs,
+    ) -> str:
+        """Routed GeminiClient.explain_text; extra keyword arguments are ignored."""
+        args = (text, conversation or [], preferred_language, system_prompt)
+        queue = self.ranked()
+        if not self.hedge or len(queue) == 1:
+            return self._failover(queue, args, usage)
+
+        pool = self._pool()
+        primary = queue.pop(0)
+        launched = {pool.submit(self._timed, primary, args): primary}
+        done, _ = wait(launched, timeout=self._hedge_delay(primary))
+        if not done:
+            hedge = queue.pop(0)
+            logger.info(f"Hedging {primary.key} with {hedge.key}")
+            self.tracker.record_hedge(hedge.key)
+            launched[pool.submit(self._timed, hedge, args)] = hedge
+
+        pending, error = set(launched), None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if launched[future] is not primary:
+                    self.tracker.record_hedge(launched[future].key, won=True)
+                self._report(usage, launched[future], args)
+                return result
+            if not pending and queue:
+                provider = queue.pop(0)
+                future = pool.submit(self._timed, provider, args)
+                launched[future] = provider
+                pending = {future}
+        raise error
+
+    def _failover(self, queue, args, usage=None):
+        error = None
+        for provider in queue:
+            try:
+                result = self._timed(provider, args)
+            except Exception as e:
+                logger.warning(f"LLM provider {provider.key} failed: {e}")
+                error = e
+                continue
+            self._report(usage, provider, args)
+            return result
+        raise error
+
+    async def aexplain_text(
+        self,
+        text: str,
+        conversation: Optional[List[dict]] = None,
+        preferred_language: str = "English",
+        system_prompt: Optional[str] = None,
+        usage: Optional[dict] = None,
+        **kwargs,
+    ) -> str:
+        """Async variant of explain_text; the losing request is cancelled."""
+        args = (text, conversation or [], preferred_language, system_prompt)
+        queue = self.ranked()
+        primary = queue.pop(0)
+        launched = {asyncio.ensure_future(self._atimed(primary, args)): primary}
+        try:
+            if self.hedge and queue:
+                done, _ = await asyncio.wait(launched, timeout=self._hedge_delay(primary))
+                if not done:
+                    hedge = queue.pop(0)
+                    logger.info(f"Hedging {primary.key} with {hedge.key}")
+                    self.tracker.record_hedge(hedge.key)
+                    launched[asyncio.ensure_future(self._atimed(hedge, args))] = hedge
+
+            pending, error = set(launched), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if launched[task] is not primary:
+                        self.tracker.record_hedge(launched[task].key, won=True)
+                    self._report(usage, launched[task], args)
+                    return task.result()
+                if not pending and queue:
+                    provider = queue.pop(0)
+                    task = asyncio.ensure_future(self._atimed(provider, args))
+                    launched[task] = provider
+                    pending = {task}
+            raise error
+        finally:
+            for task in launched:
+                task.cancel()
+
+    def stream_text(
+        self,
+        text: str,
+        conversation: Optional[List[dict]] = None,
+        preferred_language: str = "English",
+        system_prompt: Optional[str] = None,
+        usage: Optional[dict] = None,
+        **kwargs,
+    ) -> Iterator[str]:
+        """Routed GeminiClient.stream_text (no hedging)."""
+        args = (text, conversation or [], preferred_language, system_prompt)
+        return self._stream(self.ranked(), args, usage)
+
+    def _stream(self, queue, args, usage=None):
+        error = None
+        for provider in queue:
+            started = time.perf_counter()
+            try:
+                chunks = iter(provider.stream(*args))
+                first = next(chunks)
+            except StopIteration:
+                self.tracker.record(provider.key, time.perf_counter() - started)
+                self._report(usage, provider, args)
+                return
+            except Exception as e:
+                logger.warning(f"LLM provider {provider.key} stream failed: {e}")
+                self.tracker.record_failure(provider.key)
+                error = e
+                continue
+            self._report(usage, provider, args)
+            yield first
+            yield from chunks
+            self.tracker.record(provider.key, time.perf_counter() - started)
+            return
+        raise error
+
+    def stats(self) -> dict:
+        """Per-provider latency percentiles, health and hedge counts."""
+        return {
+            provider.key: {"available": provider.available, **self.tracker.snapshot(provider.key)}
+            for provider in self.providers
+        }
@@ -1,24 +1,132 @@
 import os
+import math
+import time
+import asyncio
 import logging
+import tempfile
+import threading
+from collections import deque
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError, InvalidRegionError, ClientError
 
+from .resilience import dependency, percentile, status_code
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Objects up to this size are buffered in memory; larger ones spill to disk.
+STREAM_MAX_MEMORY = int(os.getenv("S3_STREAM_MAX_MEMORY", str(16 * 1024 * 1024)))
+S3_CONNECT_TIMEOUT = float(os.getenv("S3_CONNECT_TIMEOUT", "5"))
+S3_READ_TIMEOUT = float(os.getenv("S3_READ_TIMEOUT", "60"))
+
+# Transfers: objects above the threshold move in parts of the chunk size,
+# downloads as parallel ranged GETs and uploads as multipart uploads.
+MB = 1024 * 1024
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(8 * MB)))
+S3_MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE", str(8 * MB)))
+S3_TRANSFER_CONCURRENCY = int(os.getenv("S3_TRANSFER_CONCURRENCY", "8"))
+# Objects from this size on use the "large" profile
+S3_LARGE_OBJECT_BYTES = int(os.getenv("S3_LARGE_OBJECT_BYTES", str(64 * MB)))
+
+
+def transfer_profiles(max_concurrency: int) -> dict:
+    """
+    TransferConfig per workload; concurrency never exceeds the connection pool.
+
+    - default: parallel parts above S3_MULTIPART_THRESHOLD
+    - large: bigger parts and every pooled connection, for large scans
+    - serial: one thread, for callers that already run many transfers at
+      once (e.g. batch processing) and would otherwise oversubscribe the pool
+    """
+    concurrency = min(S3_TRANSFER_CONCURRENCY, max_concurrency)
+    return {
+        "default": TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+            max_concurrency=concurrency,
+        ),
+        "large": TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=2 * S3_MULTIPART_CHUNKSIZE,
+            max_concurrency=max_concurrency,
+        ),
+        "serial": TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+            use_threads=False,
+        ),
+    }
+
+
+class TransferStats:
+    """Rolling latency and cumulative throughput per transfer operation."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._ops = {}
+
+    def record(self, op: str, nbytes: int, seconds: float):
+        with self._lock:
+            stats = self._ops.setdefault(
+                op, {"count": 0, "bytes": 0, "seconds": 0.0, "samples": deque(maxlen=self.window)}
+            )
+            stats["count"] += 1
+            stats["bytes"] += nbytes
+            stats["seconds"] += seconds
+            stats["samples"].append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            ops = {op: dict(stats, samples=list(stats["samples"])) for op, stats in self._ops.items()}
+        snapshot = {}
+        for op, stats in ops.items():
+            p50, p95 = percentile(stats["samples"], 50), percentile(stats["samples"], 95)
+            snapshot[op] = {
+                "count": stats["count"],
+                "bytes": stats["bytes"],
+                "mb_per_s": round(stats["bytes"] / MB / stats["seconds"], 2) if stats["seconds"] else None,
+                "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
+        return snapshot
+
 
 class S3Client:
     """
     Lightweight S3 client with runtime validation.
     Can be safely instantiated in DEV even without credentials.
+
+    The a-prefixed methods are awaitable for ASGI views. boto3 has no
+    native async API, so they run the blocking call in a worker thread
+    (boto3 clients are thread-safe) and keep the event loop free.
+
+    Every call goes through the "s3" circuit breaker (services.resilience).
+    All of them are idempotent reads or whole-object writes, so transient
+    failures are retried there with jittered backoff instead of by botocore.
+    The breaker's latency-derived timeout is applied as the read timeout
+    (see _client_for).
+
+    Whole-object transfers take a TransferConfig profile (see
+    transfer_profiles); without one, the profile follows the object size
+    when the caller knows it. get_range/read_prefix fetch part of an
+    object. Bytes and timings of every transfer are kept in `stats`.
     """
 
-    def __init__(self):
+    def __init__(self, max_pool_connections: int = 10):
+        self.max_pool_connections = max_pool_connections
         self.bucket = os.getenv("S3_BUCKET")
         self.access_key = os.getenv("AWS_ACCESS_KEY_ID")
         self.secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
         self.region = os.getenv("AWS_REGION")
         self.client = None
+        self._timeout_clients = {}
+        self._timeout_clients_lock = threading.Lock()
+        self.transfer_profiles = transfer_profiles(max_pool_connections)
+        self.stats = TransferStats()
+        self.gate = dependency("s3", permanent=(NoCredentialsError, PartialCredentialsError))
 
         if not all([self.bucket, self.access_key, self.secret_key, self.region]):
             logger.warning(
@@ -28,27 +136,80 @@ class S3Client:
         else:
             self._init_client()
 
+    def _make_client(self, read_timeout):
+        return boto3.client(
+            "s3",
+            aws_access_key_id=self.access_key,
+            aws_secret_access_key=self.secret_key,
+            region_name=self.region,
+            config=Config(
+                max_pool_connections=self.max_pool_connections,
+                tcp_keepalive=True,
+                connect_timeout=S3_CONNECT_TIMEOUT,
+                read_timeout=read_timeout,
+                retries={"mode": "standard", "max_attempts": 1},
+            ),
+        )
+
     def _init_client(self):
         """Initialize boto3 client."""
         try:
-            self.client = boto3.client(
-                "s3",
-                aws_access_key_id=self.access_key,
-                aws_secret_access_key=self.secret_key,
-                region_name=self.region
-            )
+            self.client = self._make_client(S3_READ_TIMEOUT)
+            with self._timeout_clients_lock:
+                self._timeout_clients.clear()
             logger.info(f"S3 client initialized for bucket: {self.bucket}, region: {self.region}")
         except Exception as e:
             logger.error(f"Failed to initialize S3 client: {e}")
             raise
 
-    def download_file(self, key: str, local_path: str):
-        """Download a file from S3 to a local path."""
+    def _client_for(self, timeout: float):
+        """
+        The client for a call under the breaker's adaptive `timeout`.
+
+        botocore only takes timeouts per client, so one extra client (with
+        its own connection pool) is kept per read-timeout step: `timeout`
+        rounded up to a power of two seconds. Steps at or above
+        S3_READ_TIMEOUT use the main client. The read timeout bounds each
+        wait for data, so large transfers still run as long as bytes flow.
+        """
+        step = 2 ** math.ceil(math.log2(max(timeout, 1)))
+        if step >= S3_READ_TIMEOUT:
+            return self.client
+        with self._timeout_clients_lock:
+            client = self._timeout_clients.get(step)
+            if client is None:
+                client = self._timeout_clients[step] = self._make_client(step)
+        return client
+
+    def transfer_config(self, profile: str = None, size: int = None) -> TransferConfig:
+        """The named profile, or "large"/"default" by object size when it is known."""
+        if profile is None:
+            profile = "large" if size is not None and size >= S3_LARGE_OBJECT_BYTES else "default"
+        return self.transfer_profiles[profile]
+
+    def _timed(self, op, call, nbytes):
+        started = time.perf_counter()
+        result = call()
+        self.stats.record(op, nbytes(result), time.perf_counter() - started)
+        return result
+
+    def download_file(self, key: str, local_path: str, profile: str = None, size: int = None):
+        """Download a file from S3 to a local path (profile: see transfer_config)."""
         if not self.client:
             self._init_client()
+        config = self.transfer_config(profile, size)
         try:
             logger.info(f"Downloading S3 file: {key} -> {local_path}")
-            self.client.download_file(self.bucket, key, local_path)
+            self._timed(
+                "download",
+                lambda: self.gate.call(
+                    lambda timeout: self._client_for(timeout).download_file(
+                        self.bucket, key, local_path, Config=config
+                    ),
+                    idempotent=True,
+                ),
+                lambda _: os.path.getsize(local_path),
+            )
             logger.info(f"Download successful: {local_path}")
         except (NoCredentialsError, PartialCredentialsError) as cred_err:
             logger.error(f"AWS credentials error: {cred_err}")
@@ -60,13 +221,100 @@ class S3Client:
             logger.error(f"Unexpected S3 download error: {e}")
             raise
 
-    def upload_file(self, local_path: str, key: str):
-        """Upload a local file to S3."""
+    def open_stream(self, key: str, max_memory: int = None, profile: str = None, size: int = None):
+        """
+        Download an S3 object into a spooled, seekable buffer.
+
+        The buffer lives in memory up to `max_memory` bytes and only spills
+        to a temporary file beyond that. Use it as a context manager so the
+        buffer is always released, even when parsing fails. Objects above
+        the multipart threshold arrive as parallel ranged GETs; pass the
+        object `size` (from head_object) to pick the profile by size.
+        """
+        if not self.client:
+            self._init_client()
+        buffer = tempfile.SpooledTemporaryFile(max_size=max_memory or STREAM_MAX_MEMORY)
+        config = self.transfer_config(profile, size)
+        try:
+            logger.info(f"Streaming S3 file: {key}")
+            self._timed(
+                "download",
+                lambda: self.gate.call(
+                    lambda timeout: self._download_into(self._client_for(timeout), key, buffer, config),
+                    idempotent=True,
+                ),
+                lambda _: buffer.tell(),
+            )
+            buffer.seek(0)
+            return buffer
+        except (NoCredentialsError, PartialCredentialsError) as cred_err:
+            buffer.close()
+            logger.error(f"AWS credentials error: {cred_err}")
+            raise
+        except ClientError as client_err:
+            buffer.close()
+            logger.error(f"S3 client error: {client_err}")
+            raise
+        except Exception as e:
+            buffer.close()
+            logger.error(f"Unexpected S3 stream error: {e}")
+            raise
+
+    def _download_into(self, client, key, buffer, config):
+        # A retry starts from an empty buffer
+        buffer.seek(0)
+        buffer.truncate()
+        client.download_fileobj(self.bucket, key, buffer, Config=config)
+        buffer.seek(0, os.SEEK_END)
+
+    def head_object(self, key: str) -> dict:
+        """
+        Fetch object metadata without downloading the body.
+
+        Returns:
+            {"etag": str, "size": int, "last_modified": datetime, "content_type": str}
+        """
         if not self.client:
             self._init_client()
+        try:
+            response = self.gate.call(
+                lambda timeout: self._client_for(timeout).head_object(Bucket=self.bucket, Key=key),
+                idempotent=True,
+            )
+            return {
+                "etag": response["ETag"].strip('"'),
+                "size": response.get("ContentLength", 0),
+                "last_modified": response.get("LastModified"),
+                "content_type": response.get("ContentType", ""),
+            }
+        except (NoCredentialsError, PartialCredentialsError) as cred_err:
+            logger.error(f"AWS credentials error: {cred_err}")
+            raise
+        except ClientError as client_err:
+            logger.error(f"S3 client error: {client_err}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected S3 head error: {e}")
+            raise
+
+    def upload_file(self, local_path: str, key: str, profile: str = None):
+        """Upload a local file to S3, as a multipart upload above the threshold."""
+        if not self.client:
+            self._init_client()
+        size = os.path.getsize(local_path)
+        config = self.transfer_config(profile, size)
         try:
             logger.info(f"Uploading {local_path} -> S3:{key}")
-            self.client.upload_file(local_path, self.bucket, key)
+            self._timed(
+                "upload",
+                lambda: self.gate.call(
+                    lambda timeout: self._client_for(timeout).upload_file(
+                        local_path, self.bucket, key, Config=config
+                    ),
+                    idempotent=True,
+                ),
+                lambda _: size,
+            )
             logger.info("Upload successful")
         except (NoCredentialsError, PartialCredentialsError) as cred_err:
             logger.error(f"AWS credentials error: {cred_err}")
@@ -77,3 +325,114 @@ class S3Client:
         except Exception as e:
             logger.error(f"Unexpected S3 upload error: {e}")
             raise
+
+    def put_bytes(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        """Upload an in-memory payload to S3."""
+        if not self.client:
+            self._init_client()
+        try:
+            self._timed(
+                "put",
+                lambda: self.gate.call(
+                    lambda timeout: self._client_for(timeout).put_object(
+                        Bucket=self.bucket, Key=key, Body=data, ContentType=content_type
+                    ),
+                    idempotent=True,
+                ),
+                lambda _: len(data),
+            )
+        except (NoCredentialsError, PartialCredentialsError) as cred_err:
+            logger.error(f"AWS credentials error: {cred_err}")
+            raise
+        except ClientError as client_err:
+            logger.error(f"S3 client error: {client_err}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected S3 upload error: {e}")
+            raise
+
+    def get_bytes(self, key: str) -> bytes:
+        """Download a whole (small) object into memory."""
+        if not self.client:
+            self._init_client()
+        try:
+            return self._timed(
+                "get",
+                lambda: self.gate.call(
+                    lambda timeout: self._client_for(timeout).get_object(Bucket=self.bucket, Key=key)["Body"].read(),
+                    idempotent=True,
+                ),
+                len,
+            )
+        except (NoCredentialsError, PartialCredentialsError) as cred_err:
+            logger.error(f"AWS credentials error: {cred_err}")
+            raise
+        except ClientError as client_err:
+            logger.error(f"S3 client error: {client_err}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected S3 download error: {e}")
+            raise
+
+    def get_range(self, key: str, start: int, end: int = None) -> bytes:
+        """
+        Download bytes `start`..`end` (inclusive; to the end of the object
+        when `end` is None) with a single ranged GET. A range that starts
+        past the end of the object (e.g. any range of an empty object)
+        returns b"".
+        """
+        if start < 0 or (end is not None and end < start):
+            raise ValueError(f"Invalid byte range {start}-{end}")
+        if not self.client:
+            self._init_client()
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        try:
+            return self._timed(
+                "range",
+                lambda: self.gate.call(
+                    lambda timeout: self._client_for(timeout).get_object(
+                        Bucket=self.bucket, Key=key, Range=byte_range
+                    )["Body"].read(),
+                    idempotent=True,
+                ),
+                len,
+            )
+        except (NoCredentialsError, PartialCredentialsError) as cred_err:
+            logger.error(f"AWS credentials error: {cred_err}")
+            raise
+        except ClientError as client_err:
+            if status_code(client_err) == 416:  # Range Not Satisfiable
+                return b""
+            logger.error(f"S3 client error: {client_err}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected S3 range error: {e}")
+            raise
+
+    def read_prefix(self, key: str, nbytes: int) -> bytes:
+        """The first `nbytes` of an object (e.g. to sniff its file type); fewer if it is shorter."""
+        if nbytes <= 0:
+            raise ValueError("nbytes must be positive")
+        return self.get_range(key, 0, nbytes - 1)
+
+    # ----------------------------
+    # Async variants
+    # ----------------------------
+
+    async def ahead_object(self, key: str) -> dict:
+        return await asyncio.to_thread(self.head_object, key)
+
+    async def aopen_stream(self, key: str, max_memory: int = None, profile: str = None, size: int = None):
+        return await asyncio.to_thread(self.open_stream, key, max_memory, profile, size)
+
+    async def aget_range(self, key: str, start: int, end: int = None) -> bytes:
+        return await asyncio.to_thread(self.get_range, key, start, end)
+
+    async def aread_prefix(self, key: str, nbytes: int) -> bytes:
+        return await asyncio.to_thread(self.read_prefix, key, nbytes)
+
+    async def aget_bytes(self, key: str) -> bytes:
+        return await asyncio.to_thread(self.get_bytes, key)
+
+    async def aput_bytes(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        return await asyncio.to_thread(self.put_bytes, key, data, content_type)
@@ -0,0 +1,215 @@
+import os
+import re
+import zlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+EMBED_DIM = 512
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "True") == "True"
+# Minimum similarity for a candidate; a hit also needs an equal question_signature
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.8"))
+ANSWER_CACHE_MAX_PER_DOCUMENT = int(os.getenv("ANSWER_CACHE_MAX_PER_DOCUMENT", "64"))
+ANSWER_CACHE_MAX_DOCUMENTS = int(os.getenv("ANSWER_CACHE_MAX_DOCUMENTS", "2048"))
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+_IRREGULAR_NEGATIONS = re.compile(r"\b(won['\u2019]?t|can['\u2019]?t)\b")
+_NEGATIONS = re.compile(
+    r"\b(\w+)n['\u2019]t\b|\b(do|does|did|is|are|was|were|have|has|had|should|would|could|must|need)nt\b"
+)
+_CONTRACTIONS = re.compile(r"['\u2019](s|re|ve|ll|d|m)\b")
+_WH_CONTRACTIONS = re.compile(r"\b(what|where|when|who|how|why)s\b")
+
+# Words that do not change what a question asks. Negations, wh-words and
+# everything else are kept, so "do I pay" / "do I not pay" / "who do I pay"
+# never share an answer.
+SIGNATURE_STOPWORDS = frozenset(
+    "a an the i me my we our us you your it its this that these those is are was were be been am "
+    "do does did to of for in on at by with about please".split()
+)
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+
+def question_signature(text: str) -> frozenset:
+    """
+    The content words of a question, with contractions expanded
+    ("don't" -> "do not", "what's" -> "what"). Two questions can only share
+    an answer when their signatures are equal.
+    """
+    return frozenset(word for word in _expand(text).split() if word not in SIGNATURE_STOPWORDS)
+
+
+def _expand(text):
+    """normalize_question with contractions expanded."""
+    text = text.lower()
+    text = _IRREGULAR_NEGATIONS.sub(lambda m: "will not" if m.group(1).startswith("w") else "can not", text)
+    text = _NEGATIONS.sub(lambda m: f"{m.group(1) or m.group(2)} not", text)
+    return normalize_question(_WH_CONTRACTIONS.sub(r"\1", _CONTRACTIONS.sub("", text)))
+
+
+def embed_question(text: str, dim: int = EMBED_DIM) -> np.ndarray:
+    """
+    Cheap local embedding: signed feature hashing of words and character
+    trigrams, L2-normalised so a dot product is cosine similarity. Catches
+    rephrasings like "what is the deadline" / "what's the deadline?"
+    without a network round trip.
+    """
+    normalized = _expand(text)
+    vector = np.zeros(dim, dtype=np.float32)
+    padded = f" {normalized} "
+    features = normalized.split() + [padded[i:i + 3] for i in range(len(padded) - 2)]
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class _DocumentIndex:
+    """Vectors and answers for one document; rows grow by doubling."""
+
+    def __init__(self, dim, capacity=4):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.answers = []
+        self.signatures = []
+        self.latencies = np.zeros(capacity, dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.size = 0
+
+    def append_slot(self):
+        if self.size == len(self.vectors):
+            grow = len(self.vectors)
+            self.vectors = np.vstack([self.vectors, np.zeros_like(self.vectors[:grow])])
+            self.latencies = np.concatenate([self.latencies, np.zeros(grow, dtype=np.float32)])
+            self.last_used = np.concatenate([self.last_used, np.zeros(grow, dtype=np.int64)])
+        self.answers.append(None)
+        self.signatures.append(None)
+        self.size += 1
+        return self.size - 1
+
+
+class SemanticAnswerCache:
+    """
+    Per-document cache of LLM answers looked up by question similarity.
+
+    Vector similarity only ranks candidates: "do I need to pay" and "do I
+    not need to pay" embed almost identically, so an answer is served
+    only when the question's content words (question_signature) also
+    match exactly.
+
+    Each document gets its own small vector index, so a question can only
+    ever match answers about the same document. Documents are evicted LRU
+    beyond `max_documents`; within a document the least recently used
+    answer is replaced beyond `max_per_document`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        max_per_document: int = ANSWER_CACHE_MAX_PER_DOCUMENT,
+        max_documents: int = ANSWER_CACHE_MAX_DOCUMENTS,
+        dim: int = EMBED_DIM,
+        enabled: bool = ANSWER_CACHE_ENABLED,
+    ):
+        self.threshold = threshold
+        self.max_per_document = max_per_document
+        self.max_documents = max_documents
+        self.dim = dim
+        self.enabled = enabled
+        self._documents = OrderedDict()
+        self._clock = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._saved_latency = 0.0
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def lookup(self, document_key: str, question: str) -> Optional[str]:
+        """Return a cached answer for a near-identical question, or None."""
+        if not self.enabled:
+            return None
+        query = embed_question(question, self.dim)
+        signature = question_signature(question)
+        with self._lock:
+            index = self._documents.get(document_key)
+            if index is None or index.size == 0:
+                self._misses += 1
+                return None
+            self._documents.move_to_end(document_key)
+
+            scores = index.vectors[:index.size] @ query
+            best = next(
+                (
+                    int(slot)
+                    for slot in np.argsort(-scores)
+                    if scores[slot] >= self.threshold and index.signatures[slot] == signature
+                ),
+                None,
+            )
+            if best is None:
+                self._misses += 1
+                return None
+
+            index.last_used[best] = self._tick()
+            self._hits += 1
+            self._saved_latency += float(index.latencies[best])
+            return index.answers[best]
+
+    def store(self, document_key: str, question: str, answer: str, latency: float = 0.0):
+        """Remember `answer`; `latency` is what a future hit will save."""
+        if not self.enabled:
+            return
+        vector = embed_question(question, self.dim)
+        with self._lock:
+            index = self._documents.get(document_key)
+            if index is None:
+                index = _DocumentIndex(self.dim)
+                self._documents[document_key] = index
+                while len(self._documents) > self.max_documents:
+                    self._documents.popitem(last=False)
+            self._documents.move_to_end(document_key)
+
+            if index.size < self.max_per_document:
+                slot = index.append_slot()
+            else:
+                slot = int(np.argmin(index.last_used[:index.size]))
+            index.vectors[slot] = vector
+            index.answers[slot] = answer
+            index.signatures[slot] = question_signature(question)
+            index.latencies[slot] = latency
+            index.last_used[slot] = self._tick()
+
+    def invalidate(self, document_key: str):
+        with self._lock:
+            self._documents.pop(document_key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "saved_latency_seconds": round(self._saved_latency, 3),
+                "documents": len(self._documents),
+                "entries": sum(index.size for index in self._documents.values()),
+            }
+
+
+answer_cache = SemanticAnswerCache()
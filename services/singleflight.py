@@ -0,0 +1,208 @@
+import os
+import asyncio
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Optional imports
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Directory for cross-process lock files (empty: coalesce within the process only)
+SINGLEFLIGHT_LOCK_DIR = os.getenv("SINGLEFLIGHT_LOCK_DIR", "")
+
+# Result of a flight whose leader was cancelled or interrupted; its callers retry
+_ABANDONED = object()
+
+
+def make_key(operation: str, *parts) -> str:
+    """Hash an operation name and its inputs (text, model, prompt, ...) into a flight key."""
+    raw = "\x1f".join([operation, *(str(part) for part in parts)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight work.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive with the same key while it is running wait for it and get the
+    same result, or the same exception. A leader that is cancelled (an
+    ASGI client disconnecting) or interrupted rather than failing passes
+    nothing on: its callers start over and one of them leads instead.
+    Nothing is kept once the call finishes, so this is not a cache: it
+    only stops a double-click or a client retry from paying for the same
+    LLM call twice.
+
+    With `lock_dir` (SINGLEFLIGHT_LOCK_DIR) and a `recheck` callable, the
+    leader also takes an exclusive file lock for the key, so leaders in
+    other worker processes on the same host queue behind it. Under the
+    lock `recheck()` is consulted first: it should look the result up in
+    whatever shared store the work writes to (e.g. the document cache) and
+    return None on a miss. Without `recheck` there is nothing to share
+    across processes and no file lock is taken.
+    """
+
+    def __init__(self, lock_dir: str = SINGLEFLIGHT_LOCK_DIR):
+        self.lock_dir = lock_dir if fcntl is not None else ""
+        if lock_dir and fcntl is None:
+            logger.warning("fcntl unavailable; single-flight coalesces within the process only")
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"leaders": 0, "coalesced": 0, "rechecked": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    # ----------------------------
+    # Threads (WSGI)
+    # ----------------------------
+
+    def _join(self, key):
+        """Return (future, is_leader) for `key`."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                # Running futures cannot be cancelled by a waiter going away
+                future.set_running_or_notify_cancel()
+            self._stats["leaders" if leader else "coalesced"] += 1
+        return future, leader
+
+    def _land(self, key, future, result=None, error=None):
+        """End the flight, then hand its outcome to the waiting callers."""
+        with self._lock:
+            del self._calls[key]
+        if error is None:
+            future.set_result(result)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            # CancelledError, KeyboardInterrupt, ...: the work did not fail, so the callers retry it
+            future.set_result(_ABANDONED)
+
+    def do(self, key: str, fn: Callable[[], object], recheck: Optional[Callable[[], object]] = None):
+        """Run `fn()` once for all concurrent callers with `key`."""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            result = future.result()
+            if result is not _ABANDONED:
+                return result
+
+        try:
+            result = self._run(key, fn, recheck)
+        except BaseException as e:
+            self._land(key, future, error=e)
+            raise
+        self._land(key, future, result)
+        return result
+
+    def _run(self, key, fn, recheck):
+        if not (self.lock_dir and recheck):
+            return fn()
+        with self._file_lock(key):
+            result = recheck()
+            if result is not None:
+                self._count("rechecked")
+                return result
+            return fn()
+
+    # ----------------------------
+    # asyncio (ASGI)
+    # ----------------------------
+
+    async def ado(
+        self,
+        key: str,
+        afn: Callable[[], Awaitable],
+        recheck: Optional[Callable[[], Awaitable]] = None,
+    ):
+        """
+        Async variant of do: `afn` and `recheck` return awaitables. Shares
+        flights with `do`, so sync and async callers (and callers on other
+        event loops) coalesce with each other.
+        """
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                break
+            result = await asyncio.wrap_future(future)
+            if result is not _ABANDONED:
+                return result
+
+        try:
+            result = await self._arun(key, afn, recheck)
+        except BaseException as e:
+            self._land(key, future, error=e)
+            raise
+        self._land(key, future, result)
+        return result
+
+    async def _arun(self, key, afn, recheck):
+        if not (self.lock_dir and recheck):
+            return await afn()
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self._acquire, key))
+        try:
+            handle = await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # Release the lock once the waiting thread gets it
+            acquiring.add_done_callback(lambda f: f.exception() is None and self._release(f.result()))
+            raise
+        try:
+            result = await recheck()
+            if result is not None:
+                self._count("rechecked")
+                return result
+            return await afn()
+        finally:
+            self._release(handle)
+
+    # ----------------------------
+    # Cross-process lock
+    # ----------------------------
+
+    def _acquire(self, key):
+        os.makedirs(self.lock_dir, exist_ok=True)
+        handle = open(os.path.join(self.lock_dir, f"{make_key('lock', key)[:32]}.lock"), "a")
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            handle.close()
+            raise
+        return handle
+
+    @staticmethod
+    def _release(handle):
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        finally:
+            handle.close()
+
+    @contextmanager
+    def _file_lock(self, key):
+        handle = self._acquire(key)
+        try:
+            yield
+        finally:
+            self._release(handle)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+
+inflight = SingleFlight()
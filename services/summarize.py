@@ -0,0 +1,112 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+from .tokens import chunk_text, context_tokens, estimate_tokens
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+SUMMARY_SINGLE_SHOT_TOKENS = int(os.getenv("SUMMARY_SINGLE_SHOT_TOKENS", "12000"))
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "6000"))
+SUMMARY_MAX_WORKERS = int(os.getenv("SUMMARY_MAX_WORKERS", "4"))
+
+MAP_PROMPT = (
+    "You are reading one part of a longer official document. "
+    "Extract only what matters to the recipient: who sent it, key facts, "
+    "dates and deadlines, amounts, decisions, and any actions required. "
+    "Write short bullet points. Do not add commentary."
+)
+
+
+class MapReduceSummarizer:
+    """
+    Summarize documents of any length with a fixed-size prompt per call.
+
+    Short documents go to the model in one call. Longer ones are split
+    into token-bounded chunks whose notes are extracted concurrently (map)
+    and then explained together in one final call (reduce).
+
+    Args:
+        explain: callable(text, system_prompt=None) -> str, e.g. a bound
+            GeminiClient.explain_text
+        model: Optional model name; caps single-shot prompts at half its context
+        aexplain: Optional async counterpart of `explain` (e.g.
+            GeminiClient.aexplain_text) used by acondense/asummarize
+    """
+
+    def __init__(
+        self,
+        explain: Callable[..., str],
+        single_shot_tokens: int = SUMMARY_SINGLE_SHOT_TOKENS,
+        chunk_tokens: int = SUMMARY_CHUNK_TOKENS,
+        max_workers: int = SUMMARY_MAX_WORKERS,
+        model: Optional[str] = None,
+        aexplain: Optional[Callable[..., Awaitable[str]]] = None,
+    ):
+        if model:
+            single_shot_tokens = min(single_shot_tokens, context_tokens(model) // 2)
+            chunk_tokens = min(chunk_tokens, single_shot_tokens)
+        self.explain = explain
+        self.aexplain = aexplain
+        self.single_shot_tokens = single_shot_tokens
+        self.chunk_tokens = chunk_tokens
+        self.max_workers = max_workers
+
+    @property
+    def version(self) -> str:
+        """Identifies settings that change the output (for cache keys)."""
+        return f"mr:{self.single_shot_tokens}:{self.chunk_tokens}"
+
+    def _map_inputs(self, text):
+        chunks = chunk_text(text, self.chunk_tokens)
+        logger.info(f"Map-reduce: {estimate_tokens(text)} tokens in {len(chunks)} chunks")
+        return [f"Part {number} of {len(chunks)}:\n{chunk}" for number, chunk in enumerate(chunks, start=1)]
+
+    @staticmethod
+    def _combine(notes):
+        return "\n\n".join(
+            f"Notes on part {number} of {len(notes)}:\n{note}" for number, note in enumerate(notes, start=1)
+        )
+
+    def condense(self, text: str) -> str:
+        """
+        Return the input for the final call: `text` itself when it fits a
+        single shot, otherwise the ordered notes from the map phase.
+        """
+        while estimate_tokens(text) > self.single_shot_tokens:
+            parts = self._map_inputs(text)
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(parts))) as pool:
+                notes = list(pool.map(lambda part: self.explain(part, system_prompt=MAP_PROMPT), parts))
+
+            condensed = self._combine(notes)
+            if estimate_tokens(condensed) >= estimate_tokens(text):
+                break  # notes did not shrink; avoid looping forever
+            text = condensed
+        return text
+
+    def summarize(self, text: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        return self.explain(self.condense(text), system_prompt=system_prompt, **kwargs)
+
+    async def acondense(self, text: str) -> str:
+        """condense() with `aexplain`; at most max_workers map calls in flight."""
+        while estimate_tokens(text) > self.single_shot_tokens:
+            parts = self._map_inputs(text)
+            limit = asyncio.Semaphore(self.max_workers)
+
+            async def summarize_part(part):
+                async with limit:
+                    return await self.aexplain(part, system_prompt=MAP_PROMPT)
+
+            notes = await asyncio.gather(*(summarize_part(part) for part in parts))
+
+            condensed = self._combine(notes)
+            if estimate_tokens(condensed) >= estimate_tokens(text):
+                break
+            text = condensed
+        return text
+
+    async def asummarize(self, text: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        return await self.aexplain(await self.acondense(text), system_prompt=system_prompt, **kwargs)
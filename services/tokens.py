@@ -0,0 +1,78 @@
+import re
+import math
+from typing import List
+
+# Local token estimator. English prose averages ~4 characters per token
+# for both Gemini and OpenAI tokenizers; good enough for budgeting.
+CHARS_PER_TOKEN = 4
+
+# Usable input context per model (tokens).
+MODEL_CONTEXT_TOKENS = {
+    "gemini-2.5-flash": 1_048_576,
+    "gemini-2.5-pro": 1_048_576,
+    "gpt-4o-mini": 128_000,
+    "gpt-4o": 128_000,
+}
+DEFAULT_CONTEXT_TOKENS = 32_000
+
+_PARAGRAPHS = re.compile(r"\n\s*\n|\f")
+_SENTENCES = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def context_tokens(model: str) -> int:
+    return MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+
+
+def _split_oversized(piece: str, max_tokens: int) -> List[str]:
+    """Split a single paragraph on sentences, then hard-wrap if needed."""
+    parts = []
+    for sentence in _SENTENCES.split(piece):
+        if estimate_tokens(sentence) <= max_tokens:
+            parts.append(sentence)
+            continue
+        step = max_tokens * CHARS_PER_TOKEN
+        parts.extend(sentence[i:i + step] for i in range(0, len(sentence), step))
+    return parts
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Split `text` into ordered chunks of at most `max_tokens` estimated
+    tokens, breaking on paragraph and page boundaries where possible.
+    """
+    pieces = []
+    for paragraph in _PARAGRAPHS.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) > max_tokens:
+            pieces.extend(_split_oversized(paragraph, max_tokens))
+        else:
+            pieces.append(paragraph)
+
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        tokens = estimate_tokens(piece) + 1  # +1 for the joining blank line
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def estimate_message_tokens(message: dict) -> int:
+    """Tokens for one chat message, including ~4 tokens of role framing."""
+    return estimate_tokens(message.get("content", "")) + 4
+
+
+def estimate_messages_tokens(messages: List[dict]) -> int:
+    return sum(estimate_message_tokens(message) for message in messages)
@@ -0,0 +1,52 @@
+# tests/accounts/test_query_counts.py
+#
+# Pins the number of SQL queries per accounts endpoint; see
+# tests/doc_x/test_query_counts.py.
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+
+class AccountsQueryCountTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="queryuser", email="q@example.com", password="testpass123")
+
+    def login(self):
+        self.client.login(username="queryuser", password="testpass123")
+
+    def test_csrf(self):
+        with self.assertNumQueries(0):
+            self.client.get("/api/accounts/csrf/")
+
+    def test_register(self):
+        data = {"username": "newuser", "email": "new@example.com", "password": "newpass123", "password2": "newpass123"}
+        with self.assertNumQueries(2):  # unique username check, insert
+            response = self.client.post("/api/accounts/register/", data, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_login(self):
+        # user, new session (exists check + insert), last_login, session save after cycle_key
+        with self.assertNumQueries(9):
+            response = self.client.post(
+                "/api/accounts/login/", {"username": "queryuser", "password": "testpass123"}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_logout(self):
+        self.login()
+        with self.assertNumQueries(4):
+            self.client.post("/api/accounts/logout/")
+
+    def test_me(self):
+        self.login()
+        with self.assertNumQueries(2):
+            self.client.get("/api/accounts/me/")
+
+    def test_session(self):
+        self.login()
+        with self.assertNumQueries(2):
+            self.client.get("/api/accounts/session/")
@@ -0,0 +1,63 @@
+# tests/doc_x/test_admin.py
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.doc_x.models import Conversation, Document, DocumentInteraction, UserQuestionLimit
+
+User = get_user_model()
+
+
+class DocXAdminTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", email="admin@example.com", password="testpass123")
+        self.client.login(username="admin", password="testpass123")
+
+    def make_documents(self, count):
+        for n in range(count):
+            document = Document.objects.create(s3_key=f"uploads/{n:04d}.pdf", content="x" * 5000, summary="y" * 2000)
+            Conversation.objects.create(document=document, role="user", message="m" * 500)
+            UserQuestionLimit.objects.create(user=self.admin, document=document, count=1)
+            DocumentInteraction.objects.create(user=self.admin, document=document, questions_asked=1)
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return context.captured_queries
+
+    def test_changelists_do_not_grow_with_rows(self):
+        """Query count is the same for 2 and 20 rows (no per-row COUNT or FK fetch)"""
+        urls = [
+            "/admin/doc_x/document/",
+            "/admin/doc_x/conversation/",
+            "/admin/doc_x/userquestionlimit/",
+            "/admin/doc_x/documentinteraction/",
+        ]
+        self.make_documents(2)
+        few = {url: len(self.changelist_queries(url)) for url in urls}
+        self.make_documents(18)
+        many = {url: len(self.changelist_queries(url)) for url in urls}
+        self.assertEqual(few, many)
+
+    def test_document_changelist_skips_large_columns(self):
+        self.make_documents(3)
+        queries = self.changelist_queries("/admin/doc_x/document/")
+        listing = [q["sql"] for q in queries if '"conversation_total"' in q["sql"]]
+        self.assertTrue(listing)
+        self.assertNotIn('"doc_x_document"."content"', listing[0])
+        self.assertContains(self.client.get("/admin/doc_x/document/"), "<td class=\"field-conversation_count\">1</td>")
+
+    def test_document_search_is_indexed(self):
+        """Search matches an exact ID or an s3_key prefix, never scans content"""
+        self.make_documents(12)
+        target = Document.objects.get(s3_key="uploads/0011.pdf")
+
+        response = self.client.get("/admin/doc_x/document/", {"q": "uploads/001"})
+        self.assertEqual(response.context["cl"].result_count, 2)
+        response = self.client.get("/admin/doc_x/document/", {"q": str(target.id)})
+        self.assertIn(target, response.context["cl"].result_list)
+        response = self.client.get("/admin/doc_x/document/", {"q": "xxxxx"})
+        self.assertEqual(response.context["cl"].result_count, 0)
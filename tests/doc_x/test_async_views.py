@@ -0,0 +1,237 @@
+# tests/doc_x/test_async_views.py
+
+import os
+import json
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import AsyncRequestFactory, Client, SimpleTestCase, TestCase
+
+from apps.doc_x import async_views
+from apps.doc_x.models import Conversation, Document
+from apps.doc_x.processing import aprocess_s3_document
+from guidewisey.quota import quota_engine
+from services.registry import ClientRegistry
+from services.router import LLMRouter
+from services.semantic_cache import SemanticAnswerCache
+from services.summarize import MapReduceSummarizer
+
+User = get_user_model()
+
+LATENCY = 0.3
+
+
+def slow_gemini(gemini_cls):
+    """Fake Gemini whose async call takes LATENCY seconds."""
+    gemini = gemini_cls.return_value
+    gemini.DEFAULT_MODEL = gemini.MODEL_SET = "gemini-2.5-flash"
+    gemini.build_system_prompt.return_value = "system"
+
+    async def aexplain_text(text, conversation=None, **kwargs):
+        await asyncio.sleep(LATENCY)
+        return "An answer."
+
+    gemini.aexplain_text.side_effect = aexplain_text
+    return gemini
+
+
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        quota_engine.reset()
+        self.addCleanup(quota_engine.reset)
+        self.user = User.objects.create_user(username="asyncuser", password="testpass123")
+        self.documents = [
+            Document.objects.create(s3_key=f"uploads/{n}.pdf", content="Council tax bill.", summary="s")
+            for n in range(5)
+        ]
+        patcher = mock.patch("apps.doc_x.async_views.answer_cache", SemanticAnswerCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def post(self, path, data):
+        return await self.async_client.post(path, data, content_type="application/json")
+
+    async def test_requires_authentication(self):
+        response = await self.post("/api/doc-x/async/ask/", {"document_id": self.documents[0].id, "question": "?"})
+        self.assertEqual(response.status_code, 403)
+
+    @mock.patch("apps.doc_x.async_views.get_llm_client")
+    async def test_ask(self, gemini_cls):
+        slow_gemini(gemini_cls)
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.post(
+            "/api/doc-x/async/ask/", {"document_id": self.documents[0].id, "question": "When to pay?"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"answer": "An answer.", "remaining": 2})
+        turns = await sync_to_async(list)(Conversation.objects.values_list("role", flat=True).order_by("id"))
+        self.assertEqual(turns, ["user", "assistant"])
+
+    @mock.patch("apps.doc_x.async_views.get_llm_client")
+    async def test_ask_failure_releases_question(self, gemini_cls):
+        slow_gemini(gemini_cls).aexplain_text.side_effect = RuntimeError("upstream down")
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.post("/api/doc-x/async/ask/", {"document_id": self.documents[0].id, "question": "?x"})
+
+        self.assertEqual(response.status_code, 500)
+        key = quota_engine.key(user_id=self.user.id, document_id=self.documents[0].id)
+        self.assertEqual(quota_engine.peek(key), 0)
+
+    @mock.patch("apps.doc_x.async_views.get_llm_client")
+    async def test_requests_overlap(self, gemini_cls):
+        """Concurrent asks wait on the LLM together, not one after another"""
+        slow_gemini(gemini_cls)
+
+        async def auser():
+            return self.user
+
+        # Called directly: the test client serves one request at a time
+        requests = []
+        for document in self.documents:
+            request = AsyncRequestFactory().post(
+                "/api/doc-x/async/ask/", {"document_id": document.id, "question": "When to pay?"},
+                content_type="application/json",
+            )
+            request.auser = auser
+            requests.append(request)
+
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(async_views.ask(request) for request in requests))
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual([r.status_code for r in responses], [200] * len(self.documents))
+        self.assertLess(elapsed, LATENCY * len(self.documents) / 2)
+
+    @mock.patch("apps.doc_x.async_views.get_llm_client")
+    async def test_process_text(self, gemini_cls):
+        slow_gemini(gemini_cls)
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.post("/api/doc-x/async/process-text/", {"text": "A letter from the council."})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["summary"], "An answer.")
+
+    @mock.patch("apps.doc_x.processing.extract_text", return_value="Extracted letter text")
+    @mock.patch("apps.doc_x.processing.get_llm_client")
+    @mock.patch("apps.doc_x.processing.get_s3_client")
+    async def test_identical_documents_share_one_pipeline_run(self, s3_cls, gemini_cls, extract_text):
+        """A double submit of the same upload downloads, extracts and summarizes it once"""
+        gemini = slow_gemini(gemini_cls)
+        s3 = s3_cls.return_value
+        s3.ahead_object = mock.AsyncMock(return_value={"etag": "etag-2", "size": 10})
+        s3.aopen_stream = mock.AsyncMock(return_value=mock.MagicMock())
+
+        documents = await asyncio.gather(*(aprocess_s3_document("uploads/b.pdf") for _ in range(3)))
+
+        self.assertEqual([d.summary for d in documents], ["An answer."] * 3)
+        self.assertEqual((s3.aopen_stream.call_count, extract_text.call_count), (1, 1))
+        self.assertEqual(gemini.aexplain_text.call_count, 1)
+
+    @mock.patch("apps.doc_x.processing.extract_text", return_value="Extracted letter text")
+    @mock.patch("apps.doc_x.processing.get_llm_client")
+    @mock.patch("apps.doc_x.processing.get_s3_client")
+    async def test_process_document(self, s3_cls, gemini_cls, extract_text):
+        slow_gemini(gemini_cls)
+        s3 = s3_cls.return_value
+        s3.ahead_object = mock.AsyncMock(return_value={"etag": "etag-1", "size": 10})
+        s3.aopen_stream = mock.AsyncMock(return_value=mock.MagicMock())
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.post("/api/doc-x/async/process/?fields=id,summary", {"s3_key": "uploads/b.pdf"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {"id", "summary"})
+        document = await Document.objects.aget(id=response.json()["id"])
+        self.assertEqual(document.summary, "An answer.")
+
+
+class ChatCompletionHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible endpoint with keep-alive connections."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        message = {"role": "assistant", "content": "An answer."}
+        body = json.dumps({
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o-mini",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class AsyncViewsUnderWSGITestCase(TestCase):
+    def setUp(self):
+        quota_engine.reset()
+        self.addCleanup(quota_engine.reset)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        env = {"OPENAI_API_KEY": "test", "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_port}/v1"}
+        with mock.patch.dict(os.environ, {**env, "GEMINI_API_KEY": ""}):
+            registry = ClientRegistry()
+            router = LLMRouter.from_clients(registry.gemini(), registry.ai(), names=["openai"], hedge=False)
+        self.addCleanup(registry.reset)
+        patches = {"get_llm_client": mock.Mock(return_value=router), "answer_cache": SemanticAnswerCache()}
+        for target, value in patches.items():
+            patcher = mock.patch(f"apps.doc_x.async_views.{target}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(username="wsgiuser", password="testpass123")
+        self.document = Document.objects.create(s3_key="uploads/a.pdf", content="Council tax bill.", summary="s")
+
+    def test_sequential_requests_on_new_event_loops(self):
+        """Each WSGI request runs the async view on a new event loop; pooled connections must not leak across"""
+        client = Client()
+        client.force_login(self.user)
+        for question in ["When do I pay?", "How much is the bill?"]:
+            response = client.post(
+                "/api/doc-x/async/ask/",
+                {"document_id": self.document.id, "question": question},
+                content_type="application/json",
+            )
+            self.assertEqual((response.status_code, response.json()["answer"]), (200, "An answer."))
+
+
+class AsyncSummarizerTestCase(SimpleTestCase):
+    def test_map_calls_run_concurrently(self):
+        """asummarize issues the map calls together, bounded by max_workers"""
+        in_flight, peak = 0, 0
+
+        async def aexplain(text, system_prompt=None, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return "note"
+
+        summarizer = MapReduceSummarizer(
+            None, single_shot_tokens=100, chunk_tokens=50, max_workers=3, aexplain=aexplain
+        )
+        text = "\n\n".join(f"Paragraph {n}. " + "word " * 40 for n in range(10))
+
+        self.assertEqual(asyncio.run(summarizer.asummarize(text)), "note")
+        self.assertEqual(peak, 3)
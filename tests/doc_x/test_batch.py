@@ -0,0 +1,160 @@
+# tests/doc_x/test_batch.py
+
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.doc_x.cache import DocumentCache, document_cache
+from apps.doc_x.models import Conversation, Document, DocumentCacheEntry, DocumentIndex
+from apps.doc_x.processing import process_s3_document
+from guidewisey.quota import quota_engine
+
+User = get_user_model()
+
+
+class BatchProcessingTestCase(TestCase):
+    def setUp(self):
+        quota_engine.reset()
+        self.addCleanup(quota_engine.reset)
+        User.objects.create_user(username="batchuser", password="testpass123")
+        self.client = APIClient()
+        self.client.login(username="batchuser", password="testpass123")
+
+        self.in_flight, self.peak = 0, 0
+        self.lock = threading.Lock()
+        for target, attr in [("get_llm_client", "llm"), ("get_s3_client", "s3")]:
+            patcher = mock.patch(f"apps.doc_x.batch.{target}")
+            setattr(self, attr, patcher.start().return_value)
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch("apps.doc_x.processing.extract_text", side_effect=lambda buffer, ext: f"Letter {ext}")
+        self.extract_text = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.llm.DEFAULT_MODEL = self.llm.MODEL_SET = "gemini-2.5-flash"
+        self.llm.build_system_prompt.return_value = "prompt"
+        self.llm.explain_text.side_effect = self.slow_explain
+        self.s3.head_object.side_effect = lambda key: {"etag": f"etag-{key}", "size": 10}
+
+    def slow_explain(self, text, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.05)
+        with self.lock:
+            self.in_flight -= 1
+        return f"Summary of {text}"
+
+    def post(self, items):
+        return self.client.post("/api/doc-x/batch/", {"items": items}, format="json")
+
+    def test_mixed_batch_with_per_item_errors(self):
+        """Uploads and texts are processed together; bad items fail alone"""
+        def head_object(key):
+            if key == "missing.pdf":
+                raise RuntimeError("NoSuchKey")
+            return {"etag": key, "size": 1}
+
+        self.s3.head_object.side_effect = head_object
+        response = self.post(
+            [
+                {"s3_key": "a.pdf"},
+                {"text": "A letter from the council about council tax."},
+                {"s3_key": "a.exe"},
+                {"s3_key": "missing.pdf"},
+                {"s3_key": "b.pdf", "text": "both"},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["succeeded"], response.data["failed"]), (2, 3))
+        results = response.data["results"]
+        self.assertEqual([r["index"] for r in results], [0, 1, 2, 3, 4])
+        self.assertEqual(results[0]["summary"], "Summary of Letter pdf")
+        self.assertEqual([r.get("status") for r in results[2:]], [400, 500, 400])
+
+        documents = Document.objects.order_by("id")
+        self.assertEqual([d.s3_key for d in documents], ["a.pdf", "TEXT"])
+        self.assertEqual(Conversation.objects.filter(role="assistant").count(), 2)
+        self.assertEqual(DocumentIndex.objects.count(), 2)
+        self.assertEqual(DocumentCacheEntry.objects.count(), 1)
+
+    @override_settings(DOC_X_BATCH_LLM_CONCURRENCY=3)
+    def test_llm_calls_are_concurrent_and_bounded(self):
+        started = time.perf_counter()
+        response = self.post([{"s3_key": f"uploads/{n}.pdf"} for n in range(9)])
+
+        self.assertEqual(response.data["succeeded"], 9)
+        self.assertEqual(self.peak, 3)
+        self.assertLess(time.perf_counter() - started, 9 * 0.05)
+
+    def test_cache_hits_and_duplicates(self):
+        """Cached uploads skip download and LLM; repeated inputs are processed once"""
+        self.post([{"s3_key": "a.pdf"}])
+        self.s3.open_stream.reset_mock()
+        self.llm.explain_text.reset_mock()
+
+        text = {"text": "A letter from the council about council tax."}
+        response = self.post([{"s3_key": "a.pdf"}, {"s3_key": "b.pdf"}, {"s3_key": "b.pdf"}, text, text])
+
+        results = response.data["results"]
+        self.assertEqual([r["cached"] for r in results], [True, False, False, False, False])
+        self.assertEqual(len({r["document_id"] for r in results}), 5)
+        self.assertEqual((self.s3.open_stream.call_count, self.llm.explain_text.call_count), (1, 2))
+
+    def test_upload_in_flight_elsewhere_is_shared(self):
+        """A batch item joins a single-upload request already working on the same file"""
+        def extract_and_summarize(*args):
+            time.sleep(0.2)
+            return "Letter pdf", "Shared summary"
+
+        patches = {
+            "get_s3_client": mock.Mock(return_value=self.s3),
+            "get_llm_client": mock.Mock(return_value=self.llm),
+            "_extract_and_summarize": mock.Mock(side_effect=extract_and_summarize),
+            "_save_document": mock.Mock(),
+        }
+        # The upload runs in another thread, away from the test transaction
+        no_db = mock.patch.object(document_cache, "get", return_value=None)
+        with mock.patch.multiple("apps.doc_x.processing", **patches), no_db:
+            upload = threading.Thread(target=process_s3_document, args=("a.pdf",))
+            upload.start()
+            time.sleep(0.05)
+            response = self.post([{"s3_key": "a.pdf"}])
+            upload.join()
+
+        self.assertEqual(response.data["results"][0]["summary"], "Shared summary")
+        self.llm.explain_text.assert_not_called()
+
+    def test_queries_do_not_grow_with_batch_size(self):
+        def queries(n, prefix):
+            with CaptureQueriesContext(connection) as ctx:
+                self.post([{"s3_key": f"{prefix}/{i}.pdf"} for i in range(n)])
+            return len(ctx)
+
+        queries(1, "warm-up")  # creates the session
+        self.assertEqual(queries(2, "small"), queries(8, "large"))
+
+    def test_rejects_malformed_batches(self):
+        self.assertEqual(self.post("not a list").status_code, 400)
+        self.assertEqual(self.post([]).status_code, 400)
+        with override_settings(DOC_X_BATCH_MAX_ITEMS=2):
+            self.assertEqual(self.post([{"text": "x" * 20}] * 3).status_code, 400)
+
+
+class DocumentCacheBulkTestCase(TestCase):
+    def test_get_many_and_set_many(self):
+        cache = DocumentCache(ttl_seconds=3600, max_entries=10)
+        cache.set_many([("k1", "e1", "text", "one"), ("k2", "e2", "text", "two"), ("k1", "e1", "text", "one")])
+
+        entries = cache.get_many(["k1", "k2", "k3"])
+
+        self.assertEqual({key: entry.summary for key, entry in entries.items()}, {"k1": "one", "k2": "two"})
+        self.assertEqual(DocumentCacheEntry.objects.get(cache_key="k1").hits, 1)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stores"]), (2, 1, 2))
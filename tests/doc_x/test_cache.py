@@ -0,0 +1,86 @@
+# tests/doc_x/test_cache.py
+
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.doc_x.cache import DocumentCache
+from apps.doc_x.models import Document, DocumentCacheEntry
+
+User = get_user_model()
+
+
+class DocumentCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = DocumentCache(ttl_seconds=3600, max_entries=2)
+
+    def test_key_changes_with_pipeline_configuration(self):
+        """Any change to etag, extractor, model or prompt produces a new key"""
+        base = dict(etag="abc", ext="pdf", extractor_version="1", model="m", system_prompt="p")
+        key = DocumentCache.make_key(**base)
+        for field, value in [("etag", "def"), ("extractor_version", "2"), ("model", "n"), ("system_prompt", "q")]:
+            self.assertNotEqual(key, DocumentCache.make_key(**{**base, field: value}))
+
+    def test_hit_and_miss_counters(self):
+        """Lookups are counted and hits bump the stored hit counter"""
+        self.assertIsNone(self.cache.get("k1"))
+        self.cache.set("k1", etag="e1", content="text", summary="summary")
+        entry = self.cache.get("k1")
+
+        self.assertEqual(entry.summary, "summary")
+        self.assertEqual(DocumentCacheEntry.objects.get(cache_key="k1").hits, 1)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_expired_entry_is_dropped(self):
+        """Entries older than the TTL are treated as misses and deleted"""
+        self.cache.set("k1", etag="e1", content="text", summary="summary")
+        DocumentCacheEntry.objects.update(created_at=timezone.now() - timedelta(hours=2))
+
+        self.assertIsNone(self.cache.get("k1"))
+        self.assertFalse(DocumentCacheEntry.objects.exists())
+
+    def test_lru_eviction_over_capacity(self):
+        """The least recently used entry is evicted beyond max_entries"""
+        self.cache.set("k1", etag="e1", content="a", summary="a")
+        self.cache.set("k2", etag="e2", content="b", summary="b")
+        DocumentCacheEntry.objects.filter(cache_key="k1").update(
+            last_used_at=timezone.now() - timedelta(minutes=5)
+        )
+        self.cache.set("k3", etag="e3", content="c", summary="c")
+
+        keys = set(DocumentCacheEntry.objects.values_list("cache_key", flat=True))
+        self.assertEqual(keys, {"k2", "k3"})
+
+
+class ProcessDocumentCacheTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="cacheuser", password="testpass123")
+        self.client.login(username="cacheuser", password="testpass123")
+
+    @mock.patch("apps.doc_x.processing.extract_text", return_value="Extracted letter text")
+    @mock.patch("apps.doc_x.processing.get_llm_client")
+    @mock.patch("apps.doc_x.processing.get_s3_client")
+    def test_same_bytes_processed_once(self, s3_cls, gemini_cls, extract_text):
+        """A second upload with the same ETag skips download, extraction and LLM"""
+        s3_cls.return_value.head_object.return_value = {"etag": "etag-1", "size": 10}
+        gemini = gemini_cls.return_value
+        gemini.DEFAULT_MODEL = gemini.MODEL_SET = "gemini-test"
+        gemini.build_system_prompt.return_value = "prompt"
+        gemini.explain_text.return_value = "Plain summary"
+
+        for key in ["uploads/a.pdf", "uploads/copy-of-a.pdf"]:
+            response = self.client.post("/api/doc-x/process/", {"s3_key": key}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["summary"], "Plain summary")
+
+        self.assertEqual(s3_cls.return_value.open_stream.call_count, 1)
+        self.assertEqual(extract_text.call_count, 1)
+        self.assertEqual(gemini.explain_text.call_count, 1)
+        self.assertEqual(Document.objects.filter(summary="Plain summary").count(), 2)
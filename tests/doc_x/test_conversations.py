@@ -0,0 +1,67 @@
+# tests/doc_x/test_conversations.py
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.doc_x.models import Conversation, Document
+
+User = get_user_model()
+
+
+class ConversationHistoryTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="historyuser", password="testpass123")
+        self.client.login(username="historyuser", password="testpass123")
+        self.document = Document.objects.create(s3_key="uploads/a.pdf", content="text", summary="s")
+        other = Document.objects.create(s3_key="uploads/b.pdf", content="text", summary="s")
+        self.turns = []
+        for n in range(25):
+            self.turns.append(Conversation.objects.create(document=self.document, role="user", message=f"turn {n}"))
+            Conversation.objects.create(document=other, role="user", message="other document")
+        self.url = f"/api/doc-x/documents/{self.document.id}/conversations/"
+
+    def messages(self, response):
+        return [turn["message"] for turn in response.data["results"]]
+
+    def test_pages_walk_back_from_the_newest(self):
+        """Each page is chronological; cursors walk to older pages until exhausted"""
+        response = self.client.get(self.url, {"limit": 10})
+        self.assertEqual(self.messages(response), [f"turn {n}" for n in range(15, 25)])
+
+        seen = self.messages(response)
+        while response.data["next_cursor"]:
+            response = self.client.get(self.url, {"limit": 10, "cursor": response.data["next_cursor"]})
+            seen = self.messages(response) + seen
+        self.assertEqual(seen, [f"turn {n}" for n in range(25)])
+        self.assertFalse(response.data["has_more"])
+
+    def test_since_returns_newer_turns(self):
+        response = self.client.get(self.url, {"since": self.turns[19].id, "limit": 3})
+        self.assertEqual(self.messages(response), ["turn 20", "turn 21", "turn 22"])
+
+        response = self.client.get(self.url, {"cursor": response.data["next_cursor"], "limit": 3})
+        self.assertEqual(self.messages(response), ["turn 23", "turn 24"])
+        self.assertIsNone(response.data["next_cursor"])
+
+        response = self.client.get(self.url, {"since": self.turns[-1].id})
+        self.assertEqual(response.data["results"], [])
+
+    def test_keyset_not_offset(self):
+        """Page queries seek on id instead of using OFFSET"""
+        cursor = self.client.get(self.url, {"limit": 10}).data["next_cursor"]
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url, {"limit": 10, "cursor": cursor})
+        page_sql = [q["sql"] for q in context.captured_queries if "doc_x_conversation" in q["sql"]]
+        self.assertEqual(len(page_sql), 1)
+        self.assertNotIn("OFFSET", page_sql[0])
+        self.assertIn('"doc_x_conversation"."id" <', page_sql[0])
+
+    def test_bad_input(self):
+        self.assertEqual(self.client.get(self.url, {"cursor": "!!"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"since": "yesterday"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"limit": 0}).status_code, 400)
+        self.assertEqual(self.client.get("/api/doc-x/documents/999/conversations/").status_code, 404)
@@ -0,0 +1,86 @@
+# tests/doc_x/test_document_detail.py
+
+import gzip
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.doc_x.models import Document
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+User = get_user_model()
+
+
+class DocumentDetailTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="detailuser", password="testpass123")
+        self.client.login(username="detailuser", password="testpass123")
+        self.document = Document.objects.create(
+            s3_key="uploads/a.pdf", content="Full extracted text", summary="Pay by the 1st. " * 200
+        )
+        self.url = f"/api/doc-x/documents/{self.document.id}/"
+
+    def test_summary_and_metadata(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {"id", "s3_key", "summary", "created_at", "updated_at"})
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+
+        response = self.client.get(self.url, {"fields": "id,content"})
+        self.assertEqual(response.data, {"id": self.document.id, "content": "Full extracted text"})
+
+    def test_missing_document(self):
+        self.assertEqual(self.client.get("/api/doc-x/documents/999/").status_code, 404)
+
+    def test_if_none_match_skips_serialization(self):
+        """A matching ETag is answered with 304 without serializing"""
+        etag = self.client.get(self.url)["ETag"]
+        with mock.patch("apps.doc_x.serializers.DocumentSerializer.to_representation") as to_representation:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(to_representation.called)
+
+    def test_etag_changes_with_the_row(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.document.summary = "Updated summary"
+        self.document.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_compressed_bodies(self):
+        """Large bodies are brotli/gzip encoded with a suffixed strong ETag"""
+        plain = self.client.get(self.url)
+        encodings = [("gzip", gzip.decompress)] + ([("br", brotli.decompress)] if brotli else [])
+        for encoding, decompress in encodings:
+            with self.subTest(encoding=encoding):
+                response = self.client.get(self.url, HTTP_ACCEPT_ENCODING=encoding)
+                self.assertEqual(response["Content-Encoding"], encoding)
+                self.assertEqual(decompress(response.content), plain.content)
+                self.assertLess(len(response.content), len(plain.content))
+                self.assertEqual(response["ETag"], f'{plain["ETag"][:-1]}-{encoding}"')
+                self.assertIn("Accept-Encoding", response["Vary"])
+
+                revalidated = self.client.get(
+                    self.url, HTTP_ACCEPT_ENCODING=encoding, HTTP_IF_NONE_MATCH=response["ETag"]
+                )
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertEqual(revalidated["ETag"], response["ETag"])
+
+    @override_settings(RESPONSE_COMPRESS_MIN_BYTES=100000)
+    def test_small_bodies_are_not_compressed(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertFalse(response.has_header("Content-Encoding"))
@@ -0,0 +1,97 @@
+# tests/doc_x/test_extract.py
+
+import io
+from unittest import mock
+
+from django.test import SimpleTestCase
+from docx import Document as DocxDocument
+from pypdf import PdfWriter, PageObject
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from apps.doc_x import extract
+from apps.doc_x.extract import extract_text, extract_pdf_pages, PAGE_BREAK
+
+
+def make_text_pdf(page_texts):
+    """Build an in-memory PDF with one line of text per page."""
+    writer = PdfWriter()
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    })
+    for text in page_texts:
+        page = PageObject.create_blank_page(width=612, height=792)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+        stream = DecodedStreamObject()
+        stream.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(stream)
+        writer.add_page(page)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+class ExtractTextTestCase(SimpleTestCase):
+    def test_docx_from_in_memory_buffer(self):
+        """Extractors parse file-like objects without a path on disk"""
+        doc = DocxDocument()
+        doc.add_paragraph("Dear resident,")
+        doc.add_paragraph("Your permit is approved.")
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        buffer.seek(0)
+
+        self.assertEqual(extract_text(buffer, "docx"), "Dear resident,\nYour permit is approved.")
+
+    def test_unsupported_extension(self):
+        """Unknown extensions raise ValueError"""
+        with self.assertRaises(ValueError):
+            extract_text(io.BytesIO(b""), "exe")
+
+
+@mock.patch.object(extract, "PDF_OCR_ENABLED", False)
+class ExtractPdfTestCase(SimpleTestCase):
+    def test_pages_joined_with_page_break(self):
+        """Page boundaries are preserved in the joined text"""
+        pdf = make_text_pdf(["First page", "Second page"])
+        self.assertEqual(extract_text(pdf, "pdf"), f"First page{PAGE_BREAK}Second page")
+
+    def test_parallel_extraction_preserves_page_order(self):
+        """Page ranges fanned out to the process pool come back in order"""
+        texts = [f"Page {i}" for i in range(7)]
+        with mock.patch.object(extract, "PDF_PARALLEL_MIN_PAGES", 2), \
+                mock.patch.object(extract, "PDF_WORKERS", 3):
+            pages = extract_pdf_pages(make_text_pdf(texts))
+        self.assertEqual(pages, texts)
+
+    def test_page_cap(self):
+        """Only the first max_pages pages are extracted"""
+        pages = extract_pdf_pages(make_text_pdf(["a1", "b2", "c3"]), max_pages=2)
+        self.assertEqual(pages, ["a1", "b2"])
+
+
+class ScannedPdfTestCase(SimpleTestCase):
+    @mock.patch.object(extract, "PDF_WORKERS", 1)
+    @mock.patch.object(extract, "_ocr_page", side_effect=lambda pdf_input, index, dpi: f"OCR text of page {index}")
+    def test_only_pages_without_text_layer_are_ocred(self, ocr_page):
+        """Scanned pages are OCR'd and merged back in page order"""
+        pdf = make_text_pdf(["This page has a real text layer", "", "Another page with plenty of text"])
+        pages = extract_pdf_pages(pdf)
+
+        self.assertEqual(
+            pages,
+            ["This page has a real text layer", "OCR text of page 1", "Another page with plenty of text"],
+        )
+        self.assertEqual([c.args[1] for c in ocr_page.call_args_list], [1])
+
+    @mock.patch.object(extract, "PDF_WORKERS", 1)
+    @mock.patch.object(extract, "_ocr_page", side_effect=RuntimeError("tesseract missing"))
+    def test_ocr_failure_keeps_text_layer(self, ocr_page):
+        """An OCR failure does not fail the whole document"""
+        with self.assertLogs("apps.doc_x.extract", level="ERROR"):
+            pages = extract_pdf_pages(make_text_pdf(["short"]))
+        self.assertEqual(pages, ["short"])
@@ -0,0 +1,125 @@
+# tests/doc_x/test_jobs.py
+
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.doc_x.jobs import claim_next_job, run_job, requeue_stale_jobs, enqueue_document_job
+from apps.doc_x.models import Document, ProcessingJob
+from apps.doc_x.processing import ProcessingError
+
+User = get_user_model()
+
+
+class ProcessingJobTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="jobuser", password="testpass123")
+        self.client.login(username="jobuser", password="testpass123")
+
+    def enqueue(self, s3_key="uploads/letter.pdf"):
+        response = self.client.post(
+            "/api/doc-x/process/", {"s3_key": s3_key}, format="json", HTTP_PREFER="respond-async"
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        return response.data["job_id"]
+
+    def poll(self, job_id):
+        return self.client.get(f"/api/doc-x/jobs/{job_id}/")
+
+    def test_enqueue_and_complete(self):
+        """Queued job is processed by a worker and reports its document"""
+        job_id = self.enqueue()
+        self.assertEqual(self.poll(job_id).data["status"], ProcessingJob.STATUS_QUEUED)
+
+        document = Document.objects.create(s3_key="uploads/letter.pdf", content="text", summary="Summary")
+        with mock.patch("apps.doc_x.jobs.process_s3_document", return_value=document) as process:
+            run_job(claim_next_job("test-worker"))
+        process.assert_called_once()
+
+        data = self.poll(job_id).data
+        self.assertEqual(data["status"], ProcessingJob.STATUS_SUCCEEDED)
+        self.assertEqual(data["progress"], 100)
+        self.assertEqual((data["document_id"], data["summary"]), (document.id, "Summary"))
+
+    def test_failed_job_reports_error(self):
+        job_id = self.enqueue()
+        with mock.patch(
+            "apps.doc_x.jobs.process_s3_document",
+            side_effect=ProcessingError("S3 download failed: NoSuchKey"),
+        ):
+            run_job(claim_next_job("test-worker"))
+
+        data = self.poll(job_id).data
+        self.assertEqual(data["status"], ProcessingJob.STATUS_FAILED)
+        self.assertEqual(data["error"], "S3 download failed: NoSuchKey")
+
+    def test_unsupported_type_rejected_before_queueing(self):
+        response = self.client.post(
+            "/api/doc-x/process/", {"s3_key": "uploads/virus.exe"}, format="json", HTTP_PREFER="respond-async"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ProcessingJob.objects.exists())
+
+    def test_job_claimed_once(self):
+        enqueue_document_job("uploads/a.pdf")
+        self.assertIsNotNone(claim_next_job("worker-1"))
+        self.assertIsNone(claim_next_job("worker-2"))
+
+    def test_other_users_jobs_hidden(self):
+        job = enqueue_document_job("uploads/a.pdf", user=User.objects.create_user(username="other"))
+        self.assertEqual(self.poll(job.id).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stale_running_job_requeued(self):
+        job = enqueue_document_job("uploads/a.pdf")
+        claim_next_job("dead-worker")
+        ProcessingJob.objects.filter(id=job.id).update(updated_at="2000-01-01T00:00:00Z")
+
+        self.assertEqual(requeue_stale_jobs(stale_after=60, max_attempts=3), (1, 0))
+        self.assertEqual(ProcessingJob.objects.get(id=job.id).status, ProcessingJob.STATUS_QUEUED)
+
+    def test_superseded_run_does_not_write_result(self):
+        """A run whose job was requeued and claimed again leaves the new run's row alone"""
+        job = enqueue_document_job("uploads/a.pdf")
+        claimed = claim_next_job("slow-worker")
+        document = Document.objects.create(s3_key="uploads/a.pdf", content="text", summary="Summary")
+
+        def process(s3_key, progress):
+            ProcessingJob.objects.filter(id=job.id).update(updated_at="2000-01-01T00:00:00Z")
+            requeue_stale_jobs(stale_after=60, max_attempts=3)
+            claim_next_job("new-worker")
+            progress("extracting", 35)
+            return document
+
+        with mock.patch("apps.doc_x.jobs.process_s3_document", side_effect=process):
+            run_job(claimed)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), (ProcessingJob.STATUS_RUNNING, "new-worker", 2))
+        self.assertEqual((job.stage, job.document_id), ("starting", None))
+
+
+class JobHeartbeatTestCase(TransactionTestCase):
+    @override_settings(DOC_X_JOB_HEARTBEAT_SECONDS=0.05)
+    def test_long_running_job_is_not_stale(self):
+        """The heartbeat keeps a healthy job fresh between stage updates"""
+        job = enqueue_document_job("uploads/a.pdf")
+        claimed = claim_next_job("test-worker")
+        document = Document.objects.create(s3_key="uploads/a.pdf", content="text", summary="Summary")
+        stale = []
+
+        def process(s3_key, progress):
+            ProcessingJob.objects.filter(id=job.id).update(updated_at="2000-01-01T00:00:00Z")
+            time.sleep(0.3)
+            stale.append(requeue_stale_jobs(stale_after=60, max_attempts=3))
+            return document
+
+        with mock.patch("apps.doc_x.jobs.process_s3_document", side_effect=process):
+            run_job(claimed)
+
+        self.assertEqual(stale, [(0, 0)])
+        self.assertEqual(ProcessingJob.objects.get(id=job.id).status, ProcessingJob.STATUS_SUCCEEDED)
@@ -0,0 +1,96 @@
+# tests/doc_x/test_normalize.py
+
+from django.test import SimpleTestCase
+
+from apps.doc_x.extract import PAGE_BREAK
+from apps.doc_x.normalize import TextNormalizer
+
+HEADER = "Anytown Borough Council\nRevenues Department, Town Hall, Anytown AT1 1AA"
+FOOTER = "Ref: CT/{page}/2026\nPage {page} of 3"
+DISCLAIMER = (
+    "This letter and any attachments are confidential and intended solely for the addressee.\n"
+    "If you have received this letter in error please tell us."
+)
+
+
+def letter_page(page, body):
+    return f"{HEADER}\n\n{body}\n\n{DISCLAIMER}\n\n{FOOTER.format(page=page)}"
+
+
+class TextNormalizerTestCase(SimpleTestCase):
+    def test_repeated_headers_footers_and_boilerplate_are_dropped(self):
+        """The letterhead is kept once; footers, page numbers and disclaimers go"""
+        text = PAGE_BREAK.join(
+            [
+                letter_page(1, "Your council tax bill for 2026 is £1,820."),
+                letter_page(2, "You can pay in 10 monthly instal-\nments by direct debit."),
+                letter_page(3, "Contact us if you cannot pay."),
+            ]
+        )
+
+        normalized, report = TextNormalizer().clean(text)
+
+        self.assertEqual(
+            normalized.split(PAGE_BREAK),
+            [
+                f"{HEADER}\n\nYour council tax bill for 2026 is £1,820.\n\nRef: CT/1/2026",
+                "You can pay in 10 monthly instalments by direct debit.",
+                "Contact us if you cannot pay.",
+            ],
+        )
+        self.assertEqual((report["repeated_lines"], report["page_numbers"], report["boilerplate"]), (6, 3, 6))
+        self.assertGreater(report["tokens_saved"], report["tokens_after"])
+
+    def test_boilerplate_next_to_body_text(self):
+        """Only the disclaimer sentence goes when the page has no blank lines around it"""
+        text = (
+            "This letter is confidential and intended for the addressee only.\n"
+            "Dear Ms Smith,\nYour benefit claim has been refused.\nYou can appeal within one month."
+        )
+        normalized, report = TextNormalizer().clean(text)
+        self.assertEqual(
+            normalized, "Dear Ms Smith,\nYour benefit claim has been refused.\nYou can appeal within one month."
+        )
+        self.assertEqual(report["boilerplate"], 1)
+
+        text = (
+            "Calls may be recorded. Ring 0300 123 4567 to pay.\n"
+            "If you have received this letter in error please\ntell us at once.\n"
+            "Your first instalment of £152 is due on 1 May."
+        )
+        normalized, report = TextNormalizer().clean(text)
+        self.assertEqual(normalized, "Ring 0300 123 4567 to pay.\nYour first instalment of £152 is due on 1 May.")
+        self.assertEqual(report["boilerplate"], 2)
+
+    def test_whitespace_is_collapsed(self):
+        text = "  Dear resident,\t\tthank you.  \n\n\n\nYour  permit\u200b is approved.\n\n"
+        normalized, _ = TextNormalizer().clean(text)
+        self.assertEqual(normalized, "Dear resident, thank you.\n\nYour permit is approved.")
+
+    def test_body_text_is_untouched(self):
+        """Numbers in the body and lines repeated mid-page are not mistaken for page furniture"""
+        page = "Heading\nAmount due\n\n250\n\nAmount due\n\nPay by 1 May.\nThank you\nSigned"
+        normalized, report = TextNormalizer().clean(PAGE_BREAK.join([page, "Second page text"]))
+        self.assertEqual(normalized, PAGE_BREAK.join([page, "Second page text"]))
+        self.assertEqual(report["tokens_saved"], 0)
+
+    def test_numbers_at_page_edges(self):
+        """A bare number at a page edge is only dropped when it counts up with the other pages"""
+        body = ["Total amount due\n250", "Reference\n1402\nThank you"]
+        normalized, report = TextNormalizer().clean(PAGE_BREAK.join(body))
+        self.assertEqual(normalized, PAGE_BREAK.join(body))
+        self.assertEqual(report["page_numbers"], 0)
+
+        text = ["Your bill.", "How to pay.", "Contact us."]
+        numbered = [f"{page}\n{n}" for n, page in enumerate(text, start=1)]
+        normalized, report = TextNormalizer().clean(PAGE_BREAK.join(numbered))
+        self.assertEqual(normalized, PAGE_BREAK.join(text))
+        self.assertEqual(report["page_numbers"], 3)
+
+    def test_stats_accumulate(self):
+        normalizer = TextNormalizer()
+        for _ in range(2):
+            normalizer.normalize("Page 1 of 1\nHello there")
+        self.assertEqual(
+            normalizer.stats(), {"documents": 2, "tokens_before": 12, "tokens_after": 6, "tokens_saved": 6}
+        )
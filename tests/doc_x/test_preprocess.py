@@ -0,0 +1,54 @@
+# tests/doc_x/test_preprocess.py
+
+import io
+
+from django.test import SimpleTestCase
+from PIL import Image, ImageDraw
+
+from apps.doc_x.preprocess import PAGE_LONG_SIDE_INCHES, estimate_skew, preprocess_image
+
+
+def make_photo(size=(4000, 3000), orientation=None):
+    """A 12 MP 'phone photo' of a text block, saved as JPEG."""
+    image = Image.new("RGB", size, (235, 230, 220))
+    draw = ImageDraw.Draw(image)
+    for n in range(20):
+        draw.rectangle((800, 600 + n * 80, 3200, 630 + n * 80), fill=(20, 20, 20))
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", exif=exif)
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+class PreprocessImageTestCase(SimpleTestCase):
+    def test_downscales_to_target_dpi(self):
+        """Large photos are reduced to the profile's pixel budget"""
+        result = preprocess_image(make_photo(), profile="fast")
+        self.assertLessEqual(max(result.size), int(200 * PAGE_LONG_SIDE_INCHES))
+
+    def test_exif_orientation_applied(self):
+        """A rotated-by-EXIF landscape photo comes out portrait"""
+        result = preprocess_image(make_photo(orientation=6), profile="default")
+        self.assertGreater(result.height, result.width)
+
+    def test_binarize_and_autocrop(self):
+        """Output is pure black/white and trimmed to the text block"""
+        result = preprocess_image(make_photo(), profile="default")
+        self.assertEqual(set(result.getdata()) - {0, 255}, set())
+        self.assertLess(result.width, 3200)
+
+    def test_none_profile_is_passthrough(self):
+        photo = make_photo(size=(400, 300))
+        self.assertIs(preprocess_image(photo, profile="none"), photo)
+
+    def test_estimate_skew(self):
+        """A page rotated by a few degrees is detected"""
+        page = Image.new("L", (1200, 1600), 255)
+        draw = ImageDraw.Draw(page)
+        for n in range(25):
+            draw.rectangle((150, 150 + n * 50, 1050, 170 + n * 50), fill=0)
+        skewed = page.rotate(3, fillcolor=255)
+        self.assertAlmostEqual(estimate_skew(skewed), -3, delta=1)
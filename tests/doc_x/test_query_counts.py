@@ -0,0 +1,123 @@
+# tests/doc_x/test_query_counts.py
+#
+# Pins the number of SQL queries per doc_x endpoint. A failure here means a
+# change added queries (an N+1, a lost select_related, a read-modify-write);
+# update the budget only if the extra query is intended.
+#
+# Every authenticated request starts with two queries: the session row and
+# the user row.
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.doc_x.models import Conversation, Document, ProcessingJob
+from guidewisey.quota import quota_engine
+from services.semantic_cache import SemanticAnswerCache
+
+User = get_user_model()
+
+
+class DocXQueryCountTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        quota_engine.reset()
+        self.addCleanup(quota_engine.reset)
+        self.user = User.objects.create_user(username="queryuser", password="testpass123", is_staff=True)
+        self.client.login(username="queryuser", password="testpass123")
+        self.document = Document.objects.create(s3_key="uploads/a.pdf", content="Council tax bill.", summary="s")
+        for n in range(10):
+            Conversation.objects.create(document=self.document, role="user", message=f"question {n}")
+            Conversation.objects.create(document=self.document, role="assistant", message=f"answer {n}")
+
+        gemini_patch = mock.patch("apps.doc_x.views.get_llm_client")
+        self.gemini = gemini_patch.start().return_value
+        self.addCleanup(gemini_patch.stop)
+        self.gemini.DEFAULT_MODEL = self.gemini.MODEL_SET = "gemini-2.5-flash"
+        self.gemini.build_system_prompt.return_value = "system"
+        self.gemini.explain_text.return_value = "An answer."
+        self.gemini.stream_text.side_effect = lambda *args, **kwargs: iter(["An ", "answer."])
+
+        cache_patch = mock.patch("apps.doc_x.views.answer_cache", new_callable=SemanticAnswerCache)
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+    def post(self, path, data, **extra):
+        return self.client.post(path, data, format="json", **extra)
+
+    def test_document_detail(self):
+        url = f"/api/doc-x/documents/{self.document.id}/"
+        with self.assertNumQueries(3):
+            etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_document_conversations(self):
+        with self.assertNumQueries(4):  # document exists, one keyset page
+            response = self.client.get(f"/api/doc-x/documents/{self.document.id}/conversations/", {"limit": 5})
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_ask(self):
+        # document, index, history summary, unsummarized turns, one bulk insert
+        self.post("/api/doc-x/ask/", {"document_id": self.document.id, "question": "warm up?"})
+        with self.assertNumQueries(7):
+            response = self.post("/api/doc-x/ask/", {"document_id": self.document.id, "question": "When to pay?"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_ask_stream(self):
+        self.post("/api/doc-x/ask/", {"document_id": self.document.id, "question": "warm up?"})
+        with self.assertNumQueries(7):
+            response = self.post("/api/doc-x/ask/stream/", {"document_id": self.document.id, "question": "Deadline?"})
+            b"".join(response.streaming_content)
+
+    def test_ask_limit_reached(self):
+        quota_engine.store.add(quota_engine.key(user_id=self.user.id, document_id=self.document.id), 3)
+        with self.assertNumQueries(3):
+            response = self.post("/api/doc-x/ask/", {"document_id": self.document.id, "question": "Again?"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_remaining(self):
+        with self.assertNumQueries(3):
+            self.client.get("/api/doc-x/ask/remaining/", {"document_id": self.document.id})
+
+    def test_process_text(self):
+        # session quota seed, document, summary turn, index
+        with self.assertNumQueries(6):
+            response = self.post("/api/doc-x/process-text/", {"text": "A letter from the council."})
+        self.assertEqual(response.status_code, 200)
+
+    def test_process_text_stream(self):
+        with self.assertNumQueries(6):
+            response = self.post("/api/doc-x/process-text/stream/", {"text": "A letter from the council."})
+            b"".join(response.streaming_content)
+
+    @mock.patch("apps.doc_x.processing.extract_text", return_value="Extracted letter text")
+    @mock.patch("apps.doc_x.processing.get_llm_client")
+    @mock.patch("apps.doc_x.processing.get_s3_client")
+    def test_process_document(self, s3_cls, gemini_cls, extract_text):
+        s3_cls.return_value.head_object.return_value = {"etag": "etag-1", "size": 10}
+        gemini_cls.return_value.DEFAULT_MODEL = gemini_cls.return_value.MODEL_SET = "gemini-2.5-flash"
+        gemini_cls.return_value.build_system_prompt.return_value = "prompt"
+        gemini_cls.return_value.explain_text.return_value = "Plain summary"
+        # session quota seed, cache miss, cache store (update_or_create) + eviction, document, turn, index
+        with self.assertNumQueries(15):
+            response = self.post("/api/doc-x/process/", {"s3_key": "uploads/b.pdf"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_process_document_async(self):
+        with self.assertNumQueries(4):
+            response = self.post("/api/doc-x/process/", {"s3_key": "uploads/b.pdf"}, HTTP_PREFER="respond-async")
+        self.assertEqual(response.status_code, 202)
+
+    def test_job_status(self):
+        job = ProcessingJob.objects.create(
+            user=self.user, s3_key="uploads/a.pdf", status=ProcessingJob.STATUS_SUCCEEDED, document=self.document
+        )
+        with self.assertNumQueries(3):
+            self.client.get(f"/api/doc-x/jobs/{job.id}/")
+
+    def test_metrics(self):
+        with self.assertNumQueries(4):
+            self.client.get("/api/doc-x/metrics/")
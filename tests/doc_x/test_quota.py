@@ -0,0 +1,121 @@
+# tests/doc_x/test_quota.py
+
+import tempfile
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from apps.doc_x.models import Document, UserQuestionLimit
+from guidewisey.quota import FileQuotaStore, LocalQuotaStore, QuotaEngine, quota_engine
+from services.semantic_cache import SemanticAnswerCache
+
+User = get_user_model()
+
+
+class QuotaStressTestCase(SimpleTestCase):
+    THREADS = 8
+    PER_THREAD = 50
+
+    def hammer(self, engine, limit):
+        key = engine.key(user_id=1, document_id=1)
+        engine.store.add(key, 0)  # seeded, so threads never touch the database
+        granted = []
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker():
+            barrier.wait()
+            for _ in range(self.PER_THREAD):
+                if engine.reserve(limit, user_id=1, document_id=1):
+                    granted.append(1)
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(granted), engine.store.get(key)
+
+    def stores(self):
+        yield LocalQuotaStore()
+        with tempfile.TemporaryDirectory() as directory:
+            yield FileQuotaStore(directory)
+
+    def test_no_lost_updates(self):
+        """Every reservation is counted exactly once"""
+        total = self.THREADS * self.PER_THREAD
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                granted, count = self.hammer(QuotaEngine(store, flush_interval=3600), limit=total)
+                self.assertEqual((granted, count), (total, total))
+
+    def test_limit_never_exceeded(self):
+        """Concurrent callers cannot overshoot the limit"""
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                granted, count = self.hammer(QuotaEngine(store, flush_interval=3600), limit=37)
+                self.assertEqual((granted, count), (37, 37))
+
+    def test_idle_counters_are_flushed_on_a_timer(self):
+        """Counters reach the database within the interval even if no request follows"""
+        engine = QuotaEngine(LocalQuotaStore(), flush_interval=0.05)
+        self.addCleanup(engine.reset)
+        flushed = threading.Event()
+        with mock.patch.object(engine, "flush", side_effect=flushed.set):
+            engine.store.add(engine.key(user_id=1, document_id=1), 0)
+            self.assertIsNotNone(engine.reserve(3, user_id=1, document_id=1))
+            self.assertTrue(flushed.wait(1))
+
+
+class QuestionLimitTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        quota_engine.reset()
+        self.addCleanup(quota_engine.reset)
+        self.user = User.objects.create_user(username="quotauser", password="testpass123")
+        self.client.login(username="quotauser", password="testpass123")
+        self.document = Document.objects.create(s3_key="a.pdf", content="Council tax bill", summary="s")
+
+    def ask(self, question):
+        return self.client.post(
+            "/api/doc-x/ask/", {"document_id": self.document.id, "question": question}, format="json"
+        )
+
+    @mock.patch("apps.doc_x.views.answer_cache", new_callable=SemanticAnswerCache)
+    @mock.patch("apps.doc_x.views.get_llm_client")
+    def test_limit_and_flush(self, get_gemini, cache):
+        """Three questions are allowed, the fourth is refused, counts reach the database on flush"""
+        get_gemini.return_value.explain_text.return_value = "An answer."
+        remaining = [self.ask(question).data.get("remaining") for question in ["One?", "Two?", "Three?"]]
+        self.assertEqual(remaining, [2, 1, 0])
+        self.assertEqual(self.ask("Four?").status_code, 403)
+
+        quota_engine.flush()
+        self.assertEqual(UserQuestionLimit.objects.get(user=self.user, document=self.document).count, 3)
+
+    @mock.patch("apps.doc_x.views.answer_cache", new_callable=SemanticAnswerCache)
+    @mock.patch("apps.doc_x.views.get_llm_client")
+    def test_failed_answer_releases_question(self, get_gemini, cache):
+        get_gemini.return_value.explain_text.side_effect = RuntimeError("upstream down")
+        self.assertEqual(self.ask("One?").status_code, 500)
+
+        key = quota_engine.key(user_id=self.user.id, document_id=self.document.id)
+        self.assertEqual(quota_engine.peek(key), 0)
+
+    @mock.patch("apps.doc_x.views.get_llm_client")
+    def test_session_quota_creates_no_documents(self, get_gemini):
+        """process_text no longer creates SESSION_ placeholder documents"""
+        get_gemini.return_value.explain_text.return_value = "Simple explanation."
+        response = self.client.post("/api/doc-x/process-text/", {"text": "A letter from the council."}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Document.objects.filter(s3_key__startswith="SESSION_").exists())
+        self.assertFalse(UserQuestionLimit.objects.exists())
+
+    def test_remaining_is_a_single_read(self):
+        with self.assertNumQueries(3):  # session, user, then one read for the count
+            response = self.client.get("/api/doc-x/ask/remaining/", {"document_id": self.document.id})
+        self.assertEqual(response.data["remaining"], 3)
+        self.assertFalse(UserQuestionLimit.objects.exists())
@@ -0,0 +1,111 @@
+# tests/doc_x/test_storage.py
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.doc_x import storage
+from apps.doc_x.models import Document
+from apps.doc_x.serializers import DocumentSerializer
+
+User = get_user_model()
+
+LETTER = "Your council tax bill for 2026 is due on the first of each month.\n\n" * 200
+
+
+class ContentCodecTestCase(SimpleTestCase):
+    def test_round_trip(self):
+        """Short text stays raw, long text is compressed, both decode back"""
+        for codec in ["auto", "zlib", "none"]:
+            with self.subTest(codec=codec), override_settings(DOC_X_CONTENT_CODEC=codec):
+                self.assertEqual(storage.encode("short")[:1], storage.RAW)
+                encoded = storage.encode(LETTER)
+                if codec != "none":
+                    self.assertLess(len(encoded), len(LETTER) // 10)
+                self.assertEqual(storage.decode(encoded), LETTER)
+                self.assertEqual(storage.decode(storage.encode("")), "")
+
+    @override_settings(DOC_X_CONTENT_OFFLOAD_MIN_BYTES=1000)
+    @mock.patch("services.registry.get_s3_client")
+    def test_offload(self, get_s3):
+        """Large text goes to S3 under a content-addressed key and is fetched back"""
+        bucket = {}
+        get_s3.return_value.put_bytes.side_effect = bucket.__setitem__
+        get_s3.return_value.get_bytes.side_effect = bucket.__getitem__
+
+        encoded = storage.encode(LETTER)
+        self.assertEqual(encoded[:1], storage.OFFLOADED)
+        self.assertEqual(storage.encode(LETTER), encoded)
+        self.assertEqual(len(bucket), 1)
+        self.assertEqual(storage.decode(encoded), LETTER)
+
+    @override_settings(DOC_X_CONTENT_OFFLOAD_MIN_BYTES=1000)
+    @mock.patch("services.registry.get_s3_client")
+    def test_offload_failure_stores_inline(self, get_s3):
+        get_s3.return_value.put_bytes.side_effect = RuntimeError("bucket unavailable")
+        encoded = storage.encode(LETTER)
+        self.assertNotEqual(encoded[:1], storage.OFFLOADED)
+        self.assertEqual(storage.decode(encoded), LETTER)
+
+
+class CompressedTextFieldTestCase(TestCase):
+    def test_column_is_compressed(self):
+        document = Document.objects.create(s3_key="a.pdf", content=LETTER, summary="s")
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT content FROM doc_x_document WHERE id = %s", [document.id])
+            stored = bytes(cursor.fetchone()[0])
+        self.assertLess(len(stored), len(LETTER) // 10)
+        self.assertEqual(Document.objects.get(id=document.id).content, LETTER)
+
+    def test_decoded_lazily_and_once(self):
+        """Loading a row does not decompress; the first read does, once"""
+        document = Document.objects.create(s3_key="a.pdf", content=LETTER, summary="s")
+        with mock.patch("apps.doc_x.storage.decode", wraps=storage.decode) as decode:
+            document = Document.objects.get(id=document.id)
+            self.assertEqual(decode.call_count, 0)
+            document.content
+            document.content
+            self.assertEqual(decode.call_count, 1)
+
+    def test_unchanged_content_is_not_reencoded(self):
+        document = Document.objects.create(s3_key="a.pdf", content=LETTER, summary="s")
+        document = Document.objects.get(id=document.id)
+        document.content
+        with mock.patch("apps.doc_x.storage.encode", wraps=storage.encode) as encode:
+            document.summary = "updated"
+            document.save()
+            self.assertEqual(encode.call_count, 0)
+            document.content = "new text"
+            document.save()
+            self.assertEqual(encode.call_count, 1)
+        self.assertEqual(Document.objects.get(id=document.id).content, "new text")
+
+
+class SparseFieldsetsTestCase(TestCase):
+    def test_fields_argument(self):
+        document = Document.objects.create(s3_key="a.pdf", content=LETTER, summary="s")
+        self.assertEqual(set(DocumentSerializer(document, fields="id,summary").data), {"id", "summary"})
+        self.assertIn("content", DocumentSerializer(document, fields="unknown").data)
+
+    @mock.patch("apps.doc_x.processing.extract_text", return_value=LETTER)
+    @mock.patch("apps.doc_x.processing.get_llm_client")
+    @mock.patch("apps.doc_x.processing.get_s3_client")
+    def test_process_document_fields(self, s3_cls, gemini_cls, extract_text):
+        """?fields= leaves the extracted text out of the response"""
+        s3_cls.return_value.head_object.return_value = {"etag": "etag-1", "size": 10}
+        gemini_cls.return_value.DEFAULT_MODEL = gemini_cls.return_value.MODEL_SET = "gemini-2.5-flash"
+        gemini_cls.return_value.build_system_prompt.return_value = "prompt"
+        gemini_cls.return_value.explain_text.return_value = "Plain summary"
+        User.objects.create_user(username="fieldsuser", password="testpass123")
+        client = APIClient()
+        client.login(username="fieldsuser", password="testpass123")
+
+        response = client.post("/api/doc-x/process/?fields=id,summary", {"s3_key": "uploads/b.pdf"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {"id", "summary"})
+        # Normalization drops the trailing blank line
+        self.assertEqual(Document.objects.get(id=response.data["id"]).content, LETTER.strip())
@@ -0,0 +1,84 @@
+# tests/doc_x/test_streaming.py
+
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.doc_x.models import Conversation, Document
+from guidewisey.quota import quota_engine
+from services.semantic_cache import SemanticAnswerCache
+
+User = get_user_model()
+
+
+def parse_events(response):
+    body = b"".join(response.streaming_content).decode()
+    events = []
+    for block in body.strip().split("\n\n"):
+        event_line, data_line = block.split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+class StreamingViewsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        quota_engine.reset()
+        self.addCleanup(quota_engine.reset)
+        self.user = User.objects.create_user(username="streamuser", password="testpass123")
+        self.client.login(username="streamuser", password="testpass123")
+        self.document = Document.objects.create(s3_key="uploads/a.pdf", content="text", summary="Summary")
+        patcher = mock.patch("apps.doc_x.views.answer_cache", SemanticAnswerCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch("apps.doc_x.views.get_llm_client")
+    def test_ask_stream_emits_tokens_then_saves(self, gemini_cls):
+        """Tokens are flushed as they arrive and the turn is saved at the end"""
+        gemini_cls.return_value.stream_text.return_value = iter(["Pay ", "by ", "Friday."])
+
+        response = self.client.post(
+            "/api/doc-x/ask/stream/",
+            {"document_id": self.document.id, "question": "When do I pay?"},
+            format="json",
+            HTTP_ACCEPT="text/event-stream",
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = parse_events(response)
+
+        self.assertEqual([e for e, _ in events], ["token", "token", "token", "done"])
+        self.assertEqual(events[-1][1], {"answer": "Pay by Friday.", "remaining": 2})
+        self.assertEqual(
+            list(Conversation.objects.filter(document=self.document).values_list("role", "message")),
+            [("user", "When do I pay?"), ("assistant", "Pay by Friday.")],
+        )
+
+    @mock.patch("apps.doc_x.views.get_llm_client")
+    def test_stream_error_does_not_save(self, gemini_cls):
+        def failing_stream(*args, **kwargs):
+            yield "Partial"
+            raise RuntimeError("upstream reset")
+
+        gemini_cls.return_value.stream_text.return_value = failing_stream()
+        response = self.client.post(
+            "/api/doc-x/process-text/stream/",
+            {"text": "A letter about council tax arrears."},
+            format="json",
+        )
+        events = parse_events(response)
+
+        self.assertEqual(events[-1], ("error", {"error": "Failed to process text: upstream reset"}))
+        self.assertFalse(Document.objects.filter(s3_key="TEXT").exists())
+
+    def test_validation_error_before_streaming(self):
+        response = self.client.post(
+            "/api/doc-x/ask/stream/",
+            {"document_id": self.document.id},
+            format="json",
+            HTTP_ACCEPT="text/event-stream",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(b"Question is required", response.content)
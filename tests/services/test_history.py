@@ -0,0 +1,94 @@
+# tests/services/test_history.py
+
+import os
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from apps.doc_x.models import Conversation, ConversationSummary, Document
+from guidewisey.quota import quota_engine
+from services.ai import AIClient
+from services.gemini import GeminiClient
+from services.history import HistoryManager
+from services.router import LLMRouter
+from services.semantic_cache import SemanticAnswerCache
+from services.tokens import estimate_messages_tokens
+
+User = get_user_model()
+
+
+def make_turns(count, words=30):
+    return [
+        {"role": "user" if n % 2 == 0 else "assistant", "content": f"turn {n} " + "word " * words}
+        for n in range(count)
+    ]
+
+
+class HistoryManagerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.summarize = mock.Mock(return_value="rolling summary")
+        self.manager = HistoryManager(self.summarize, budget_tokens=400, keep_recent=4, fold_batch=4)
+
+    def test_short_history_sent_verbatim(self):
+        turns = make_turns(6)
+        messages, summary, folded = self.manager.compact("", turns)
+        self.assertEqual(messages, turns)
+        self.assertEqual((summary, folded), ("", 0))
+        self.summarize.assert_not_called()
+
+    def test_long_history_folds_older_turns(self):
+        turns = make_turns(10)
+        messages, summary, folded = self.manager.compact("old summary", turns)
+
+        self.assertEqual(folded, 6)
+        self.assertEqual(summary, "rolling summary")
+        self.assertEqual(messages[0]["role"], "system")
+        self.assertEqual(messages[1:], turns[-4:])
+        self.assertIn("old summary", self.summarize.call_args[0][0])
+        self.assertLessEqual(estimate_messages_tokens(messages), 400)
+
+    def test_fold_failure_keeps_previous_summary(self):
+        self.summarize.side_effect = RuntimeError("quota")
+        messages, summary, folded = self.manager.compact("old summary", make_turns(12))
+        self.assertEqual((summary, folded), ("old summary", 0))
+        self.assertEqual(len(messages), 5)
+
+
+class AskHistoryTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        quota_engine.reset()
+        self.addCleanup(quota_engine.reset)
+        User.objects.create_user(username="historyuser", password="testpass123")
+        self.client.login(username="historyuser", password="testpass123")
+
+    @mock.patch("apps.doc_x.views.answer_cache", new_callable=SemanticAnswerCache)
+    @mock.patch("apps.doc_x.views.get_llm_client")
+    def test_prompt_tokens_flatten(self, get_llm, cache):
+        """Prompt size per turn, as sent to the provider, stops growing once older turns are folded"""
+        cache.enabled = False
+        with mock.patch.dict(os.environ, {"GEMINI_API_KEY": "", "OPENAI_API_KEY": ""}):
+            gemini = GeminiClient()
+        gemini.native = mock.MagicMock()
+        generate = gemini.native.models.generate_content
+        generate.return_value.text = "An answer. " * 40
+        get_llm.return_value = LLMRouter.from_clients(gemini, AIClient(), names=["gemini-native"], hedge=False)
+        document = Document.objects.create(s3_key="a.pdf", content="Council tax bill due 31 March.", summary="s")
+
+        for n in range(30):
+            Conversation.objects.create(document=document, role="user", message=f"question {n} " * 20)
+            Conversation.objects.create(document=document, role="assistant", message="An answer. " * 40)
+        with mock.patch("apps.doc_x.views.save_answer", return_value=1) as save_answer:
+            for n in range(3):
+                self.client.post(
+                    "/api/doc-x/ask/", {"document_id": document.id, "question": f"question {n}?"}, format="json"
+                )
+
+        tokens = [call.args[4] for call in save_answer.call_args_list]
+        self.assertEqual(len(tokens), 3)
+        self.assertLess(max(tokens), 2500)
+        sent = generate.call_args.kwargs["contents"]
+        self.assertEqual(tokens[-1], estimate_messages_tokens([{"content": c["parts"][0]["text"]} for c in sent]))
+        self.assertTrue(ConversationSummary.objects.filter(document=document).exists())
@@ -0,0 +1,55 @@
+# tests/services/test_registry.py
+
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from services.registry import ClientRegistry
+
+
+class ClientRegistryTestCase(SimpleTestCase):
+    def setUp(self):
+        self.registry = ClientRegistry()
+        self.addCleanup(self.registry.reset)
+
+    def test_clients_are_shared(self):
+        """Every checkout returns the same client instance"""
+        self.assertIs(self.registry.s3(), self.registry.s3())
+        self.assertIs(self.registry.gemini(), self.registry.gemini())
+        self.assertEqual(self.registry.metrics()["s3"]["checkouts"], 2)
+
+    def test_concurrent_first_use_builds_one_client(self):
+        """Racing threads on a cold registry construct the client once"""
+        with mock.patch("services.registry.S3Client") as s3_cls:
+            threads = [threading.Thread(target=self.registry.s3) for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(s3_cls.call_count, 1)
+        self.assertEqual(self.registry.metrics()["s3"]["checkouts"], 20)
+
+    def test_router_checkouts(self):
+        """The router's own clients are built once and not counted as checkouts"""
+        self.assertEqual(self.registry.llm_stats(), {})
+        self.assertEqual(self.registry.metrics(), {})
+        for _ in range(3):
+            self.registry.llm()
+        metrics = self.registry.metrics()
+        self.assertEqual(
+            {name: stats["checkouts"] for name, stats in metrics.items()}, {"gemini": 0, "openai": 0, "llm": 3}
+        )
+        self.registry.gemini()
+        self.assertEqual(self.registry.metrics()["gemini"]["checkouts"], 1)
+
+    def test_http_pool_metrics(self):
+        self.registry.ai()
+        stats = self.registry.metrics()["openai"]
+        self.assertIn("pool_size", stats)
+        self.assertEqual(stats.get("open", 0), 0)
+
+    def test_reset_drops_clients(self):
+        first = self.registry.gemini()
+        self.registry.reset()
+        self.assertIsNot(first, self.registry.gemini())
@@ -0,0 +1,163 @@
+# tests/services/test_resilience.py
+
+import os
+import time
+import asyncio
+from unittest import mock
+
+from botocore.exceptions import ClientError
+from django.test import SimpleTestCase
+
+from services import resilience
+from services.gemini import GeminiClient
+from services.resilience import CircuitOpenError, Dependency, run_with_timeout
+from services.router import LLMRouter, Provider
+from services.s3 import S3Client
+
+
+class UpstreamError(Exception):
+    def __init__(self, status_code=None):
+        super().__init__(f"upstream returned {status_code}")
+        self.status_code = status_code
+
+
+def client_error(status, code="Error"):
+    return ClientError({"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "HeadObject")
+
+
+def failing(exc):
+    def fn(timeout):
+        raise exc
+
+    return fn
+
+
+class CircuitBreakerTestCase(SimpleTestCase):
+    def test_opens_after_threshold_and_fails_fast(self):
+        dep = Dependency("upstream", failure_threshold=2, reset_timeout=60)
+        for _ in range(2):
+            with self.assertRaises(UpstreamError):
+                dep.call(failing(UpstreamError(503)))
+
+        fn = mock.Mock()
+        with self.assertRaises(CircuitOpenError):
+            dep.call(fn)
+        fn.assert_not_called()
+        self.assertEqual((dep.state, dep.snapshot()["rejected"]), ("open", 1))
+
+    def test_half_open_probe(self):
+        """After the reset timeout one probe goes through; success closes, failure re-opens"""
+        dep = Dependency("upstream", failure_threshold=1, reset_timeout=0)
+        with self.assertRaises(UpstreamError):
+            dep.call(failing(UpstreamError()))
+        self.assertEqual(dep.state, "half_open")
+
+        with self.assertRaises(UpstreamError):
+            dep.call(failing(UpstreamError()))
+        self.assertEqual(dep.snapshot()["opened"], 2)
+
+        self.assertEqual(dep.call(lambda timeout: "ok"), "ok")
+        self.assertEqual(dep.state, "closed")
+
+    def test_client_errors_do_not_count(self):
+        dep = Dependency("upstream", failure_threshold=1)
+        for exc in [UpstreamError(404), ValueError("bad input"), client_error(404, "NoSuchKey")]:
+            with self.assertRaises(type(exc)):
+                dep.call(failing(exc))
+        self.assertEqual(dep.state, "closed")
+
+    def test_adaptive_timeout(self):
+        dep = Dependency("upstream", min_samples=3, default_timeout=30, multiplier=2, min_timeout=1, max_timeout=10)
+        self.assertEqual(dep.timeout(), 30)
+        for seconds in [0.5, 1.0, 2.0]:
+            dep.record_success(seconds)
+        self.assertEqual(dep.timeout(), 4.0)
+        dep.record_success(20.0)
+        self.assertEqual(dep.timeout(), 10)
+
+        seen = []
+        dep.call(seen.append)
+        self.assertEqual(seen, [10])
+
+
+class RetryTestCase(SimpleTestCase):
+    def test_idempotent_calls_are_retried(self):
+        dep = Dependency("upstream", attempts=3, base_delay=0)
+        fn = mock.Mock(side_effect=[UpstreamError(503), UpstreamError(429), "ok"])
+        self.assertEqual(dep.call(fn, idempotent=True), "ok")
+        self.assertEqual((fn.call_count, dep.snapshot()["retries"]), (3, 2))
+
+    def test_non_idempotent_and_permanent_errors_are_not_retried(self):
+        dep = Dependency("upstream", attempts=3, base_delay=0)
+        for exc, idempotent in [(UpstreamError(503), False), (UpstreamError(400), True)]:
+            fn = mock.Mock(side_effect=exc)
+            with self.assertRaises(UpstreamError):
+                dep.call(fn, idempotent=idempotent)
+            self.assertEqual(fn.call_count, 1)
+
+    def test_async_retry(self):
+        dep = Dependency("upstream", attempts=2, base_delay=0)
+        fn = mock.AsyncMock(side_effect=[UpstreamError(502), "ok"])
+        self.assertEqual(asyncio.run(dep.acall(fn, idempotent=True)), "ok")
+
+
+class ClientIntegrationTestCase(SimpleTestCase):
+    def setUp(self):
+        resilience.reset()
+        self.addCleanup(resilience.reset)
+
+    def test_s3_reads_retry_transient_errors_only(self):
+        s3 = S3Client()
+        s3.client = mock.Mock()
+        s3.gate.base_delay = 0
+        self.addCleanup(setattr, s3.gate, "base_delay", resilience.RETRY_BASE_DELAY)
+        s3.client.head_object.side_effect = [client_error(503), {"ETag": '"abc"', "ContentLength": 3}]
+        self.assertEqual(s3.head_object("a.pdf")["etag"], "abc")
+
+        s3.client.head_object.reset_mock(side_effect=True)
+        s3.client.head_object.side_effect = client_error(404, "NoSuchKey")
+        with self.assertRaises(ClientError):
+            s3.head_object("missing.pdf")
+        self.assertEqual(s3.client.head_object.call_count, 1)
+
+    def test_run_with_timeout(self):
+        self.assertEqual(run_with_timeout(lambda: "ok", 1), "ok")
+        started = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            run_with_timeout(lambda: time.sleep(1), 0.05)
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_s3_calls_use_the_adaptive_timeout(self):
+        """One extra client per power-of-two read timeout, below the configured one"""
+        s3 = S3Client()
+        s3.client = mock.Mock()
+        with mock.patch.object(s3, "_make_client", side_effect=lambda timeout: mock.Mock(timeout=timeout)):
+            self.assertIs(s3._client_for(resilience.TIMEOUT_DEFAULT), s3.client)
+            self.assertEqual(s3._client_for(3).timeout, 4)
+            self.assertIs(s3._client_for(3.5), s3._client_for(3))
+
+            with mock.patch.object(s3.gate, "timeout", return_value=3):
+                s3._client_for(3).head_object.return_value = {"ETag": '"abc"', "ContentLength": 3}
+                self.assertEqual(s3.head_object("a.pdf")["etag"], "abc")
+        s3.client.head_object.assert_not_called()
+
+    def test_native_gemini_call_is_bounded(self):
+        with mock.patch.dict(os.environ, {"GEMINI_API_KEY": ""}):
+            gemini = GeminiClient()
+        gemini.native = mock.MagicMock()
+        gemini.native.models.generate_content.side_effect = lambda **kwargs: time.sleep(1)
+        with mock.patch.object(resilience.dependency("gemini-native"), "timeout", return_value=0.05):
+            with self.assertRaises(TimeoutError):
+                gemini._call_native("question?", [], "system", "model")
+        self.assertEqual(resilience.metrics()["gemini-native"]["consecutive_failures"], 1)
+
+    def test_router_skips_open_breaker(self):
+        resilience.dependency("primary", failure_threshold=1, reset_timeout=60).record_failure(UpstreamError())
+        router = LLMRouter(
+            [Provider("primary", "m", lambda *args: "primary"), Provider("backup", "m", lambda *args: "backup")],
+            "m",
+            lambda *args: "system",
+            hedge=False,
+        )
+        self.assertEqual(router.explain_text("question?"), "backup")
+        self.assertEqual(resilience.metrics()["primary"]["state"], "open")
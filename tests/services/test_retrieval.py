@@ -0,0 +1,93 @@
+# tests/services/test_retrieval.py
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.doc_x.indexing import build_document_index, get_document_index
+from apps.doc_x.models import Document, DocumentIndex
+from guidewisey.quota import quota_engine
+from services.retrieval import BM25Index, RETRIEVAL_TOKEN_BUDGET
+from services.semantic_cache import SemanticAnswerCache
+from services.tokens import estimate_tokens
+
+User = get_user_model()
+
+FILLER = "This section describes general terms and conditions that apply to all residents. " * 6
+LETTER = "\n\n".join(
+    [
+        "Dear resident, this letter concerns your council tax assessment for 2024.",
+        FILLER,
+        "Payment deadline: the amount of 412 euro must be paid before 31 March.",
+        FILLER,
+        "Objection: you may object to this assessment within six weeks by writing to the tax office.",
+        FILLER,
+    ]
+)
+
+
+class BM25IndexTestCase(SimpleTestCase):
+    def setUp(self):
+        self.index = BM25Index.build(LETTER, chunk_tokens=40)
+
+    def test_ranks_matching_chunk_first(self):
+        number, _ = self.index.search("When is the payment deadline?", k=1)[0]
+        self.assertIn("31 March", self.index.chunks[number])
+
+    def test_select_respects_budget_and_document_order(self):
+        chunks = self.index.select("deadline objection tax", k=3, token_budget=60)
+        self.assertLessEqual(sum(estimate_tokens(chunk) for chunk in chunks), 60)
+        positions = [LETTER.index(chunk) for chunk in chunks]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_no_match_falls_back_to_opening_chunks(self):
+        chunks = self.index.select("zzz", k=1, token_budget=1000)
+        self.assertEqual(chunks, [self.index.chunks[0]])
+
+    def test_round_trips_through_dict(self):
+        loaded = BM25Index.from_dict(self.index.to_dict())
+        self.assertEqual(loaded.search("objection"), self.index.search("objection"))
+
+
+class AskRetrievalTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        quota_engine.reset()
+        self.addCleanup(quota_engine.reset)
+        User.objects.create_user(username="retrieveuser", password="testpass123")
+        self.client.login(username="retrieveuser", password="testpass123")
+
+    @mock.patch("apps.doc_x.views.answer_cache", new_callable=SemanticAnswerCache)
+    @mock.patch("apps.doc_x.views.get_llm_client")
+    def test_ask_sends_relevant_excerpt(self, get_gemini, cache):
+        """ask() grounds the prompt in the matching chunk, not the whole document"""
+        get_gemini.return_value.explain_text.return_value = "Before 31 March."
+        document = Document.objects.create(s3_key="tax.pdf", content=LETTER * 60, summary="s")
+
+        response = self.client.post(
+            "/api/doc-x/ask/", {"document_id": document.id, "question": "What is the payment deadline?"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        prompt = get_gemini.return_value.explain_text.call_args[0][0]
+        self.assertIn("must be paid before 31 March", prompt)
+        self.assertTrue(prompt.endswith("Question: What is the payment deadline?"))
+        self.assertLess(estimate_tokens(prompt), RETRIEVAL_TOKEN_BUDGET + 50)
+        self.assertGreater(estimate_tokens(document.content), 10 * RETRIEVAL_TOKEN_BUDGET)
+        self.assertTrue(DocumentIndex.objects.filter(document=document).exists())
+
+    @override_settings(DOC_X_CONTENT_OFFLOAD_MIN_BYTES=1)
+    def test_index_is_stored_compressed_inline(self):
+        """The index row holds compressed bytes, never an S3 reference, and still loads"""
+        document = Document.objects.create(s3_key="tax.pdf", content="", summary="s")
+        document.content = LETTER * 60
+        with mock.patch("services.registry.get_s3_client") as get_s3:
+            index = build_document_index(document)
+        get_s3.assert_not_called()
+
+        raw = bytes(DocumentIndex.objects.values_list("data", flat=True).get(document=document))
+        self.assertIn(raw[:1], (b"S", b"Z"))
+        self.assertLess(len(raw), len(str(index.to_dict())) // 2)
+        self.assertEqual(get_document_index(document).to_dict(), index.to_dict())
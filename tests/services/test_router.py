@@ -0,0 +1,177 @@
+# tests/services/test_router.py
+
+import asyncio
+import os
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from services import resilience
+from services.ai import AIClient
+from services.gemini import GeminiClient
+from services.router import LLM_OPENAI_MODEL, LatencyTracker, LLMRouter, Provider, percentile
+
+
+def fake_provider(name, latency, answer=None, fail=False, calls=None):
+    def explain(text, conversation, language, system_prompt):
+        if calls is not None:
+            calls.append(name)
+        time.sleep(latency)
+        if fail:
+            raise RuntimeError(f"{name} down")
+        return answer or name
+
+    async def aexplain(text, conversation, language, system_prompt):
+        if calls is not None:
+            calls.append(name)
+        await asyncio.sleep(latency)
+        if fail:
+            raise RuntimeError(f"{name} down")
+        return answer or name
+
+    def stream(text, conversation, language, system_prompt):
+        if fail:
+            raise RuntimeError(f"{name} down")
+        yield from [name, "!"]
+
+    return Provider(name, "m", explain, aexplain, stream)
+
+
+def make_router(*providers, **kwargs):
+    kwargs.setdefault("hedge_min_delay", 0.0)
+    kwargs.setdefault("min_samples", 3)
+    return LLMRouter(list(providers), "m", lambda *args: "system", **kwargs)
+
+
+class PercentileTestCase(SimpleTestCase):
+    def test_nearest_rank(self):
+        samples = list(range(1, 101))
+        self.assertEqual((percentile(samples, 50), percentile(samples, 95)), (50, 95))
+        self.assertIsNone(percentile([], 50))
+
+    def test_window_is_rolling(self):
+        tracker = LatencyTracker(window=3)
+        for seconds in [10, 10, 10, 1, 1, 1]:
+            tracker.record("a:m", seconds)
+        self.assertEqual(tracker.percentile("a:m", 95), 1)
+
+
+class LLMRouterTestCase(SimpleTestCase):
+    def test_routes_to_fastest_measured_provider(self):
+        slow, fast = fake_provider("slow", 0.0), fake_provider("fast", 0.0)
+        router = make_router(slow, fast, hedge=False)
+        for _ in range(3):
+            router.tracker.record(slow.key, 2.0)
+            router.tracker.record(fast.key, 0.5)
+        self.assertEqual(router.explain_text("question?"), "fast")
+
+    def test_unmeasured_providers_keep_priority_order(self):
+        router = make_router(fake_provider("first", 0.0), fake_provider("second", 0.0), hedge=False)
+        self.assertEqual(router.explain_text("question?"), "first")
+
+    def test_hedge_wins_on_a_slow_primary(self):
+        """A primary slower than its p95 is hedged; the faster answer is returned"""
+        primary, backup = fake_provider("primary", 0.5), fake_provider("backup", 0.01)
+        router = make_router(primary, backup, hedge_default_delay=0.05)
+
+        started = time.perf_counter()
+        self.assertEqual(router.explain_text("question?"), "backup")
+        self.assertLess(time.perf_counter() - started, 0.4)
+        stats = router.stats()
+        self.assertEqual((stats[backup.key]["hedges"], stats[backup.key]["hedge_wins"]), (1, 1))
+
+    def test_usage_reports_the_answering_provider(self):
+        primary, backup = fake_provider("primary", 0.5), fake_provider("backup", 0.01)
+        primary.prompt_tokens = lambda text, conversation, language, system_prompt: 100
+        backup.prompt_tokens = lambda text, conversation, language, system_prompt: 120
+        router, usage = make_router(primary, backup, hedge_default_delay=0.05), {}
+
+        router.explain_text("question?", usage=usage)
+
+        self.assertEqual(usage, {"provider": backup.key, "prompt_tokens": 120})
+
+    def test_no_hedge_within_deadline(self):
+        calls = []
+        router = make_router(
+            fake_provider("primary", 0.01, calls=calls), fake_provider("backup", 0.0, calls=calls),
+            hedge_default_delay=1.0,
+        )
+        self.assertEqual(router.explain_text("question?"), "primary")
+        self.assertEqual(calls, ["primary"])
+
+    def test_failover_and_cooldown(self):
+        """Failures fall through to the next provider; repeated ones take a provider out of rotation"""
+        calls = []
+        broken, working = fake_provider("broken", 0.0, fail=True, calls=calls), fake_provider("ok", 0.0, calls=calls)
+        router = make_router(broken, working, tracker=LatencyTracker(failure_threshold=2, cooldown=60))
+
+        for _ in range(3):
+            self.assertEqual(router.explain_text("question?"), "ok")
+        self.assertEqual(calls, ["broken", "ok", "broken", "ok", "ok"])
+        self.assertFalse(router.stats()[broken.key]["healthy"])
+
+    def test_all_failing_raises(self):
+        router = make_router(fake_provider("a", 0.0, fail=True), fake_provider("b", 0.0, fail=True))
+        with self.assertRaises(RuntimeError):
+            router.explain_text("question?")
+
+    def test_async_hedge(self):
+        primary, backup = fake_provider("primary", 0.5), fake_provider("backup", 0.01)
+        router = make_router(primary, backup, hedge_default_delay=0.05)
+
+        started = time.perf_counter()
+        self.assertEqual(asyncio.run(router.aexplain_text("question?")), "backup")
+        self.assertLess(time.perf_counter() - started, 0.4)
+
+    def test_stream_fails_over_before_first_chunk(self):
+        router = make_router(fake_provider("broken", 0.0, fail=True), fake_provider("ok", 0.0))
+        self.assertEqual(list(router.stream_text("question?")), ["ok", "!"])
+
+    def test_no_available_provider(self):
+        router = make_router(Provider("off", "m", explain=None, available=False))
+        with self.assertRaises(RuntimeError):
+            router.explain_text("question?")
+
+    def test_from_clients(self):
+        """Providers follow client availability; OpenAI gets the Gemini system prompt"""
+        gemini = mock.Mock(DEFAULT_MODEL="gemini-2.5-flash", native=None, openai_style=None)
+        gemini.build_system_prompt.return_value = "system in French"
+        ai = mock.Mock(client=object())
+        ai.explain_text.return_value = "Bonjour"
+
+        router = LLMRouter.from_clients(gemini, ai, hedge=False)
+
+        self.assertEqual([p.name for p in router.ranked()], ["openai"])
+        self.assertEqual(router.MODEL_SET, ",".join(sorted(["gemini-2.5-flash", LLM_OPENAI_MODEL])))
+        self.assertEqual(router.explain_text("question?", preferred_language="French"), "Bonjour")
+        gemini.build_system_prompt.assert_called_with(None, "French")
+        self.assertEqual(ai.explain_text.call_args.kwargs["system_prompt"], "system in French")
+
+
+class ConversationRoutingTestCase(SimpleTestCase):
+    HISTORY = [{"role": "user", "content": "Earlier question"}, {"role": "assistant", "content": "Earlier answer"}]
+
+    def setUp(self):
+        resilience.reset()
+        self.addCleanup(resilience.reset)
+        with mock.patch.dict(os.environ, {"GEMINI_API_KEY": "", "OPENAI_API_KEY": ""}):
+            self.gemini, self.ai = GeminiClient(), AIClient()
+        self.gemini.native, self.gemini.openai_style, self.ai.client = (mock.MagicMock() for _ in range(3))
+
+    def sent(self, name):
+        """The history part of the payload the provider's SDK was called with."""
+        if name == "gemini-native":
+            contents = self.gemini.native.models.generate_content.call_args.kwargs["contents"]
+            return [(c["role"], c["parts"][0]["text"]) for c in contents[:-1]]
+        client = self.gemini.openai_style if name == "gemini-openai" else self.ai.client
+        messages = client.chat.completions.create.call_args.kwargs["messages"]
+        return [(m["role"], m["content"]) for m in messages[1:-1]]
+
+    def test_conversation_reaches_every_provider(self):
+        providers = [("gemini-native", "model"), ("gemini-openai", "assistant"), ("openai", "assistant")]
+        for name, assistant_role in providers:
+            with self.subTest(provider=name):
+                router = LLMRouter.from_clients(self.gemini, self.ai, names=[name], hedge=False)
+                router.explain_text("Follow-up question?", self.HISTORY)
+                self.assertEqual(self.sent(name), [("user", "Earlier question"), (assistant_role, "Earlier answer")])
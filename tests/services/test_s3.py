@@ -0,0 +1,115 @@
+# tests/services/test_s3.py
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from django.test import SimpleTestCase
+
+from services import resilience
+from services.s3 import S3Client, S3_LARGE_OBJECT_BYTES
+
+# Optional imports
+try:
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+MB = 1024 * 1024
+ENV = {
+    "S3_BUCKET": "test-bucket",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_REGION": "us-east-1",
+}
+
+
+class TransferProfileTestCase(SimpleTestCase):
+    def test_profile_follows_size_and_pool(self):
+        with mock.patch.dict(os.environ, {"S3_BUCKET": ""}):
+            s3 = S3Client(max_pool_connections=4)
+
+        self.assertIs(s3.transfer_config(), s3.transfer_profiles["default"])
+        self.assertIs(s3.transfer_config(size=S3_LARGE_OBJECT_BYTES), s3.transfer_profiles["large"])
+        self.assertIs(s3.transfer_config("serial", size=S3_LARGE_OBJECT_BYTES), s3.transfer_profiles["serial"])
+        self.assertLessEqual(max(s3.transfer_profiles[name].max_concurrency for name in ["default", "large"]), 4)
+        self.assertFalse(s3.transfer_profiles["serial"].use_threads)
+
+
+@unittest.skipUnless(mock_aws, "moto is not installed")
+class S3TransferTestCase(SimpleTestCase):
+    def setUp(self):
+        resilience.reset()
+        self.addCleanup(resilience.reset)
+        patcher = mock.patch.dict(os.environ, ENV)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="test-bucket")
+        self.s3 = S3Client()
+        self.s3.transfer_profiles["small-parts"] = TransferConfig(
+            multipart_threshold=5 * MB, multipart_chunksize=5 * MB, max_concurrency=4
+        )
+        self.ranges = []
+        self.s3.client.meta.events.register("before-call.s3.GetObject", self.count_range)
+        self.data = os.urandom(12 * MB)
+
+    def count_range(self, params, **kwargs):
+        self.ranges.append(params.get("headers", {}).get("Range"))
+
+    def test_multipart_round_trip(self):
+        """Large objects upload in parts and come back as parallel ranged GETs"""
+        with tempfile.NamedTemporaryFile() as source:
+            source.write(self.data)
+            source.flush()
+            self.s3.upload_file(source.name, "big.pdf", profile="small-parts")
+
+        with self.s3.open_stream("big.pdf", max_memory=MB, profile="small-parts") as buffer:
+            self.assertEqual(buffer.read(), self.data)
+        self.assertEqual(len(self.ranges), 3)
+        self.assertTrue(all(header and header.startswith("bytes=") for header in self.ranges))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "big.pdf")
+            self.s3.download_file("big.pdf", path, profile="serial")
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), self.data)
+
+        stats = self.s3.stats.snapshot()
+        self.assertEqual((stats["upload"]["count"], stats["download"]["count"]), (1, 2))
+        self.assertEqual(stats["download"]["bytes"], 2 * len(self.data))
+        self.assertIsNotNone(stats["download"]["p95_ms"])
+
+    def test_small_objects_use_one_get(self):
+        self.s3.put_bytes("small.txt", b"hello world")
+        with self.s3.open_stream("small.txt") as buffer:
+            self.assertEqual(buffer.read(), b"hello world")
+        self.assertEqual(self.ranges, [None])
+
+    def test_partial_reads(self):
+        self.s3.put_bytes("doc.pdf", b"%PDF-1.7 rest of the file")
+
+        self.assertEqual(self.s3.read_prefix("doc.pdf", 5), b"%PDF-")
+        self.assertEqual(self.s3.get_range("doc.pdf", 9), b"rest of the file")
+        self.assertEqual(self.s3.get_range("doc.pdf", 9, 12), b"rest")
+        self.assertEqual(self.ranges, ["bytes=0-4", "bytes=9-", "bytes=9-12"])
+        self.assertEqual(self.s3.stats.snapshot()["range"]["bytes"], 5 + 16 + 4)
+
+    def test_partial_reads_past_the_end(self):
+        """Short and empty objects give what they have instead of a 416"""
+        self.s3.put_bytes("short.txt", b"abc")
+        self.s3.put_bytes("empty.txt", b"")
+
+        self.assertEqual(self.s3.read_prefix("short.txt", 8), b"abc")
+        self.assertEqual(self.s3.read_prefix("empty.txt", 8), b"")
+        self.assertEqual(self.s3.get_range("short.txt", 3), b"")
+        for bad in [lambda: self.s3.read_prefix("short.txt", 0), lambda: self.s3.get_range("short.txt", -1)]:
+            with self.assertRaises(ValueError):
+                bad()
+        self.assertEqual(len(self.ranges), 3)
@@ -0,0 +1,119 @@
+# tests/services/test_semantic_cache.py
+
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from apps.doc_x.models import Document
+from guidewisey.quota import quota_engine
+from services.semantic_cache import SemanticAnswerCache
+
+User = get_user_model()
+
+
+class SemanticAnswerCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        self.cache = SemanticAnswerCache(threshold=0.8, max_per_document=2, max_documents=2)
+
+    def test_rephrased_question_hits(self):
+        self.cache.store("doc-a", "What is the deadline?", "Friday 12 May", latency=2.5)
+        self.assertEqual(self.cache.lookup("doc-a", "whats the deadline"), "Friday 12 May")
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 0))
+        self.assertEqual(stats["saved_latency_seconds"], 2.5)
+
+    def test_different_question_misses(self):
+        self.cache.store("doc-a", "What is the deadline?", "Friday 12 May")
+        self.assertIsNone(self.cache.lookup("doc-a", "Do I need to pay?"))
+
+    def test_negation_and_wh_word_changes_miss(self):
+        """Questions that embed alike but ask something else never share an answer"""
+        pairs = [
+            ("Do I need to pay?", ["Do I not need to pay?", "Who do I need to pay?", "Don't I need to pay?"]),
+            ("What happens if I do not pay?", ["What happens if I pay?"]),
+            ("What is the deadline for the appeal?", ["What is the deadline for the payment?"]),
+        ]
+        for stored, questions in pairs:
+            self.cache.store("doc-a", stored, "cached answer")
+            for question in questions:
+                with self.subTest(stored=stored, question=question):
+                    self.assertIsNone(self.cache.lookup("doc-a", question))
+        self.assertEqual(self.cache.stats()["hits"], 0)
+
+    def test_contractions_still_hit(self):
+        self.cache.store("doc-a", "What happens if I don't pay?", "A reminder letter")
+        self.assertEqual(self.cache.lookup("doc-a", "what happens if i do not pay"), "A reminder letter")
+
+    def test_scoped_per_document(self):
+        self.cache.store("doc-a", "What is the deadline?", "Friday 12 May")
+        self.assertIsNone(self.cache.lookup("doc-b", "What is the deadline?"))
+
+    def test_lru_within_document(self):
+        self.cache.store("doc-a", "What is the deadline?", "Friday")
+        self.cache.store("doc-a", "Do I need to pay?", "Yes")
+        self.cache.lookup("doc-a", "What is the deadline?")  # refresh
+        self.cache.store("doc-a", "Who sent this letter?", "The council")
+
+        self.assertEqual(self.cache.lookup("doc-a", "What is the deadline?"), "Friday")
+        self.assertIsNone(self.cache.lookup("doc-a", "Do I need to pay?"))
+
+    def test_lru_across_documents(self):
+        for key in ["doc-a", "doc-b", "doc-c"]:
+            self.cache.store(key, "What is the deadline?", key)
+        self.assertIsNone(self.cache.lookup("doc-a", "What is the deadline?"))
+        self.assertEqual(self.cache.stats()["documents"], 2)
+
+
+class AskAnswerCacheTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        quota_engine.reset()
+        self.addCleanup(quota_engine.reset)
+        User.objects.create_user(username="askuser", password="testpass123")
+        self.client.login(username="askuser", password="testpass123")
+
+    @mock.patch("apps.doc_x.views.answer_cache", new_callable=SemanticAnswerCache)
+    @mock.patch("apps.doc_x.views.get_llm_client")
+    def test_answers_are_scoped_to_document(self, get_gemini, cache):
+        """A cached answer is reused for the same document only, not another upload of the same letter"""
+        get_gemini.return_value.explain_text.return_value = "Pay by Friday."
+        first = Document.objects.create(s3_key="a.pdf", content="Council tax bill", summary="s")
+        second = Document.objects.create(s3_key="b.pdf", content="Council tax bill", summary="s")
+        cache.store(f"document:{first.id}", "When do I pay?", "Cached: pay by Friday.")
+
+        answers = [
+            self.client.post(
+                "/api/doc-x/ask/", {"document_id": document.id, "question": "when do i pay"}, format="json"
+            ).data["answer"]
+            for document in [first, second]
+        ]
+
+        self.assertEqual(answers, ["Cached: pay by Friday.", "Pay by Friday."])
+        self.assertEqual(get_gemini.return_value.explain_text.call_count, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    @mock.patch("apps.doc_x.views.answer_cache", new_callable=SemanticAnswerCache)
+    @mock.patch("apps.doc_x.views.get_llm_client")
+    def test_repeat_questions_hit(self, get_gemini, cache):
+        """Asking again on the same document, after new turns, is answered from the cache"""
+        def slow_answer(*args, **kwargs):
+            time.sleep(0.02)
+            return "Pay by Friday."
+
+        get_gemini.return_value.explain_text.side_effect = slow_answer
+        document = Document.objects.create(s3_key="a.pdf", content="Council tax bill", summary="s")
+
+        for question in ["When do I pay?", "When do I pay?", "when do i pay"]:
+            response = self.client.post(
+                "/api/doc-x/ask/", {"document_id": document.id, "question": question}, format="json"
+            )
+            self.assertEqual(response.data["answer"], "Pay by Friday.")
+
+        stats = cache.stats()
+        self.assertEqual(get_gemini.return_value.explain_text.call_count, 1)
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (2, 1, round(2 / 3, 4)))
+        self.assertGreaterEqual(stats["saved_latency_seconds"], 0.04)
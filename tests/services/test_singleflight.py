@@ -0,0 +1,140 @@
+# tests/services/test_singleflight.py
+
+import asyncio
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from services.singleflight import SingleFlight, make_key
+
+N = 8
+
+
+class SlowProvider:
+    """Fake upstream that takes `latency` seconds and counts its calls."""
+
+    def __init__(self, latency=0.2, fail=False):
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    def explain(self):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return "summary"
+
+    async def aexplain(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return "summary"
+
+
+def run_concurrently(target, n=N):
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+class SingleFlightTestCase(SimpleTestCase):
+    def test_identical_requests_share_one_call(self):
+        flight, provider = SingleFlight(lock_dir=""), SlowProvider()
+        key = make_key("process_text", "letter", "model", "prompt")
+
+        results, errors = run_concurrently(lambda: flight.do(key, provider.explain))
+
+        self.assertEqual((results, errors), (["summary"] * N, []))
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(flight.stats(), {"leaders": 1, "coalesced": N - 1, "rechecked": 0, "in_flight": 0})
+
+    def test_different_inputs_are_not_coalesced(self):
+        flight, provider = SingleFlight(lock_dir=""), SlowProvider(latency=0.05)
+        counter = iter(range(N))
+        run_concurrently(lambda: flight.do(make_key("process_text", next(counter)), provider.explain))
+        self.assertEqual(provider.calls, N)
+
+    def test_failure_reaches_every_waiter_and_is_not_kept(self):
+        flight, provider = SingleFlight(lock_dir=""), SlowProvider(fail=True)
+        results, errors = run_concurrently(lambda: flight.do("key", provider.explain))
+        self.assertEqual((len(results), len(errors), provider.calls), (0, N, 1))
+
+        provider.fail = False
+        self.assertEqual(flight.do("key", provider.explain), "summary")
+
+    def test_sync_and_async_callers_share_one_call(self):
+        flight, provider = SingleFlight(lock_dir=""), SlowProvider()
+
+        async def main():
+            return await asyncio.gather(
+                asyncio.to_thread(flight.do, "key", provider.explain), flight.ado("key", provider.aexplain)
+            )
+
+        self.assertEqual(asyncio.run(main()), ["summary", "summary"])
+        self.assertEqual(provider.calls, 1)
+
+    def test_async_identical_requests_share_one_call(self):
+        flight, provider = SingleFlight(lock_dir=""), SlowProvider()
+
+        async def main():
+            return await asyncio.gather(*(flight.ado("key", provider.aexplain) for _ in range(N)))
+
+        self.assertEqual(asyncio.run(main()), ["summary"] * N)
+        self.assertEqual(provider.calls, 1)
+
+    def test_cancelled_leader_hands_over_to_a_waiter(self):
+        """A leader whose client went away does not fail its waiters; one of them runs the call instead"""
+        flight, provider = SingleFlight(lock_dir=""), SlowProvider(latency=0.1)
+
+        async def main():
+            leader = asyncio.create_task(flight.ado("key", provider.aexplain))
+            await asyncio.sleep(0.01)
+            waiters = [asyncio.create_task(flight.ado("key", provider.aexplain)) for _ in range(N)]
+            sync_waiter = asyncio.create_task(asyncio.to_thread(flight.do, "key", provider.explain))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await asyncio.gather(*waiters, sync_waiter)
+
+        self.assertEqual(asyncio.run(main()), ["summary"] * (N + 1))
+        self.assertEqual(provider.calls, 2)
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    def test_cross_process_lock_rechecks_shared_store(self):
+        """Two flights (standing in for two workers) share work through the file lock and the store"""
+        store, provider = {}, SlowProvider()
+
+        def compute():
+            store["key"] = provider.explain()
+            return store["key"]
+
+        with tempfile.TemporaryDirectory() as lock_dir:
+            workers = [SingleFlight(lock_dir=lock_dir) for _ in range(2)]
+            results = []
+
+            def worker(flight):
+                results.append(flight.do("key", compute, recheck=lambda: store.get("key")))
+
+            threads = [threading.Thread(target=worker, args=(w,)) for w in workers]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(results, ["summary", "summary"])
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(sum(w.stats()["rechecked"] for w in workers), 1)
@@ -0,0 +1,66 @@
+# tests/services/test_summarize.py
+
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from services.summarize import MAP_PROMPT, MapReduceSummarizer
+from services.tokens import chunk_text, estimate_tokens
+
+PARAGRAPH = "Please submit the signed form and proof of residence before Friday 12 May. "
+
+
+class ChunkTextTestCase(SimpleTestCase):
+    def test_chunks_respect_budget_and_order(self):
+        text = "\n\n".join(f"Paragraph {n}. {PARAGRAPH}" for n in range(50))
+        chunks = chunk_text(text, max_tokens=100)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(estimate_tokens(chunk) <= 100 for chunk in chunks))
+        self.assertEqual(" ".join(chunks).split(), text.split())
+
+    def test_oversized_paragraph_is_split(self):
+        chunks = chunk_text(PARAGRAPH * 40, max_tokens=50)
+        self.assertTrue(all(estimate_tokens(chunk) <= 50 for chunk in chunks))
+
+
+class MapReduceSummarizerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def explain(self, text, system_prompt=None, **kwargs):
+        with self.lock:
+            self.calls.append((text, system_prompt))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return "notes" if system_prompt == MAP_PROMPT else "final summary"
+
+    def test_short_text_is_single_shot(self):
+        summarizer = MapReduceSummarizer(self.explain, single_shot_tokens=1000, chunk_tokens=200)
+        self.assertEqual(summarizer.summarize(PARAGRAPH), "final summary")
+        self.assertEqual(len(self.calls), 1)
+
+    def test_long_text_maps_chunks_then_reduces(self):
+        text = "\n\n".join(PARAGRAPH for _ in range(40))
+        summarizer = MapReduceSummarizer(self.explain, single_shot_tokens=200, chunk_tokens=100, max_workers=3)
+
+        self.assertEqual(summarizer.summarize(text, system_prompt="explain"), "final summary")
+
+        chunks = chunk_text(text, 100)
+        map_calls = [call for call in self.calls if call[1] == MAP_PROMPT]
+        self.assertEqual(len(map_calls), len(chunks))
+        self.assertLessEqual(self.peak, 3)
+        final_text, final_prompt = self.calls[-1]
+        self.assertEqual(final_prompt, "explain")
+        self.assertIn(f"Notes on part {len(chunks)} of {len(chunks)}", final_text)
+
+    def test_model_context_caps_single_shot(self):
+        summarizer = MapReduceSummarizer(self.explain, single_shot_tokens=10**9, model="gpt-4o-mini")
+        self.assertEqual(summarizer.single_shot_tokens, 64_000)